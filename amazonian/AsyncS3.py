@@ -0,0 +1,168 @@
+from asyncio import Lock, Semaphore
+
+from .S3 import S3, S3Path
+from .S3File import S3Files
+
+
+class AsyncS3:
+	def __init__(self, s3=None, max_concurrency=64):
+		"""
+		coroutine versions of the S3 operations on the async core of s3fs, for use in an event loop,
+		at most max_concurrency requests run at the same time
+		:param S3 or NoneType s3: its credentials, root and metadata cache are used, a default S3 if None
+		:type max_concurrency: int
+		"""
+		if s3 is None:
+			s3 = S3()
+		self._s3 = s3
+		self._max_concurrency = max_concurrency
+		self._file_system = None
+		self._semaphore = None
+		self._lock = None
+
+	@property
+	def s3(self):
+		"""
+		:rtype: S3
+		"""
+		return self._s3
+
+	async def _get_file_system(self):
+		"""
+		the asynchronous S3FileSystem is created in the running event loop on first use,
+		the coroutines that need it before set_session is done wait for the same one
+		:rtype: s3fs.S3FileSystem
+		"""
+		if self._file_system is not None:
+			return self._file_system
+		if self._lock is None:
+			# created in the running event loop, nothing else runs between the check and the assignment
+			self._lock = Lock()
+		async with self._lock:
+			if self._file_system is None:
+				from s3fs import S3FileSystem
+				file_system = S3FileSystem(
+					key=self._s3._key, secret=self._s3._secret, use_ssl=False, asynchronous=True
+				)
+				await file_system.set_session()
+				self._semaphore = Semaphore(self._max_concurrency)
+				self._file_system = file_system
+		return self._file_system
+
+	def _get_absolute_path(self, path):
+		path = self._s3._get_path(path=path)
+		return self._s3._get_absolute_path(path)
+
+	async def _call(self, method, *args, **kwargs):
+		file_system = await self._get_file_system()
+		async with self._semaphore:
+			return await self._s3.retry_policy.call_async(
+				getattr(file_system, method), *args, key=args[0] if len(args) > 0 else None, **kwargs
+			)
+
+	async def ls(self, path, exclude_empty=False, sort_by='path', reverse=False, **kwargs):
+		"""
+		:type path: str or S3Path
+		:type exclude_empty: bool
+		:param str sort_by: 'path', 'size', 'modified_at', 'etag' or None
+		:type reverse: bool
+		:rtype: list[S3Path]
+		"""
+		path = self._get_absolute_path(path=path)
+		cache = self._s3.cache if len(kwargs) == 0 else None
+		files = None if cache is None else cache.get_listing(path=self._s3._get_cache_key(path=path))
+		if files is None:
+			files = S3Files(await self._call('_ls', path, detail=True, **kwargs))
+			files = self._s3._store_listing(path=path, files=files, use_cache=cache is not None)
+
+		files = files.filter(exclude_empty=exclude_empty)
+		files.sort(by=sort_by, reverse=reverse)
+		return [S3Path(s3=self._s3, path=x.path, file=x) for x in files]
+
+	async def exists(self, path):
+		"""
+		:type path: str or S3Path
+		:rtype: bool
+		"""
+		if self._s3._get_cached_file(path=path) is not None:
+			return True
+		return await self._call('_exists', self._get_absolute_path(path=path))
+
+	async def get_size(self, path):
+		"""
+		:type path: str or S3Path
+		:rtype: int
+		"""
+		cached_file = self._s3._get_cached_file(path=path)
+		if cached_file is not None:
+			return cached_file.size
+		return await self._call('_size', self._get_absolute_path(path=path))
+
+	async def read(self, path, mode='rb', encoding='utf-8'):
+		"""
+		:type path: str or S3Path
+		:param str mode: 'rb' for bytes or 'r' for a string decoded with encoding
+		:type encoding: str
+		:rtype: bytes or str
+		"""
+		result = await self._call('_cat_file', self._get_absolute_path(path=path))
+		if 'b' not in mode:
+			return result.decode(encoding)
+		return result
+
+	async def read_bytes(self, path):
+		return await self.read(path=path, mode='rb')
+
+	async def write(self, path, obj, encoding='utf-8'):
+		"""
+		:type path: str or S3Path
+		:type obj: bytes or str
+		:type encoding: str
+		"""
+		if isinstance(obj, str):
+			obj = obj.encode(encoding)
+		path = self._get_absolute_path(path=path)
+		try:
+			return await self._call('_pipe_file', path, obj)
+		finally:
+			self._s3._invalidate_cache(path)
+
+	async def write_bytes(self, path, bytes):
+		return await self.write(path=path, obj=bytes)
+
+	async def cp(self, path1, path2):
+		"""
+		server-side copy of one object
+		:type path1: str or S3Path
+		:type path2: str or S3Path
+		"""
+		path2 = self._get_absolute_path(path=path2)
+		try:
+			return await self._call('_cp_file', self._get_absolute_path(path=path1), path2)
+		finally:
+			self._s3._invalidate_cache(path2)
+
+	async def rm(self, path, recursive=True):
+		"""
+		:type path: str or S3Path
+		:type recursive: bool
+		"""
+		path = self._get_absolute_path(path=path)
+		try:
+			return await self._call('_rm', path, recursive=recursive)
+		finally:
+			self._s3._invalidate_cache(path)
+
+	async def close(self):
+		if self._file_system is not None and self._file_system._s3 is not None:
+			await self._file_system._s3.close()
+		self._file_system = None
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.close()
+
+	copy = cp
+	delete = rm
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class MetadataCache:
+	def __init__(self, max_size=100000, ttl=60):
+		"""
+		a bounded least-recently-used cache of S3 listings and file metadata whose entries expire after ttl seconds
+		:type max_size: int
+		:param int or float or NoneType ttl: seconds an entry stays valid, None for no expiration
+		"""
+		self._max_size = max_size
+		self._ttl = ttl
+		self._entries = OrderedDict()
+		self._lock = Lock()
+		self._hits = 0
+		self._misses = 0
+		self._evictions = 0
+		self._invalidations = 0
+
+	@staticmethod
+	def _get_parents(path):
+		"""
+		:type path: str
+		:rtype: list[str]
+		"""
+		parts = path.split('/')
+		return ['/'.join(parts[:index]) for index in range(1, len(parts))]
+
+	def _lookup(self, kind, path):
+		"""
+		must be called with the lock held, does not count a hit or a miss
+		"""
+		key = (kind, path)
+		if key in self._entries:
+			expires_at, value = self._entries[key]
+			if expires_at is None or expires_at > monotonic():
+				self._entries.move_to_end(key)
+				return value
+			del self._entries[key]
+		return None
+
+	def _get(self, kind, path):
+		with self._lock:
+			value = self._lookup(kind=kind, path=path)
+			if value is None:
+				self._misses += 1
+			else:
+				self._hits += 1
+			return value
+
+	def _put(self, kind, path, value):
+		key = (kind, path)
+		expires_at = None if self._ttl is None else monotonic() + self._ttl
+		with self._lock:
+			self._entries[key] = (expires_at, value)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self._max_size:
+				self._entries.popitem(last=False)
+				self._evictions += 1
+
+	def get_file(self, path):
+		"""
+		:param str path: path without the root and without a trailing slash
+		:rtype: S3File or NoneType
+		"""
+		return self._get(kind='file', path=path)
+
+	def get_listing(self, path):
+		"""
+		:param str path: path without the root and without a trailing slash
+		:rtype: S3Files or NoneType
+		"""
+		return self._get(kind='listing', path=path)
+
+	def get_file_or_listing(self, path):
+		"""
+		looks up the metadata of a path and, if it has none, its listing, as one hit or one miss,
+		a listing without entries is a miss since it does not tell whether the path exists
+		:param str path: path without the root and without a trailing slash
+		:rtype: tuple[S3File or NoneType, S3Files or NoneType]
+		"""
+		with self._lock:
+			file = self._lookup(kind='file', path=path)
+			files = None if file is not None else self._lookup(kind='listing', path=path)
+			if file is not None or files:
+				self._hits += 1
+			else:
+				self._misses += 1
+			return file, files
+
+	def put_file(self, path, file):
+		"""
+		:type path: str
+		:type file: S3File
+		"""
+		self._put(kind='file', path=path, value=file)
+
+	def put_listing(self, path, files):
+		"""
+		stores a listing and the metadata of each of its entries
+		:type path: str
+		:type files: S3Files
+		"""
+		for file in files:
+			self.put_file(path=file.path.rstrip('/'), file=file)
+		self._put(kind='listing', path=path, value=files)
+
+	def invalidate(self, path):
+		"""
+		removes a path, everything under it, and the parents whose listings include it
+		:type path: str
+		"""
+		self.invalidate_many(paths=[path])
+
+	def invalidate_many(self, paths):
+		"""
+		removes many paths, everything under them, and their parents in one pass over the cache
+		:type paths: list[str]
+		"""
+		paths = set(paths)
+		parents = {parent for path in paths for parent in self._get_parents(path)}
+		with self._lock:
+			keys = [
+				key for key in self._entries
+				if key[1] in paths or key[1] in parents or any(
+					parent in paths for parent in self._get_parents(key[1])
+				)
+			]
+			for key in keys:
+				del self._entries[key]
+			self._invalidations += len(paths)
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+	def __len__(self):
+		return len(self._entries)
+
+	@property
+	def hits(self):
+		return self._hits
+
+	@property
+	def misses(self):
+		return self._misses
+
+	@property
+	def stats(self):
+		"""
+		:rtype: dict
+		"""
+		num_requests = self._hits + self._misses
+		return {
+			'size': len(self._entries),
+			'max_size': self._max_size,
+			'ttl': self._ttl,
+			'hits': self._hits,
+			'misses': self._misses,
+			'hit_ratio': self._hits / num_requests if num_requests > 0 else None,
+			'evictions': self._evictions,
+			'invalidations': self._invalidations
+		}
+
+	def __repr__(self):
+		return f'MetadataCache({self.stats})'
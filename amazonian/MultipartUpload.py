@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+from time import time
+
+
+class MultipartUpload:
+	# S3 rejects parts smaller than 5 MB except for the last one
+	MIN_PART_SIZE = 5 * 2 ** 20
+	PART_SIZE = 64 * 2 ** 20
+	WORKERS = 8
+
+	mode = 'wb'
+
+	def __init__(self, s3, path, part_size=None, workers=None):
+		"""
+		a writable file-like object that uploads each part as soon as it is full with a pool of threads,
+		at most workers parts are in memory at a time so the whole payload never has to be
+		:type s3: .S3.S3
+		:type path: str
+		:param int or NoneType part_size: bytes per part, at least 5 MB
+		:param int or NoneType workers: number of parts uploaded at the same time
+		"""
+		part_size = part_size or self.PART_SIZE
+		workers = workers or self.WORKERS
+		if part_size < self.MIN_PART_SIZE:
+			raise ValueError(f'part_size should be at least {self.MIN_PART_SIZE} bytes but it is {part_size}!')
+
+		self._s3 = s3
+		self._path = path
+		self._bucket, self._key = s3._split_path(path=path)
+		self._part_size = part_size
+		self._workers = workers
+		self._client = s3.file_system.connect()
+		self._loop = s3.file_system.loop
+
+		self._buffer = bytearray()
+		self._upload_id = None
+		self._executor = None
+		self._semaphore = BoundedSemaphore(workers)
+		self._futures = []
+		self._num_bytes = 0
+		self._start_time = time()
+		self._end_time = None
+		self._closed = False
+
+	@property
+	def path(self):
+		return self._path
+
+	@property
+	def closed(self):
+		return self._closed
+
+	def writable(self):
+		return True
+
+	def tell(self):
+		return self._num_bytes
+
+	def flush(self):
+		pass
+
+	def _call(self, method, **kwargs):
+		from fsspec.asyn import sync
+		return self._s3._retry(
+			sync, self._loop, getattr(self._client, method), key=self._path, Bucket=self._bucket, Key=self._key, **kwargs
+		)
+
+	def _upload_part(self, part_number, body):
+		try:
+			response = self._call(
+				'upload_part', UploadId=self._upload_id, PartNumber=part_number, Body=body
+			)
+			return {'PartNumber': part_number, 'ETag': response['ETag']}
+		finally:
+			self._semaphore.release()
+
+	def _submit_part(self, body):
+		if self._upload_id is None:
+			self._upload_id = self._call('create_multipart_upload')['UploadId']
+			self._executor = ThreadPoolExecutor(max_workers=self._workers)
+		# blocks while workers parts are already uploading, which bounds the memory
+		self._semaphore.acquire()
+		part_number = len(self._futures) + 1
+		self._futures.append(self._executor.submit(self._upload_part, part_number, body))
+
+	def write(self, data):
+		"""
+		:type data: bytes or bytearray or memoryview
+		:rtype: int
+		"""
+		if self._closed:
+			raise ValueError(f'upload to "{self._path}" is closed!')
+		data = memoryview(data).cast('B')
+		self._num_bytes += len(data)
+		start = 0
+		if len(self._buffer) > 0:
+			start = min(len(data), self._part_size - len(self._buffer))
+			self._buffer += data[:start]
+			if len(self._buffer) < self._part_size:
+				return len(data)
+			self._submit_part(body=bytes(self._buffer))
+			self._buffer = bytearray()
+
+		while len(data) - start >= self._part_size:
+			self._submit_part(body=bytes(data[start:start + self._part_size]))
+			start += self._part_size
+		self._buffer += data[start:]
+		return len(data)
+
+	def abort(self):
+		if self._closed:
+			return
+		self._closed = True
+		for future in self._futures:
+			future.cancel()
+		if self._executor is not None:
+			self._executor.shutdown(wait=True)
+		if self._upload_id is not None:
+			self._call('abort_multipart_upload', UploadId=self._upload_id)
+
+	def close(self):
+		"""
+		uploads what is left and completes the upload, and invalidates what the cache of s3 has about the path
+		:rtype: dict
+		"""
+		if self._closed:
+			return self.stats
+		try:
+			if self._upload_id is None:
+				# small enough for a single request
+				self._call('put_object', Body=bytes(self._buffer))
+			else:
+				if len(self._buffer) > 0:
+					self._submit_part(body=bytes(self._buffer))
+				parts = [future.result() for future in self._futures]
+				self._executor.shutdown(wait=True)
+				self._call(
+					'complete_multipart_upload', UploadId=self._upload_id, MultipartUpload={'Parts': parts}
+				)
+		except BaseException:
+			self.abort()
+			raise
+		finally:
+			self._s3._invalidate_cache(self._path)
+		self._buffer = bytearray()
+		self._closed = True
+		self._end_time = time()
+		return self.stats
+
+	@property
+	def stats(self):
+		"""
+		:rtype: dict
+		"""
+		end_time = self._end_time or time()
+		seconds = end_time - self._start_time
+		return {
+			'path': self._path,
+			'bytes': self._num_bytes,
+			'parts': max(1, len(self._futures)),
+			'part_size': self._part_size,
+			'workers': self._workers,
+			'seconds': seconds,
+			'megabytes_per_second': self._num_bytes / 2 ** 20 / seconds if seconds > 0 else None
+		}
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		if exc_type is None:
+			self.close()
+		else:
+			self.abort()
+
+	def __repr__(self):
+		return f'MultipartUpload({self.stats})'
@@ -0,0 +1,301 @@
+import asyncio
+from random import uniform
+from threading import Lock
+from time import monotonic, sleep
+
+THROTTLING_ERROR_CODES = {
+	'SlowDown', 'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottled',
+	'RequestThrottledException', 'TooManyRequestsException', 'RequestLimitExceeded', 'BandwidthLimitExceeded',
+	'ProvisionedThroughputExceededException', 'EC2ThrottledException'
+}
+TRANSIENT_ERROR_CODES = {
+	'RequestTimeout', 'RequestTimeoutException', 'InternalError', 'ServiceUnavailable', 'InternalFailure',
+	'PriorRequestNotComplete', 'IDPCommunicationError'
+}
+THROTTLING_STATUS_CODES = {429, 503}
+TRANSIENT_STATUS_CODES = {500, 502, 504}
+# botocore, aiohttp and psycopg2 errors that mean the request never got a proper answer
+TRANSIENT_ERROR_NAMES = {
+	'EndpointConnectionError', 'ConnectionClosedError', 'ReadTimeoutError', 'ConnectTimeoutError',
+	'ServerDisconnectedError', 'ClientOSError', 'ClientPayloadError', 'IncompleteReadError',
+	'NoCredentialsError', 'CredentialRetrievalError', 'OperationalError', 'InterfaceError', 'SerializationFailure'
+}
+# postgres error codes of a lost connection, of a server that shut down or is starting up, and of a serialization
+# failure, whose transaction was rolled back, every other code, such as a cancelled or timed out statement (57014)
+# or a full disk (53xxx), comes from the query or the cluster and running it again does not help
+TRANSIENT_SQL_STATE_CLASSES = ('08',)
+TRANSIENT_SQL_STATES = {'40001', '57P01', '57P02', '57P03'}
+FATAL_MESSAGES = ('authentication failed', 'does not exist', 'permission denied', 'syntax error')
+
+
+def _get_causes(error):
+	"""
+	the error and the errors it wraps, s3fs sets __cause__ to the botocore error and SQLAlchemy keeps the
+	psycopg2 error in orig
+	:type error: BaseException
+	:rtype: list[BaseException]
+	"""
+	causes = []
+	while error is not None and error not in causes and len(causes) < 10:
+		causes.append(error)
+		error = getattr(error, 'orig', None) or error.__cause__
+	return causes
+
+
+def _classify_sql_state(sql_state):
+	"""
+	:type sql_state: str
+	:rtype: str or NoneType
+	"""
+	if sql_state in TRANSIENT_SQL_STATES or sql_state.startswith(TRANSIENT_SQL_STATE_CLASSES):
+		return 'transient'
+	return None
+
+
+def classify_error(error):
+	"""
+	:type error: BaseException
+	:return: 'throttle' when the service asks to slow down, 'transient' when the same call can succeed
+	if it is made again, None when it cannot
+	:rtype: str or NoneType
+	"""
+	causes = _get_causes(error)
+	# the code of the database error decides before the class name of its wrapper,
+	# every SQLAlchemy or psycopg2 OperationalError would be transient otherwise
+	for cause in causes:
+		sql_state = getattr(cause, 'pgcode', None)
+		if sql_state:
+			return _classify_sql_state(sql_state=sql_state)
+
+	for cause in causes:
+		if isinstance(cause, (FileNotFoundError, FileExistsError, PermissionError, ValueError, TypeError, KeyError)):
+			return None
+
+		response = getattr(cause, 'response', None)
+		if isinstance(response, dict):
+			code = response.get('Error', {}).get('Code')
+			status_code = response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+			if code in THROTTLING_ERROR_CODES or status_code in THROTTLING_STATUS_CODES:
+				return 'throttle'
+			if code in TRANSIENT_ERROR_CODES or status_code in TRANSIENT_STATUS_CODES:
+				return 'transient'
+			return None
+
+		if type(cause).__name__ in TRANSIENT_ERROR_NAMES:
+			message = str(cause).lower()
+			if any(fatal_message in message for fatal_message in FATAL_MESSAGES):
+				return None
+			return 'transient'
+
+		if isinstance(cause, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+			return 'transient'
+	return None
+
+
+class TokenBucket:
+	def __init__(self, rate, capacity):
+		"""
+		a client-side rate limiter that lets capacity requests through at once and rate requests per second after that
+		:type rate: float
+		:type capacity: float
+		"""
+		self._max_rate = rate
+		self._rate = rate
+		self._capacity = capacity
+		self._tokens = capacity
+		self._updated_at = monotonic()
+		self._lock = Lock()
+
+	@property
+	def rate(self):
+		return self._rate
+
+	def reserve(self):
+		"""
+		takes a token, going into debt when there is none
+		:return: seconds to wait before the request can be made
+		:rtype: float
+		"""
+		with self._lock:
+			now = monotonic()
+			self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+			self._updated_at = now
+			self._tokens -= 1
+			if self._tokens >= 0:
+				return 0
+			return -self._tokens / self._rate
+
+	def slow_down(self):
+		"""
+		halves the rate after the service throttled a request
+		"""
+		with self._lock:
+			self._rate = max(self._rate / 2, self._max_rate / 64)
+
+	def speed_up(self):
+		"""
+		recovers the rate a little after each successful request
+		"""
+		if self._rate < self._max_rate:
+			with self._lock:
+				self._rate = min(self._max_rate, self._rate + self._max_rate / 20)
+
+
+class RetryPolicy:
+	def __init__(self, max_attempts=5, base_delay=0.1, max_delay=20, rate_limit=None, burst=None, key_depth=2):
+		"""
+		retries the calls that fail with throttling or transient errors after a jittered exponential backoff,
+		and optionally limits the request rate per bucket and prefix, halving it whenever a request is throttled
+		:param int max_attempts: number of attempts of a call, 1 for no retries
+		:param float base_delay: seconds of the first backoff, doubled at every attempt
+		:param float max_delay: the longest backoff in seconds
+		:param float or NoneType rate_limit: requests per second per key, None for no limit
+		:param float or NoneType burst: requests let through at once per key, rate_limit if None
+		:param int key_depth: number of path parts in a key, 1 for the bucket, 2 for the bucket and first prefix
+		"""
+		if max_attempts < 1:
+			raise ValueError(f'max_attempts should be at least 1 but it is {max_attempts}!')
+		self._max_attempts = max_attempts
+		self._base_delay = base_delay
+		self._max_delay = max_delay
+		self._rate_limit = rate_limit
+		self._burst = burst
+		self._key_depth = key_depth
+		self._buckets = {}
+		self._lock = Lock()
+		self._counters = {
+			'calls': 0, 'retries': 0, 'throttles': 0, 'failures': 0,
+			'throttle_waits': 0, 'throttle_wait_seconds': 0.0, 'backoff_seconds': 0.0
+		}
+
+	def __getstate__(self):
+		return {
+			'max_attempts': self._max_attempts, 'base_delay': self._base_delay, 'max_delay': self._max_delay,
+			'rate_limit': self._rate_limit, 'burst': self._burst, 'key_depth': self._key_depth
+		}
+
+	def __setstate__(self, state):
+		self.__init__(**state)
+
+	def _count(self, counter, value=1):
+		with self._lock:
+			self._counters[counter] += value
+
+	def _get_key(self, path):
+		"""
+		:type path: str or NoneType
+		:rtype: str or NoneType
+		"""
+		if path is None:
+			return None
+		path = str(path)
+		if '://' in path:
+			path = path.split('://', 1)[1]
+		return '/'.join(path.lstrip('/').split('/')[:self._key_depth])
+
+	def _get_bucket(self, key):
+		"""
+		:type key: str or NoneType
+		:rtype: TokenBucket or NoneType
+		"""
+		if self._rate_limit is None or key is None:
+			return None
+		with self._lock:
+			if key not in self._buckets:
+				self._buckets[key] = TokenBucket(rate=self._rate_limit, capacity=self._burst or self._rate_limit)
+			return self._buckets[key]
+
+	def _get_wait(self, bucket):
+		if bucket is None:
+			return 0
+		wait = bucket.reserve()
+		if wait > 0:
+			with self._lock:
+				self._counters['throttle_waits'] += 1
+				self._counters['throttle_wait_seconds'] += wait
+		return wait
+
+	def _get_backoff(self, error, attempt, bucket):
+		"""
+		:return: seconds to wait before the next attempt, None if the error should be raised
+		:rtype: float or NoneType
+		"""
+		kind = classify_error(error)
+		if kind == 'throttle':
+			self._count('throttles')
+			if bucket is not None:
+				bucket.slow_down()
+		if kind is None or attempt >= self._max_attempts:
+			self._count('failures')
+			return None
+		# full jitter keeps the clients that failed together from retrying together
+		backoff = uniform(0, min(self._max_delay, self._base_delay * 2 ** (attempt - 1)))
+		with self._lock:
+			self._counters['retries'] += 1
+			self._counters['backoff_seconds'] += backoff
+		return backoff
+
+	def call(self, function, *args, key=None, **kwargs):
+		"""
+		:param callable function: called with args and kwargs
+		:param str or NoneType key: the path the call is about, used for rate limiting
+		"""
+		self._count('calls')
+		bucket = self._get_bucket(key=self._get_key(path=key))
+		for attempt in range(1, self._max_attempts + 1):
+			wait = self._get_wait(bucket=bucket)
+			if wait > 0:
+				sleep(wait)
+			try:
+				result = function(*args, **kwargs)
+			except Exception as error:
+				backoff = self._get_backoff(error=error, attempt=attempt, bucket=bucket)
+				if backoff is None:
+					raise
+				sleep(backoff)
+			else:
+				if bucket is not None:
+					bucket.speed_up()
+				return result
+
+	async def call_async(self, function, *args, key=None, **kwargs):
+		"""
+		the same as call for a coroutine function, waiting without blocking the event loop
+		:param callable function: a coroutine function called with args and kwargs
+		:param str or NoneType key: the path the call is about, used for rate limiting
+		"""
+		self._count('calls')
+		bucket = self._get_bucket(key=self._get_key(path=key))
+		for attempt in range(1, self._max_attempts + 1):
+			wait = self._get_wait(bucket=bucket)
+			if wait > 0:
+				await asyncio.sleep(wait)
+			try:
+				result = await function(*args, **kwargs)
+			except Exception as error:
+				backoff = self._get_backoff(error=error, attempt=attempt, bucket=bucket)
+				if backoff is None:
+					raise
+				await asyncio.sleep(backoff)
+			else:
+				if bucket is not None:
+					bucket.speed_up()
+				return result
+
+	@property
+	def stats(self):
+		"""
+		:rtype: dict
+		"""
+		with self._lock:
+			stats = self._counters.copy()
+			stats['rates'] = {key: bucket.rate for key, bucket in self._buckets.items()}
+		return stats
+
+	def reset_stats(self):
+		with self._lock:
+			for counter in self._counters:
+				self._counters[counter] = 0
+
+	def __repr__(self):
+		return f'RetryPolicy({self.stats})'
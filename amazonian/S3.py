@@ -1,26 +1,37 @@
 from warnings import warn
-from s3fs import S3FileSystem
-from time import sleep
-#  from botocore.exceptions import NoCredentialsError
-import pandas as pd
-from pandas import DataFrame as PandasDF
+from time import time
 from pickle import dump as pickle_dump
 from pickle import load as pickle_load
-from psycopg2 import connect as psycopg2_connect
 from csv import QUOTE_NONNUMERIC
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from os.path import commonprefix
+from mmap import mmap
+from uuid import uuid4
 
 from .S3File import S3Files
+from .MetadataCache import MetadataCache
+from .MultipartUpload import MultipartUpload
+from .RetryPolicy import RetryPolicy
 
 
 class S3:
-	def __init__(self, key=None, secret=None, iam_role=None, root='s3://', spark=None):
+	# ranged reads of objects larger than one part
+	DOWNLOAD_PART_SIZE = 32 * 2 ** 20
+	DOWNLOAD_WORKERS = 8
+
+	def __init__(
+			self, key=None, secret=None, iam_role=None, root='s3://', spark=None, cache=None, retry_policy=None
+	):
 		"""
 		starts an S3 connection
 		:type key: str or NoneType
 		:type secret: str or NoneType
 		:type iam_role: str or NoneType
 		:type root: str or NoneType
-		:type spark: pyspark.sql.session.SparkSession or NoneType
+		:param pyspark.sql.session.SparkSession or NoneType spark: if None, a session is created on first use of S3.spark
+		:param bool or MetadataCache or NoneType cache: True for a default metadata cache, or a MetadataCache
+		:param RetryPolicy or NoneType retry_policy: retries and rate limits the requests, a default RetryPolicy if None
 		"""
 
 		self._key = key
@@ -29,21 +40,86 @@ class S3:
 		if root is None:
 			root = ''
 		self._root = root
-		if spark is None or spark == True:
-			try:
-				from pyspark.sql.session import SparkSession
-				spark = SparkSession.builder.getOrCreate()
-			except ModuleNotFoundError:
-				pass
+		# Spark and s3fs are only started when they are first used
+		if spark is True:
+			spark = None
 		self._spark = spark
-		self._file_system = S3FileSystem(key=key, secret=secret, use_ssl=False)
+		self._file_system = None
+		if cache is True:
+			cache = MetadataCache()
+		elif cache is False:
+			cache = None
+		self._cache = cache
+		self._retry_policy = retry_policy or RetryPolicy()
 
 	@property
 	def root(self):
 		return self._root
 
+	@property
+	def retry_policy(self):
+		"""
+		:rtype: RetryPolicy
+		"""
+		return self._retry_policy
+
+	def _retry(self, function, *args, key=None, **kwargs):
+		"""
+		calls function through the retry policy, the path in key decides which rate limit applies
+		:type function: callable
+		:type key: str or NoneType
+		"""
+		return self._retry_policy.call(function, *args, key=key, **kwargs)
+
+	@property
+	def cache(self):
+		"""
+		:rtype: MetadataCache or NoneType
+		"""
+		return self._cache
+
+	def set_cache(self, cache):
+		"""
+		:type cache: MetadataCache or NoneType
+		"""
+		self._cache = cache
+
+	def _get_cache_key(self, path):
+		"""
+		:type path: str or S3Path
+		:rtype: str
+		"""
+		path = self._get_path(path=path)
+		if path.startswith(self._root):
+			path = path[len(self._root):]
+		if path.lower().startswith('s3://'):
+			path = path[len('s3://'):]
+		return path.rstrip('/')
+
+	def _get_cached_file(self, path):
+		"""
+		:type path: str or S3Path
+		:rtype: S3File or NoneType
+		"""
+		if self._cache is None:
+			return None
+		return self._cache.get_file(path=self._get_cache_key(path=path))
+
+	def _invalidate_cache(self, *paths):
+		"""
+		:type paths: str or S3Path
+		"""
+		if self._cache is not None:
+			self._cache.invalidate_many(paths=[self._get_cache_key(path=path) for path in paths])
+
 	@property
 	def file_system(self):
+		"""
+		:rtype: s3fs.S3FileSystem
+		"""
+		if self._file_system is None:
+			from s3fs import S3FileSystem
+			self._file_system = S3FileSystem(key=self._key, secret=self._secret, use_ssl=False)
 		return self._file_system
 
 	@staticmethod
@@ -82,140 +158,720 @@ class S3:
 		"""
 		return self.ls(path=path, exclude_empty=exclude_empty, sort_by=sort_by, **kwargs)
 
-	def ls(self, path, exclude_empty=False, sort_by='path', **kwargs):
+	def ls_files(self, path, **kwargs):
 		"""
-		:type path: str or Path
-		:type exclude_empty: bool
-		:type sort_by: str
+		lists a path with one request and returns the listing metadata of each entry
+		:type path: str or S3Path
 		:type kwargs: dict
-		:rtype: list[Path]
+		:rtype: S3Files
 		"""
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
-		files = self.file_system.ls(path=path, detail=False, **kwargs)
+		use_cache = self._cache is not None and len(kwargs) == 0
+		if use_cache:
+			files = self._cache.get_listing(path=self._get_cache_key(path=path))
+			if files is not None:
+				return files
 
+		files = S3Files(self._retry(self.file_system.ls, key=path, path=path, detail=True, **kwargs))
+		return self._store_listing(path=path, files=files, use_cache=use_cache)
+
+	def _store_listing(self, path, files, use_cache):
+		"""
+		caches the detailed ls of a path and returns its entries, used by S3 and AsyncS3
+		:param str path: absolute path
+		:type files: S3Files
+		:type use_cache: bool
+		:rtype: S3Files
+		"""
 		# if the path is only a file ls will return itself.
 		if len(files) == 1:
-			if self._root + files[0] == path or files[0] == path:
-				return []
-
-		if exclude_empty:
-			files = [file for file in files if self.get_size(file) > 0]
-		#  if detail:
-		#	files = S3Files(files)
-		#	files.sort(by=sort_by, reverse=sort_reverse)
-		else:
-			if sort_by is not None:
-				files.sort()
-
-		return [S3Path(s3=self, path=x) for x in files]
+			if self._root + files[0].path == path or files[0].path == path:
+				if use_cache:
+					self._cache.put_file(path=self._get_cache_key(path=path), file=files[0])
+				return S3Files([])
+
+		if use_cache:
+			self._cache.put_listing(path=self._get_cache_key(path=path), files=files)
+		return files
+
+	def ls(
+			self, path, exclude_empty=False, sort_by='path', reverse=False,
+			min_size=None, max_size=None, modified_after=None, modified_before=None, **kwargs
+	):
+		"""
+		lists a path with a single detailed request, all the filters and sorting use the listing metadata
+		:type path: str or Path
+		:type exclude_empty: bool
+		:param str sort_by: 'path', 'size', 'modified_at', 'etag' or None
+		:type reverse: bool
+		:type min_size: int or NoneType
+		:type max_size: int or NoneType
+		:type modified_after: datetime.datetime or NoneType
+		:type modified_before: datetime.datetime or NoneType
+		:type kwargs: dict
+		:rtype: list[Path]
+		"""
+		files = self.ls_files(path=path, **kwargs).filter(
+			exclude_empty=exclude_empty, min_size=min_size, max_size=max_size,
+			modified_after=modified_after, modified_before=modified_before
+		)
+		files.sort(by=sort_by, reverse=reverse)
+		return [S3Path(s3=self, path=x.path, file=x) for x in files]
+
+	def _iter_pages(self, bucket, prefix, delimiter='/', page_size=1000):
+		"""
+		yields the ListObjectsV2 pages of a prefix as they arrive, each page request is retried on its own
+		:type bucket: str
+		:type prefix: str
+		:type delimiter: str
+		:type page_size: int
+		:rtype: generator
+		"""
+		from fsspec.asyn import sync
+		client = self.file_system.connect()
+		kwargs = {'Bucket': bucket, 'Prefix': prefix, 'Delimiter': delimiter, 'MaxKeys': page_size}
+		while True:
+			page = self._retry(sync, self.file_system.loop, client.list_objects_v2, key=f'{bucket}/{prefix}', **kwargs)
+			yield page
+			if not page.get('IsTruncated'):
+				return
+			kwargs['ContinuationToken'] = page['NextContinuationToken']
+
+	def iter_ls(
+			self, path, prefix=None, suffix=None, glob=None, max_items=None, exclude_empty=False,
+			recursive=False, page_size=1000
+	):
+		"""
+		lists a path page by page and yields each entry as soon as its page arrives
+		:type path: str or S3Path
+		:param str or NoneType prefix: only names starting with prefix, applied by S3 itself
+		:param str or NoneType suffix: only names ending with suffix
+		:param str or NoneType glob: only names, relative to path, matching the pattern
+		:param int or NoneType max_items: stops after yielding this many entries
+		:type exclude_empty: bool
+		:param bool recursive: if True, yields every object under path instead of one level
+		:param int page_size: number of keys per ListObjectsV2 request, at most 1000
+		:rtype: generator
+		"""
+		path = self._get_path(path=path)
+		path = self._get_absolute_path(path)
+		bucket, key, _ = self.file_system.split_path(path)
+		if not bucket:
+			raise ValueError(f'path "{path}" has no bucket!')
+		key_prefix = key.rstrip('/') + '/' if key else ''
+
+		if max_items is not None and max_items <= 0:
+			return
+
+		num_items = 0
+		pages = self._iter_pages(
+			bucket=bucket, prefix=key_prefix + (prefix or ''), delimiter='' if recursive else '/',
+			page_size=page_size
+		)
+		for page in pages:
+			for file in S3Files.from_page(page=page, bucket=bucket):
+				name = file.path[len(bucket) + 1 + len(key_prefix):]
+				if suffix is not None and not name.endswith(suffix):
+					continue
+				if glob is not None and not fnmatch(name, glob):
+					continue
+				if exclude_empty and file.size <= 0:
+					continue
+				yield S3Path(s3=self, path=file.path, file=file)
+				num_items += 1
+				if max_items is not None and num_items >= max_items:
+					return
 
 	def mv(self, path1, path2, recursive=True, max_depth=None, **kwargs):
 		path1 = self._get_path(path=path1)
 		path2 = self._get_path(path=path2)
-		return self.file_system.mv(path1=path1, path2=path2, recursive=recursive, maxdepth=max_depth, **kwargs)
+		try:
+			return self._retry(
+				self.file_system.mv, key=path1, path1=path1, path2=path2, recursive=recursive, maxdepth=max_depth, **kwargs
+			)
+		finally:
+			self._invalidate_cache(path1, path2)
 
 	def cp(self, path1, path2, recursive=True, on_error=None, **kwargs):
 		path1 = self._get_path(path=path1)
 		path2 = self._get_path(path=path2)
-		return self.file_system.copy(path1=path1, path2=path2, recursive=recursive, on_error=on_error, **kwargs)
+		try:
+			return self._retry(
+				self.file_system.copy, key=path2, path1=path1, path2=path2, recursive=recursive, on_error=on_error,
+				**kwargs
+			)
+		finally:
+			self._invalidate_cache(path2)
 
 	def rm(self, path, recursive=True, **kwargs):
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
-		result = self.file_system.delete(path=path, recursive=recursive, **kwargs)
+		try:
+			result = self._retry(self.file_system.delete, key=path, path=path, recursive=recursive, **kwargs)
+		finally:
+			self._invalidate_cache(path)
 		if self.exists(path):
 			raise FileExistsError(f'path "{path}" was not deleted!')
 		return result
 
+	def _split_path(self, path):
+		"""
+		:type path: str or S3Path
+		:rtype: tuple[str, str]
+		"""
+		path = self._get_path(path=path)
+		path = self._get_absolute_path(path)
+		bucket, key, _ = self.file_system.split_path(path)
+		return bucket, key
+
+	def _map_in_threads(self, function, arguments, workers):
+		"""
+		calls function on every tuple of arguments with a pool of threads
+		and returns the exceptions instead of stopping at the first one
+		:type function: callable
+		:type arguments: list[tuple]
+		:type workers: int
+		:rtype: dict[tuple, Exception]
+		"""
+		failures = {}
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			futures = {executor.submit(function, *args): args for args in arguments}
+			for future, args in futures.items():
+				exception = future.exception()
+				if exception is not None:
+					failures[args] = exception
+		return failures
+
+	def cp_many(self, pairs, workers=32):
+		"""
+		copies many objects with concurrent server-side copies,
+		a failed copy does not stop the others and is returned instead
+		:param dict or list[tuple] pairs: source and destination paths
+		:param int workers: number of copies running at the same time
+		:return: the exception of every source path that could not be copied
+		:rtype: dict[str, Exception]
+		"""
+		if isinstance(pairs, dict):
+			pairs = pairs.items()
+		pairs = [(self._get_path(path=path1), self._get_path(path=path2)) for path1, path2 in pairs]
+
+		def _copy(path1, path2):
+			path2 = self._get_absolute_path(path2)
+			self._retry(self.file_system.cp_file, self._get_absolute_path(path1), path2, key=path2)
+
+		try:
+			failures = self._map_in_threads(function=_copy, arguments=pairs, workers=workers)
+		finally:
+			self._invalidate_cache(*[path2 for _, path2 in pairs])
+		return {path1: exception for (path1, _), exception in failures.items()}
+
+	def rm_many(self, paths, workers=8, verify=True):
+		"""
+		deletes many objects with multi-object delete requests of up to 1000 keys,
+		a failed key does not stop the others and is returned instead
+		:type paths: list[str or S3Path]
+		:param int workers: number of delete requests running at the same time
+		:param bool verify: if True, checks with one listing per parent prefix that the objects are gone
+		:return: the exception of every path that could not be deleted
+		:rtype: dict[str, Exception]
+		"""
+		paths = [self._get_path(path=path) for path in paths]
+		keys_by_bucket = {}
+		path_by_bucket_and_key = {}
+		for path in paths:
+			bucket, key = self._split_path(path=path)
+			keys_by_bucket.setdefault(bucket, []).append(key)
+			path_by_bucket_and_key[(bucket, key)] = path
+
+		from fsspec.asyn import sync
+		client = self.file_system.connect()
+		failures = {}
+
+		def _delete(bucket, keys):
+			response = self._retry(
+				sync, self.file_system.loop, client.delete_objects, key=f'{bucket}/{commonprefix(keys)}',
+				Bucket=bucket, Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True}
+			)
+			for error in response.get('Errors', []):
+				path = path_by_bucket_and_key[(bucket, error['Key'])]
+				failures[path] = OSError(f'{error.get("Code")}: {error.get("Message")}')
+
+		batches = [
+			(bucket, tuple(keys[start:start + 1000]))
+			for bucket, keys in keys_by_bucket.items() for start in range(0, len(keys), 1000)
+		]
+		try:
+			batch_failures = self._map_in_threads(function=_delete, arguments=batches, workers=workers)
+		finally:
+			self._invalidate_cache(*paths)
+
+		for (bucket, keys), exception in batch_failures.items():
+			for key in keys:
+				failures[path_by_bucket_and_key[(bucket, key)]] = exception
+
+		if verify:
+			# the deleted objects are gone so one listing of the objects directly under each of their parents,
+			# narrowed to the common prefix of their names, is all it takes and never lists a whole bucket
+			deleted_keys_by_parent = {}
+			for (bucket, key), path in path_by_bucket_and_key.items():
+				if path not in failures:
+					deleted_keys_by_parent.setdefault((bucket, key[:key.rfind('/') + 1]), set()).add(key)
+
+			def _verify(bucket, parent):
+				deleted_keys = deleted_keys_by_parent[(bucket, parent)]
+				for page in self._iter_pages(bucket=bucket, prefix=commonprefix(list(deleted_keys)), delimiter='/'):
+					for content in page.get('Contents', []):
+						if content['Key'] in deleted_keys:
+							path = path_by_bucket_and_key[(bucket, content['Key'])]
+							failures[path] = FileExistsError(f'path "{path}" was not deleted!')
+
+			verify_failures = self._map_in_threads(
+				function=_verify, arguments=list(deleted_keys_by_parent), workers=workers
+			)
+			for (bucket, parent), exception in verify_failures.items():
+				for key in deleted_keys_by_parent[(bucket, parent)]:
+					failures[path_by_bucket_and_key[(bucket, key)]] = exception
+
+		return failures
+
+	def mv_many(self, pairs, workers=32):
+		"""
+		moves many objects by copying them concurrently and deleting the copied sources in bulk
+		:param dict or list[tuple] pairs: source and destination paths
+		:param int workers: number of copies running at the same time
+		:return: the exception of every source path that could not be moved
+		:rtype: dict[str, Exception]
+		"""
+		if isinstance(pairs, dict):
+			pairs = pairs.items()
+		pairs = [(self._get_path(path=path1), self._get_path(path=path2)) for path1, path2 in pairs]
+		failures = self.cp_many(pairs=pairs, workers=workers)
+		copied = [path1 for path1, _ in pairs if path1 not in failures]
+		failures.update(self.rm_many(paths=copied))
+		return failures
+
 	def mkdir(self, path, **kwargs):
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
-		return self.file_system.mkdir(path=path, **kwargs)
+		self._invalidate_cache(path)
+		return self._retry(self.file_system.mkdir, key=path, path=path, **kwargs)
+
+	def _list_directory(self, path):
+		"""
+		lists one level of a path and separates the directories from the files
+		:type path: str or S3Path
+		:rtype: tuple[list[S3Path], list[S3Path]]
+		"""
+		dirs = []
+		files = []
+		for entry in self.iter_ls(path=path):
+			if entry.file.is_dir:
+				dirs.append(entry)
+			else:
+				files.append(entry)
+		if self._cache is not None:
+			self._cache.put_listing(
+				path=self._get_cache_key(path=path), files=S3Files([entry.file for entry in dirs + files])
+			)
+		return dirs, files
+
+	def walk(self, path, max_depth=None, workers=8):
+		"""
+		walks a path top-down like os.walk and yields (dirpath, dirs, files) for every directory,
+		the subdirectories are listed ahead of time by a pool of threads while the caller consumes the results
+		:type path: str or S3Path
+		:param int or NoneType max_depth: directories deeper than max_depth below path are not listed, 0 lists only path
+		:param int workers: number of directories listed concurrently
+		:rtype: generator
+		"""
+		path = self._get_path(path=path)
+		root = S3Path(s3=self, path=path)
+		executor = ThreadPoolExecutor(max_workers=workers)
+		stack = [(root, 0, executor.submit(self._list_directory, root))]
+		try:
+			while len(stack) > 0:
+				directory, depth, future = stack.pop()
+				dirs, files = future.result()
+				dirs.sort(key=lambda x: x.path)
+				files.sort(key=lambda x: x.path)
+				if max_depth is None or depth < max_depth:
+					# submit the children before yielding so they are listed while the caller works
+					children = [(sub, depth + 1, executor.submit(self._list_directory, sub)) for sub in dirs]
+					stack.extend(reversed(children))
+				yield directory, dirs, files
+		finally:
+			for _, _, future in stack:
+				future.cancel()
+			executor.shutdown(wait=True)
+
+	def du(self, path, workers=8):
+		"""
+		returns the number of objects and bytes of every directory under path, including its subdirectories
+		:type path: str or S3Path
+		:param int workers: number of directories listed concurrently
+		:rtype: PandasDF
+		"""
+		from pandas import DataFrame as PandasDF
+		path = self._get_path(path=path)
+		records = []
+		parents = {}
+		for directory, dirs, files in self.walk(path=path, workers=workers):
+			parent = parents.get(directory.path)
+			depth = 0 if parent is None else records[parent]['depth'] + 1
+			for sub in dirs:
+				parents[sub.path] = len(records)
+			records.append({
+				'path': directory.path, 'depth': depth,
+				'num_objects': len(files), 'bytes': sum(file.size for file in files)
+			})
+
+		# walk is top-down so going backwards adds every subtree to its parent after the subtree is complete
+		for index in range(len(records) - 1, 0, -1):
+			parent = records[parents[records[index]['path']]]
+			parent['num_objects'] += records[index]['num_objects']
+			parent['bytes'] += records[index]['bytes']
+
+		return PandasDF.from_records(records, columns=['path', 'depth', 'num_objects', 'bytes'])
+
+	def _has_entries(self, path):
+		"""
+		lists at most two keys under a directory that is not walked
+		:type path: str or S3Path
+		:return: True if there is anything under path other than its directory marker
+		:rtype: bool
+		"""
+		directory = self._get_cache_key(path=path)
+		for entry in self.iter_ls(path=path, max_items=2, page_size=2):
+			if entry.path.rstrip('/') != directory:
+				return True
+		return False
 
 	def tree(self, path, depth_limit=None, indentation='\t'):
+		"""
+		prints the folder structure of a path as each directory is listed,
+		the directories below depth_limit that have entries are printed with ... under them
+		:type path: str or S3Path
+		:type depth_limit: int or NoneType
+		:type indentation: str
+		"""
 		path = self._get_path(path=path)
-		def _get_tree(_path, _depth):
-			subs = self.ls(_path)
-			if _depth == 0:
-				name = _path
-			else:
-				name = self.get_file_name_and_extension(_path)
+		if depth_limit is not None and depth_limit <= 0:
+			print(f'{path}/\n{indentation}...' if self._has_entries(path=path) else path)
+			return
 
+		max_depth = None if depth_limit is None else depth_limit - 1
+		walker = self.walk(path=path, max_depth=max_depth)
+
+		def _print_tree(_name, _depth):
+			_, dirs, files = next(walker)
+			subs = sorted(dirs + files, key=lambda x: x.path)
 			if len(subs) == 0:
-				return f'{indentation * _depth}{name}'
-			else:
-				if depth_limit is None:
-					return f'{indentation * _depth}{name}/\n' + '\n'.join(
-						[_get_tree(_path=sub, _depth=_depth + 1) for sub in subs]
-					)
-				elif depth_limit > _depth:
-					return f'{indentation * _depth}{name}/\n' + '\n'.join(
-						[_get_tree(_path=sub, _depth=_depth + 1) for sub in subs]
-					)
+				print(f'{indentation * _depth}{_name}')
+				return
+			print(f'{indentation * _depth}{_name}/')
+			is_pruned = max_depth is not None and _depth + 1 > max_depth
+			if is_pruned:
+				# the subdirectories are not walked, one small listing of each tells if it is empty
+				with ThreadPoolExecutor(max_workers=8) as executor:
+					has_entries = dict(zip(dirs, executor.map(self._has_entries, dirs)))
+			for sub in subs:
+				if not sub.file.is_dir:
+					print(f'{indentation * (_depth + 1)}{sub.name_and_extension}')
+				elif not is_pruned:
+					# walk visits the subdirectories in the same sorted order
+					_print_tree(_name=sub.name_and_extension, _depth=_depth + 1)
+				elif has_entries[sub]:
+					print(f'{indentation * (_depth + 1)}{sub.name_and_extension}/\n{indentation * (_depth + 2)}...')
 				else:
-					return f'{indentation * _depth}{name}/\n{indentation * (_depth + 1)}...'
-		print(_get_tree(_path=path, _depth=0))
+					print(f'{indentation * (_depth + 1)}{sub.name_and_extension}')
+
+		try:
+			_print_tree(_name=path, _depth=0)
+		finally:
+			walker.close()
 
 	def exists(self, path):
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
-		exception = RuntimeError('No NoCredentialsError!')
-		for try_number in range(1, 5):
-			try:
-				result = self.file_system.exists(path=path)
-				if try_number > 1:
-					print(f'S3 credential issue solved after {try_number} attempts.')
-				return result
-			except: #  NoCredentialsError as exception:
-				print(f'S3 credential issue. Attempt {try_number} failed!')
-				sleep(2 ** (try_number - 1) * 0.2)
+		if self._cache is not None:
+			file, files = self._cache.get_file_or_listing(path=self._get_cache_key(path=path))
+			if file is not None or files:
+				return True
+		return self._retry(self.file_system.exists, key=path, path=path)
 
-		raise exception
+	def open_upload(self, path, part_size=None, workers=None):
+		"""
+		opens a writable file-like object that uploads its parts concurrently and invalidates the cache of the path
+		when it is closed, see MultipartUpload
+		:type path: str or S3Path
+		:type part_size: int or NoneType
+		:type workers: int or NoneType
+		:rtype: MultipartUpload
+		"""
+		path = self._get_path(path=path)
+		path = self._get_absolute_path(path)
+		return MultipartUpload(s3=self, path=path, part_size=part_size, workers=workers)
 
-	def write(self, path, obj, mode):
+	def write(self, path, obj, mode='wb', part_size=None, workers=None, encoding='utf-8'):
+		"""
+		uploads an object in parts of part_size bytes, uploading workers parts at the same time
+		:type path: str or S3Path
+		:param str or bytes or file-like or iterable obj: the payload, a file-like object or an iterable of chunks
+		:param str mode: 'w' for strings, which are encoded with encoding, or 'wb' for bytes
+		:type part_size: int or NoneType
+		:type workers: int or NoneType
+		:type encoding: str
+		:return: the throughput stats of the upload
+		:rtype: dict
+		"""
+		if mode not in ('w', 'wb'):
+			raise ValueError(f'mode should be "w" or "wb" but it is "{mode}"!')
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
-		with self.file_system.open(path=path, mode=mode) as f:
-			f.write(obj)
+		part_size = part_size or MultipartUpload.PART_SIZE
+
+		def _to_bytes(chunk):
+			if isinstance(chunk, str):
+				if mode == 'wb':
+					raise TypeError('mode "wb" needs bytes but a str was given, use mode "w" for strings!')
+				return chunk.encode(encoding)
+			return chunk
+
+		# closing the upload invalidates the cache
+		with self.open_upload(path=path, part_size=part_size, workers=workers) as upload:
+			if isinstance(obj, (str, bytes, bytearray, memoryview)):
+				upload.write(_to_bytes(obj))
+			elif hasattr(obj, 'read'):
+				chunk = obj.read(part_size)
+				while len(chunk) > 0:
+					upload.write(_to_bytes(chunk))
+					chunk = obj.read(part_size)
+			else:
+				for chunk in obj:
+					upload.write(_to_bytes(chunk))
+		return upload.stats
 
-	def write_bytes(self, path, bytes):
-		self.write(path=path, obj=bytes, mode='wb')
+	def write_bytes(self, path, bytes, part_size=None, workers=None):
+		"""
+		:type path: str or S3Path
+		:param bytes or file-like or iterable bytes: the payload, a file-like object or an iterable of chunks
+		:type part_size: int or NoneType
+		:type workers: int or NoneType
+		:rtype: dict
+		"""
+		return self.write(path=path, obj=bytes, mode='wb', part_size=part_size, workers=workers)
 
 	def get_size(self, path):
+		cached_file = self._get_cached_file(path=path)
+		if cached_file is not None:
+			return cached_file.size
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
-		return self.file_system.size(path=path)
+		return self._retry(self.file_system.size, key=path, path=path)
 
-	def write_csv(self, data, path, index=False, encoding='utf-8', **kwargs):
+	def write_csv(self, data, path, index=False, encoding='utf-8', part_size=None, workers=None, **kwargs):
 		"""
 
 		:type data: pyspark.sql.DataFrame or Pandas.DataFrame
 		:type path: str
 		:type index: bool
 		:type encoding: str
+		:param int or NoneType part_size: bytes per uploaded part of a Pandas DataFrame
+		:param int or NoneType workers: number of parts uploaded at the same time
 		:rtype:
 		"""
+		from pandas import DataFrame as PandasDF
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
 		if isinstance(data, PandasDF):
 			_bytes = data.to_csv(path_or_buf=None, quoting=QUOTE_NONNUMERIC, index=index, **kwargs).encode(encoding)
-			return self.write_bytes(path=path, bytes=_bytes)
+			return self.write_bytes(path=path, bytes=_bytes, part_size=part_size, workers=workers)
 		else:
 			from pyspark.sql import DataFrame as SparkDF
 			if isinstance(data, SparkDF):
-				return data.write.csv(path=path, encoding=encoding, **kwargs)
+				try:
+					return data.write.csv(path=path, encoding=encoding, **kwargs)
+				finally:
+					self._invalidate_cache(path)
+
+	def _read_ranges_into(self, path, buffer, size, part_size, workers):
+		"""
+		fetches the byte ranges of an object concurrently and writes each one at its offset in buffer
+		:type path: str
+		:type buffer: memoryview
+		:type size: int
+		:type part_size: int
+		:type workers: int
+		:return: number of ranges
+		:rtype: int
+		"""
+		def _read_range(start):
+			end = min(start + part_size, size)
+			buffer[start:end] = self._retry(self.file_system.cat_file, path, key=path, start=start, end=end)
+
+		starts = range(0, size, part_size)
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			# consuming the results raises the first exception of any range
+			for _ in executor.map(_read_range, starts):
+				pass
+		return len(starts)
 
-	def read(self, path, mode):
+	def read_into(self, path, buffer, part_size=None, workers=None):
+		"""
+		reads an object into a preallocated writable buffer with concurrent ranged GET requests
+		:type path: str or S3Path
+		:param bytearray or memoryview or mmap buffer: at least as large as the object
+		:type part_size: int or NoneType
+		:type workers: int or NoneType
+		:return: number of bytes read
+		:rtype: int
+		"""
+		size = self.get_size(path=path)
 		path = self._get_path(path=path)
-		with self.file_system.open(path=path, mode=mode) as f:
-			result = f.read()
-		return result
+		path = self._get_absolute_path(path)
+		buffer = memoryview(buffer).cast('B')
+		if len(buffer) < size:
+			raise ValueError(f'buffer has {len(buffer)} bytes but "{path}" has {size} bytes!')
+		self._read_ranges_into(
+			path=path, buffer=buffer, size=size,
+			part_size=part_size or self.DOWNLOAD_PART_SIZE, workers=workers or self.DOWNLOAD_WORKERS
+		)
+		return size
+
+	def read(self, path, mode='rb', part_size=None, workers=None, encoding='utf-8'):
+		"""
+		reads an object, objects larger than part_size are fetched as concurrent byte ranges
+		straight into one preallocated bytearray, which is copied once into the bytes that are returned,
+		use read_into to keep the buffer instead
+		:type path: str or S3Path
+		:param str mode: 'rb' for bytes or 'r' for a string decoded with encoding
+		:type part_size: int or NoneType
+		:type workers: int or NoneType
+		:type encoding: str
+		:rtype: bytes or str
+		"""
+		part_size = part_size or self.DOWNLOAD_PART_SIZE
+		size = self.get_size(path=path)
+		path = self._get_path(path=path)
+		path = self._get_absolute_path(path)
+		if size <= part_size:
+			result = self._retry(self.file_system.cat_file, path, key=path)
+		else:
+			result = bytearray(size)
+			self._read_ranges_into(
+				path=path, buffer=memoryview(result), size=size, part_size=part_size,
+				workers=workers or self.DOWNLOAD_WORKERS
+			)
+		if 'b' not in mode:
+			return result.decode(encoding)
+		return bytes(result)
+
+	def read_bytes(self, path, part_size=None, workers=None):
+		"""
+		:type path: str or S3Path
+		:type part_size: int or NoneType
+		:type workers: int or NoneType
+		:rtype: bytes
+		"""
+		return self.read(path=path, mode='rb', part_size=part_size, workers=workers)
 
-	def read_bytes(self, path):
-		return self.read(path=path, mode='rb')
+	def download(self, path, local_path, part_size=None, workers=None):
+		"""
+		downloads an object to a local file, the byte ranges are written directly into the memory-mapped file
+		:type path: str or S3Path
+		:type local_path: str
+		:type part_size: int or NoneType
+		:type workers: int or NoneType
+		:return: the throughput stats of the download
+		:rtype: dict
+		"""
+		start_time = time()
+		part_size = part_size or self.DOWNLOAD_PART_SIZE
+		size = self.get_size(path=path)
+		path = self._get_path(path=path)
+		path = self._get_absolute_path(path)
+		num_parts = 0
+		with open(local_path, 'wb+') as f:
+			f.truncate(size)
+			# an empty file cannot be memory-mapped
+			if size > 0:
+				with mmap(f.fileno(), size) as mapped:
+					view = memoryview(mapped)
+					try:
+						num_parts = self._read_ranges_into(
+							path=path, buffer=view, size=size, part_size=part_size,
+							workers=workers or self.DOWNLOAD_WORKERS
+						)
+					finally:
+						# the map cannot be closed while a view of it exists
+						view.release()
+					mapped.flush()
+		seconds = time() - start_time
+		return {
+			'path': path,
+			'local_path': local_path,
+			'bytes': size,
+			'parts': num_parts,
+			'part_size': part_size,
+			'seconds': seconds,
+			'megabytes_per_second': size / 2 ** 20 / seconds if seconds > 0 else None
+		}
+
+	def _get_csv_parts(self, path):
+		"""
+		returns the non-empty files of a prefix sorted by path, or the path itself if it is a single file
+		:type path: str
+		:rtype: list[str]
+		"""
+		parts = sorted(file.path for file in self.iter_ls(path=path, exclude_empty=True) if file.file.is_file)
+		if len(parts) == 0:
+			return [path]
+		return [self._get_absolute_path(part) for part in parts]
+
+	def iter_csv(
+			self, path, chunksize=100000, header=True, encoding='utf-8', usecols=None, dtype=None,
+			compression='infer', **kwargs
+	):
+		"""
+		streams a csv file, or every part of a prefix of csv files, and yields DataFrames of at most chunksize rows
+		:type path: str or S3Path
+		:type chunksize: int
+		:param bool or int or NoneType header: True or False for whether every part has a header, or a row number
+		:param list[str] or NoneType usecols: only parses these columns
+		:param dict or NoneType dtype: data types of columns, pinning them avoids type inference
+		:param str or NoneType compression: 'infer' decompresses gzip, zstd, bz2 and xz based on the extension
+		:type encoding: str
+		:rtype: generator
+		"""
+		import pandas as pd
+		path = self._get_path(path=path)
+		path = self._get_absolute_path(path)
+		if header is True:
+			header = 0
+		elif header is False:
+			header = None
+
+		for part in self._get_csv_parts(path=path):
+			with self.file_system.open(part, 'rb', compression=compression) as f:
+				reader = pd.read_csv(
+					f, chunksize=chunksize, header=header, encoding=encoding, usecols=usecols, dtype=dtype, **kwargs
+				)
+				for chunk in reader:
+					yield chunk
+
+	def read_csv(self, path, header=True, encoding='utf-8', chunksize=None, **kwargs):
+		"""
+		:type path: str or S3Path
+		:type header: bool
+		:type encoding: str
+		:param int or NoneType chunksize: if not None, returns a generator of DataFrames, see iter_csv
+		:rtype: PandasDF or generator
+		"""
+		if chunksize is not None:
+			return self.iter_csv(path=path, chunksize=chunksize, header=header, encoding=encoding, **kwargs)
 
-	def read_csv(self, path, header=True, encoding='utf-8', **kwargs):
+		import pandas as pd
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
 
@@ -224,18 +880,21 @@ class S3:
 				# todo: header=True does not work, it gives an error, maybe use spark to read csv when you can
 				df = pd.read_csv(f, header=header, encoding=encoding, **kwargs)
 		except TypeError as exception:
-			if self.spark is not None and self.spark != True:
-				df = self.spark.read.csv(path, header=header)
-			else:
+			try:
+				spark = self.spark
+			except ModuleNotFoundError:
 				raise exception
+			df = spark.read.csv(path, header=header)
 		return df
 
-	def write_pickle(self, obj, path, mode='overwite'):
+	def write_pickle(self, obj, path, mode='overwite', part_size=None, workers=None):
 		"""
 
 		:type obj: PandasDF or object
 		:type path: str
 		:type mode: str
+		:param int or NoneType part_size: bytes per uploaded part, the pickle is uploaded while it is written
+		:param int or NoneType workers: number of parts uploaded at the same time
 		:rtype: bool
 		"""
 		path = self._get_path(path=path)
@@ -246,18 +905,9 @@ class S3:
 			else:
 				raise FileExistsError(f'File "{path}" exists on S3!')
 
-		with self.file_system.open(path=path, mode='wb') as f:
-			try:
-				return obj.to_pickle(f)
-			except Exception as e:
-				if self.exists(path=path):
-					self.delete(path=path)
-				try:
-					return pickle_dump(obj=obj, file=f)
-				except Exception as e:
-					if self.exists(path=path):
-						self.delete(path=path)
-					raise e
+		# an upload that fails is aborted so nothing is left at path, closing it invalidates the cache
+		with self.open_upload(path=path, part_size=part_size, workers=workers) as f:
+			pickle_dump(obj=obj, file=f)
 
 	def read_pickle(self, path):
 		path = self._get_path(path=path)
@@ -266,6 +916,16 @@ class S3:
 			obj = pickle_load(file=f)
 		return obj
 
+	def _get_redshift_credentials(self):
+		"""
+		returns the authorization clause of the COPY and UNLOAD commands of Redshift
+		:rtype: str
+		"""
+		if self._iam_role:
+			return f"IAM_ROLE '{self._iam_role}'"
+		else:
+			return f"CREDENTIALS 'aws_access_key_id={self._key};aws_secret_access_key={self._secret}'"
+
 	def copy_to_redshift(self, path, redshift, schema, table, truncate=False, create_table=False):
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
@@ -273,54 +933,119 @@ class S3:
 			data = self.read_csv(path=path)
 			redshift.create_table(data=data, name=table, schema=schema)
 
-		connection = psycopg2_connect(f"""
-			dbname='{redshift._database}' port='{redshift._port}' 
-			user='{redshift._user_id}' password='{redshift._password}' 
-			host='{redshift._server}'
-		""")
-
-		cursor = connection.cursor()
+		credentials = self._get_redshift_credentials()
 
-		if truncate:
-			cursor.execute(f"TRUNCATE TABLE {schema}.{table}")
-
-		if self._iam_role:
-			credentials = f"IAM_ROLE '{self._iam_role}'"
-		else:
-			credentials = f"CREDENTIALS 'aws_access_key_id={self._key};aws_secret_access_key={self._secret}'"
+		# a pooled connection of the Redshift object instead of a new handshake, closing it returns it to the pool
+		connection = redshift._raw_connection()
+		try:
+			cursor = connection.cursor()
 
-		cursor.execute(f"""
-			COPY {schema}.{table} FROM '{self._root+path}' 
-			{credentials}
-			FORMAT AS CSV ACCEPTINVCHARS EMPTYASNULL IGNOREHEADER 1;commit;
-		""")
+			if truncate:
+				cursor.execute(f"TRUNCATE TABLE {schema}.{table}")
 
-		connection.close()
+			cursor.execute(f"""
+				COPY {schema}.{table} FROM '{self._root+path}' 
+				{credentials}
+				FORMAT AS CSV ACCEPTINVCHARS EMPTYASNULL IGNOREHEADER 1;commit;
+			""")
+		finally:
+			connection.close()
 
-	def save_parquet(self, data, path, mode='overwrite'):
+	def save_parquet(self, data, path, mode='overwrite', **kwargs):
 		path = self._get_path(path=path)
-		return self.write_parquet(data=data, path=path, mode=mode)
+		return self.write_parquet(data=data, path=path, mode=mode, **kwargs)
 
-	def write_parquet(self, data, path, mode='overwrite'):
+	def _write_parquet_arrow(
+			self, data, path, mode, rows_per_part, row_group_size, compression, workers
+	):
 		"""
-		saves a Spark DataFrame to a path on S3 and returns the list of parquet files
-		:type data: pyspark.sql.DataFrame
+		writes a Pandas DataFrame or an Arrow Table as parquet parts of rows_per_part rows uploaded concurrently
+		:type data: PandasDF or pyarrow.Table
 		:type path: str
 		:type mode: str
+		:type rows_per_part: int
+		:type row_group_size: int or NoneType
+		:type compression: str
+		:type workers: int
+		"""
+		import pyarrow as pa
+		import pyarrow.parquet as pq
+		from pandas import DataFrame as PandasDF
+
+		if mode in ('error', 'errorifexists') and self.exists(path=path):
+			raise FileExistsError(f'path "{path}" exists on S3!')
+		if mode == 'ignore' and self.exists(path=path):
+			return
+
+		if isinstance(data, PandasDF):
+			table = pa.Table.from_pandas(data, preserve_index=False)
+		else:
+			table = data
+
+		# a new id for every write so appended parts never replace existing ones
+		write_id = uuid4()
+		starts = range(0, max(table.num_rows, 1), rows_per_part)
+
+		def _write_part(index, start):
+			part_path = f'{path.rstrip("/")}/part-{index:05d}-{write_id}.parquet'
+			with self.open_upload(path=part_path) as f:
+				pq.write_table(
+					table.slice(start, rows_per_part), f,
+					row_group_size=row_group_size, compression=compression
+				)
+
+		try:
+			failures = self._map_in_threads(function=_write_part, arguments=list(enumerate(starts)), workers=workers)
+		finally:
+			self._invalidate_cache(path)
+		if len(failures) > 0:
+			raise list(failures.values())[0]
+
+	def write_parquet(
+			self, data, path, mode='overwrite', engine=None, rows_per_part=1000000, row_group_size=None,
+			compression='snappy', workers=8
+	):
+		"""
+		saves a Spark DataFrame, or with the arrow engine a Pandas DataFrame or Arrow Table,
+		to a path on S3 and returns the list of parquet files
+		:type data: pyspark.sql.DataFrame or PandasDF or pyarrow.Table
+		:type path: str
+		:param str mode: 'overwrite', 'append', 'ignore' or 'error'
+		:param str or NoneType engine: 'spark' or 'arrow', by default 'arrow' for Pandas DataFrames and Arrow Tables
+		:param int rows_per_part: arrow engine only, rows in each part file
+		:param int or NoneType row_group_size: arrow engine only, rows in each row group of a part
+		:param str compression: arrow engine only, parquet compression codec
+		:param int workers: arrow engine only, number of parts written at the same time
 		:rtype: list[str]
 		"""
+		from pandas import DataFrame as PandasDF
 		path = self._get_path(path=path)
 		path = self._get_absolute_path(path)
+		if engine is None:
+			is_arrow_table = type(data).__module__.startswith('pyarrow')
+			engine = 'arrow' if isinstance(data, PandasDF) or is_arrow_table else 'spark'
 
 		if mode == 'overwrite' and self.exists(path=path):
 			self.rm(path=path, recursive=True)
 
-		data.write.mode(mode).parquet(path=path)
+		if engine == 'arrow':
+			self._write_parquet_arrow(
+				data=data, path=path, mode=mode, rows_per_part=rows_per_part, row_group_size=row_group_size,
+				compression=compression, workers=workers
+			)
+		elif engine == 'spark':
+			try:
+				data.write.mode(mode).parquet(path=path)
+			finally:
+				self._invalidate_cache(path)
+		else:
+			raise ValueError(f'engine should be "spark" or "arrow" but it is "{engine}"!')
 		return self.ls(path=path)
 
 	@property
 	def spark(self):
 		"""
+		the Spark session given to S3, or one created on first use
 		:rtype: pyspark.sql.session.SparkSession
 		"""
 		if self._spark is None:
@@ -368,12 +1093,21 @@ class S3:
 			return None
 
 	def is_file(self, path):
+		cached_file = self._get_cached_file(path=path)
+		if cached_file is not None:
+			return cached_file.is_file
 		path = self._get_path(path=path)
-		return self.file_system.isfile(path=path)
+		return self._retry(self.file_system.isfile, key=path, path=path)
 
 	def is_dir(self, path):
+		if self._cache is not None:
+			file, files = self._cache.get_file_or_listing(path=self._get_cache_key(path=path))
+			if file is not None:
+				return file.is_dir
+			if files:
+				return True
 		path = self._get_path(path=path)
-		return self.file_system.isdir(path)
+		return self._retry(self.file_system.isdir, key=path, path=path)
 
 	def is_directory(self, path):
 		path = self._get_path(path=path)
@@ -382,66 +1116,121 @@ class S3:
 	def rename(self, path1, path2):
 		path1 = self._get_path(path=path1)
 		path2 = self._get_path(path=path2)
-		self.file_system.rename(path1=path1, path2=path2)
+		try:
+			self.file_system.rename(path1=path1, path2=path2)
+		finally:
+			self._invalidate_cache(path1, path2)
 
 	@property
 	def json(self):
 		return self.file_system.to_json()
 
+	def _get_listed_size(self, path):
+		"""
+		returns the size from the listing metadata of an S3Path if it has any, otherwise asks S3
+		:type path: S3Path or str
+		:rtype: int
+		"""
+		if isinstance(path, S3Path) and path.file is not None:
+			return path.file.size
+		return self.get_size(path=path)
+
 	def is_parquet_file(self, path):
 		"""
 		returns True if a path is a parquet file
-		:type path: str
+		:type path: str or S3Path
 		:rtype: bool
 		"""
-		path = self._get_path(path=path)
-		if self.get_size(path=path) == 0:
+		if self._get_listed_size(path=path) == 0:
 			return False
 		else:
 			n_and_e = self.get_file_name_and_extension(path=path).lower()
 			return n_and_e.startswith('part-') and n_and_e.endswith('.parquet')
 
-	def load_parquet(self, path, spark=None, parallel=True):
+	def load_parquet(self, path, spark=None, parallel=True, **kwargs):
 		path = self._get_path(path=path)
-		return self.read_parquet(path=path, spark=spark, parallel=parallel)
+		return self.read_parquet(path=path, spark=spark, parallel=parallel, **kwargs)
 
-	def read_parquet(self, path, spark=None, parallel=True):
+	def _read_parquet_arrow(self, path, columns, filters, workers, as_arrow):
+		"""
+		reads a parquet file or the parquet parts of a path with a pool of threads, one part per thread
+		:type path: str
+		:type columns: list[str] or NoneType
+		:type filters: list[tuple] or NoneType
+		:type workers: int
+		:type as_arrow: bool
+		:rtype: PandasDF or pyarrow.Table
+		"""
+		import pyarrow as pa
+		import pyarrow.parquet as pq
+
+		# Spark names its parts part-*.parquet but UNLOAD names them 0000_part_00.parquet
+		files = [
+			file.path for file in self.ls(path=path, exclude_empty=True)
+			if file.file.is_file and file.path.lower().endswith('.parquet')
+		]
+		if len(files) == 0:
+			# ls of a single file is empty
+			files = [self._get_cache_key(path=path)]
+
+		def _read_part(file):
+			# filters skip the row groups whose statistics cannot match before they are downloaded
+			return pq.read_table(file, columns=columns, filters=filters, filesystem=self.file_system)
+
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			tables = list(executor.map(_read_part, files))
+		table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+		if as_arrow:
+			return table
+		return table.to_pandas()
+
+	def read_parquet(
+			self, path, spark=None, parallel=True, engine='spark', columns=None, filters=None, workers=8,
+			as_arrow=False
+	):
 		"""
 		reads parquet files inside a path and returns the data
 		:type path: str
 		:type spark: pyspark.sql.session.SparkSession or NoneType
 		:type parallel: bool
-		:rtype: SparkDF
+		:param str engine: 'spark' for a Spark DataFrame or 'arrow' for a Pandas DataFrame without Spark
+		:param list[str] or NoneType columns: arrow engine only, the columns to read
+		:param list[tuple] or NoneType filters: arrow engine only, predicates such as [('year', '>=', 2020)]
+		:param int workers: arrow engine only, number of parts read at the same time
+		:param bool as_arrow: arrow engine only, returns an Arrow Table instead of a Pandas DataFrame
+		:rtype: SparkDF or PandasDF or pyarrow.Table
 		"""
 		path = self._get_path(path=path)
+		if engine == 'arrow':
+			return self._read_parquet_arrow(
+				path=path, columns=columns, filters=filters, workers=workers, as_arrow=as_arrow
+			)
+		elif engine != 'spark':
+			raise ValueError(f'engine should be "spark" or "arrow" but it is "{engine}"!')
+
 		if spark is None:
 			spark = self.spark
 
+		# one detailed listing, the sizes below come from its metadata
 		files = self.ls(path=path, exclude_empty=True)
 		if len(files) == 1:
 			file = files[0]
-			if self.get_size(file) > 0:
-				file = self._get_path(file)
+			if file.size > 0:
 				if not self.is_parquet_file(path=file):
-					print(f'"{file}" does not appear to be a parquet file!')
-				return spark.read.parquet(file)
+					print(f'"{file.path}" does not appear to be a parquet file!')
+				return spark.read.parquet(file.path)
 			else:
-				raise FileNotFoundError(f'"{file}" is empty!')
+				raise FileNotFoundError(f'"{file.path}" is empty!')
 
 		elif parallel:
 			return spark.read.parquet(f'{path}/part-*.parquet')
 
 		else:
-			parquet_files = [file for file in files if self.is_parquet_file(path=file)]
-			result = None
-			for parquet in parquet_files:
-				data = spark.read.parquet(self._get_absolute_path(parquet))
-				if result is None:
-					result = data
-				else:
-					result = result.union(data)
-
-			return result
+			# one read of every part instead of a chain of unions, which builds an O(N)-deep plan
+			parquet_files = [self._get_absolute_path(file.path) for file in files if self.is_parquet_file(path=file)]
+			if len(parquet_files) == 0:
+				return None
+			return spark.read.parquet(*parquet_files)
 
 	def save(self, obj, path, mode='overwrite'):
 		"""
@@ -505,10 +1294,11 @@ class S3:
 
 
 class S3Path:
-	def __init__(self, s3, path):
+	def __init__(self, s3, path, file=None):
 		"""
 		:type s3: S3
 		:type path: str
+		:param S3File or NoneType file: listing metadata of the path if it comes from a listing
 		"""
 		if path.startswith(s3.root):
 			#  warn(f'path "{path}" includes S3 root "{s3.root}"!')
@@ -516,6 +1306,7 @@ class S3Path:
 
 		self._s3 = s3
 		self._path = path
+		self._file = file
 		self._name_and_extension = s3.get_file_name_and_extension(path=path)
 		self._name = s3.get_file_name(path=path)
 		self._extension = s3.get_file_extension(path=path)
@@ -524,6 +1315,13 @@ class S3Path:
 	def path(self):
 		return self._path
 
+	@property
+	def file(self):
+		"""
+		:rtype: S3File or NoneType
+		"""
+		return self._file
+
 	@property
 	def name_and_extension(self):
 		return self._name_and_extension
@@ -599,6 +1397,17 @@ class S3Path:
 		"""
 		return self.s3.ls(path=self._path, **kwargs)
 
+	def iter_ls(self, **kwargs):
+		"""
+		:type prefix: str
+		:type suffix: str
+		:type glob: str
+		:type max_items: int
+		:type kwargs: dict
+		:rtype: generator
+		"""
+		return self.s3.iter_ls(path=self._path, **kwargs)
+
 	def dir(self, **kwargs):
 		"""
 		:type exclude_empty: bool
@@ -617,6 +1426,30 @@ class S3Path:
 		"""
 		return self.ls(**kwargs)
 
+	def walk(self, **kwargs):
+		"""
+		:type max_depth: int
+		:type workers: int
+		:rtype: generator
+		"""
+		return self.s3.walk(path=self._path, **kwargs)
+
+	def du(self, **kwargs):
+		"""
+		:type workers: int
+		:rtype: PandasDF
+		"""
+		return self.s3.du(path=self._path, **kwargs)
+
+	def iter_csv(self, **kwargs):
+		"""
+		:type chunksize: int
+		:type usecols: list[str]
+		:type dtype: dict
+		:rtype: generator
+		"""
+		return self.s3.iter_csv(path=self._path, **kwargs)
+
 	def is_file(self):
 		return self.s3.is_file(path=self._path)
 
@@ -640,6 +1473,8 @@ class S3Path:
 
 	@property
 	def size(self):
+		if self._file is not None:
+			return self._file.size
 		return self.s3.get_size(path=self._path)
 
 	def exists(self):
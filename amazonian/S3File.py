@@ -6,8 +6,11 @@ class S3File:
 		if type(dictionary) is S3File:
 			self._dict = dictionary._dict
 		else:
-			for important_key in ['Key', 'LastModified', 'Size', 'ETag']:
-				if important_key not in dictionary: raise KeyError(f'missing {important_key} in dictionary!')
+			if 'Key' not in dictionary and 'name' not in dictionary:
+				raise KeyError('missing Key in dictionary!')
+			if dictionary.get('type') != 'directory':
+				for important_key in ['Size']:
+					if important_key not in dictionary: raise KeyError(f'missing {important_key} in dictionary!')
 			self._dict = dictionary
 
 	KEY_CONVERSION = {
@@ -18,7 +21,15 @@ class S3File:
 	}
 
 	def get(self, key):
-		return self._dict[self.KEY_CONVERSION[key]]
+		"""
+		:param key: 'path', 'modified_at', 'size', 'etag'
+		"""
+		if key == 'path':
+			# s3fs puts the bucket in 'name', raw ListObjectsV2 entries only have 'Key'
+			return self._dict.get('name', self._dict.get('Key'))
+		elif key == 'size':
+			return self._dict.get('Size', self._dict.get('size', 0))
+		return self._dict.get(self.KEY_CONVERSION[key])
 
 	@property
 	def path(self):
@@ -32,6 +43,18 @@ class S3File:
 	def size(self):
 		return self.get('size')
 
+	@property
+	def etag(self):
+		return self.get('etag')
+
+	@property
+	def is_dir(self):
+		return self._dict.get('type') == 'directory' or self._dict.get('StorageClass') == 'DIRECTORY'
+
+	@property
+	def is_file(self):
+		return not self.is_dir
+
 	def __repr__(self):
 		return f'"{self.path}"  {self.size}  {self.modified_at}'
 
@@ -43,10 +66,39 @@ class S3Files:
 		"""
 		self._list = [S3File(each_file) for each_file in file_list]
 
+	@classmethod
+	def from_page(cls, page, bucket):
+		"""
+		converts a ListObjectsV2 response page to the same dictionaries s3fs returns from a detailed ls
+		:type page: dict
+		:type bucket: str
+		:rtype: S3Files
+		"""
+		dictionaries = []
+		for content in page.get('Contents', []):
+			dictionary = dict(content)
+			dictionary.update({'name': f'{bucket}/{content["Key"]}', 'size': content['Size'], 'type': 'file'})
+			dictionaries.append(dictionary)
+		for common_prefix in page.get('CommonPrefixes', []):
+			dictionaries.append({
+				'Key': common_prefix['Prefix'], 'name': f'{bucket}/{common_prefix["Prefix"].rstrip("/")}',
+				'Size': 0, 'size': 0, 'StorageClass': 'DIRECTORY', 'type': 'directory'
+			})
+		return cls(dictionaries)
+
 	@property
 	def list(self):
 		return self._list
 
+	def __len__(self):
+		return len(self._list)
+
+	def __iter__(self):
+		return iter(self._list)
+
+	def __getitem__(self, item):
+		return self._list[item]
+
 	def sort(self, by='path', reverse=True):
 		"""
 		:param by: 'path', 'modeified_at', 'size', 'etag'
@@ -54,7 +106,38 @@ class S3Files:
 		:return:
 		"""
 		if by is not None:
-			self._list.sort(key=lambda x:x._dict[S3File.KEY_CONVERSION[by]], reverse=reverse)
+			def _get_sort_key(x):
+				# directories have no modified_at or etag, keep them together instead of failing the comparison
+				value = x.get(by)
+				return value is None, value
+			self._list.sort(key=_get_sort_key, reverse=reverse)
+
+	def filter(
+			self, exclude_empty=False, min_size=None, max_size=None, modified_after=None, modified_before=None
+	):
+		"""
+		keeps the files that pass all the filters, using only the listing metadata
+		:type exclude_empty: bool
+		:type min_size: int or NoneType
+		:type max_size: int or NoneType
+		:type modified_after: datetime.datetime or NoneType
+		:type modified_before: datetime.datetime or NoneType
+		:rtype: S3Files
+		"""
+		def _passes(x):
+			if exclude_empty and x.size <= 0:
+				return False
+			if min_size is not None and x.size < min_size:
+				return False
+			if max_size is not None and x.size > max_size:
+				return False
+			if modified_after is not None and (x.modified_at is None or x.modified_at < modified_after):
+				return False
+			if modified_before is not None and (x.modified_at is None or x.modified_at > modified_before):
+				return False
+			return True
+
+		return S3Files([x for x in self._list if _passes(x)])
 
 	def __repr__(self):
 		return '\n'.join([x.__repr__() for x in self._list])
@@ -1,2 +1,6 @@
 from .S3 import S3, S3Path
+from .AsyncS3 import AsyncS3
+from .MetadataCache import MetadataCache
+from .RetryPolicy import RetryPolicy
 from .redshift.Redshift import Redshift
+from .redshift.AsyncRedshift import AsyncRedshift
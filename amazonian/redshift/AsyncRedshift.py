@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+
+class AsyncRedshift:
+	def __init__(self, redshift, max_connections=5):
+		"""
+		coroutine versions of run and get_dataframe on non-blocking psycopg2 connections that are polled by
+		the event loop instead of waited on by threads, at most max_connections queries run at the same time,
+		needs an event loop that supports add_reader (the selector loop on Windows)
+		:param .BasicRedshift.BasicRedshift redshift: its credentials and retry policy are used
+		:type max_connections: int
+		"""
+		self._redshift = redshift
+		self._max_connections = max_connections
+		self._idle_connections = []
+		self._semaphore = None
+
+	@property
+	def redshift(self):
+		return self._redshift
+
+	async def _retry(self, function, *args, **kwargs):
+		"""
+		awaits function through the retry policy of redshift, sharing the rate limit of its cluster
+		:param callable function: a coroutine function
+		"""
+		return await self._redshift.retry_policy.call_async(function, *args, key=self._redshift._server, **kwargs)
+
+	@property
+	def _connection_string(self):
+		redshift = self._redshift
+		return (
+			f"dbname='{redshift._database}' port='{redshift._port}' user='{redshift._user_id}' "
+			f"password='{redshift._password}' host='{redshift._server}'"
+		)
+
+	@staticmethod
+	async def _wait(connection):
+		"""
+		polls an asynchronous connection until its current operation is done
+		"""
+		import psycopg2.extensions
+		loop = asyncio.get_running_loop()
+		while True:
+			state = connection.poll()
+			if state == psycopg2.extensions.POLL_OK:
+				return
+			file_descriptor = connection.fileno()
+			future = loop.create_future()
+
+			def _set_done():
+				if not future.done():
+					future.set_result(None)
+
+			if state == psycopg2.extensions.POLL_READ:
+				loop.add_reader(file_descriptor, _set_done)
+				try:
+					await future
+				finally:
+					loop.remove_reader(file_descriptor)
+			elif state == psycopg2.extensions.POLL_WRITE:
+				loop.add_writer(file_descriptor, _set_done)
+				try:
+					await future
+				finally:
+					loop.remove_writer(file_descriptor)
+			else:
+				raise psycopg2.OperationalError(f'bad state from poll: {state}')
+
+	async def _connect(self):
+		import psycopg2
+		connection = psycopg2.connect(self._connection_string, async_=1)
+		try:
+			await self._wait(connection)
+		except BaseException:
+			connection.close()
+			raise
+		return connection
+
+	async def _acquire(self):
+		if self._semaphore is None:
+			self._semaphore = asyncio.Semaphore(self._max_connections)
+		await self._semaphore.acquire()
+		try:
+			if len(self._idle_connections) > 0:
+				return self._idle_connections.pop()
+			return await self._retry(self._connect)
+		except BaseException:
+			self._semaphore.release()
+			raise
+
+	def _release(self, connection, discard=False):
+		if discard or connection.closed:
+			connection.close()
+		else:
+			self._idle_connections.append(connection)
+		self._semaphore.release()
+
+	async def _execute(self, query, fetch=False, retry=False):
+		"""
+		runs a query, or a list of queries one after the other, on one connection, asynchronous connections
+		are in autocommit mode so each query is committed when it is done, raising any error
+		:type query: str or list[str]
+		:param bool fetch: if True, returns the column names and rows of the last query
+		:param bool retry: if True, the queries are run again when they fail with
+		a transient error, only for queries that can run twice, otherwise only the connection is retried
+		:rtype: tuple or NoneType
+		"""
+		if retry:
+			return await self._retry(self._execute_once, query=query, fetch=fetch)
+		return await self._execute_once(query=query, fetch=fetch)
+
+	async def _execute_once(self, query, fetch):
+		import psycopg2
+		queries = [query] if isinstance(query, str) else query
+		connection = await self._acquire()
+		discard = False
+		try:
+			cursor = connection.cursor()
+			for each_query in queries:
+				cursor.execute(each_query)
+				await self._wait(connection)
+			if fetch:
+				columns = [description[0] for description in cursor.description]
+				return columns, cursor.fetchall()
+		except (psycopg2.OperationalError, psycopg2.InterfaceError, asyncio.CancelledError):
+			# the connection is broken or still busy with a cancelled query
+			discard = True
+			raise
+		finally:
+			self._release(connection=connection, discard=discard)
+
+	async def run(self, query, retry=False):
+		"""
+		like BasicRedshift.run, prints the error of a query instead of raising it
+		:type query: str or list[str]
+		:param bool retry: if True, the queries are run again after a transient error, see _execute
+		"""
+		import psycopg2
+		try:
+			await self._execute(query=query, retry=retry)
+		except (Exception, psycopg2.DatabaseError) as error:
+			print(error)
+
+	async def get_dataframe(self, query, echo=1):
+		"""
+		:type query: str
+		:type echo: int
+		:rtype: pandas.DataFrame
+		"""
+		from pandas import DataFrame
+		start_time = time.time()
+		if echo:
+			print('\n', query, '\n', sep='')
+
+		# a select can run twice, like the retried read_sql_query of BasicRedshift.get_dataframe
+		columns, rows = await self._execute(query=query, fetch=True, retry=True)
+		result = DataFrame.from_records(rows, columns=columns)
+
+		if echo:
+			print(f'shape:{result.shape}  elapsed time:{self._redshift._get_elapsed_time_str(start_time)}')
+		return result
+
+	async def close(self):
+		while len(self._idle_connections) > 0:
+			self._idle_connections.pop().close()
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.close()
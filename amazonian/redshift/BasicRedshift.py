@@ -1,26 +1,47 @@
-from sqlalchemy import create_engine, text
 import time
-from numpy import dtype as numpy_dtype
-from pandas import read_sql_query, concat, DataFrame
-import psycopg2
+from uuid import uuid4
 from .get_redshift_create_table_query import get_redshift_create_table_query
+from ..RetryPolicy import RetryPolicy
 
 
 class BasicRedshift:
-	def __init__(self, user_id, password, server, database, port='5439'):
+	DEFAULT_POOL_SETTINGS = {'pool_size': 5, 'max_overflow': 10, 'pool_recycle': 3600, 'pool_pre_ping': True}
+	# pandas dtypes of the type oids in cursor.description, for the columns of an empty result
+	DESCRIPTION_DATA_TYPES = {
+		16: 'bool', 20: 'int64', 21: 'int16', 23: 'int32', 700: 'float32', 701: 'float64', 1700: 'float64',
+		25: 'string', 1042: 'string', 1043: 'string', 1082: 'datetime64[ns]', 1114: 'datetime64[ns]'
+	}
+	# the missing values of staged csv parts, COPY loads it as NULL and keeps empty strings as empty strings
+	CSV_NULL = '\\N'
+
+	def __init__(
+			self, user_id, password, server, database, port='5439',
+			pool_size=5, max_overflow=10, pool_recycle=3600, pool_pre_ping=True, retry_policy=None
+	):
 		"""
 		:type server: str
 		:type port: str
 		:type database: str
 		:type user_id: str
 		:type password: str
+		:param int pool_size: number of connections kept open in the pool
+		:param int max_overflow: number of extra connections opened when all the pooled ones are busy
+		:param int pool_recycle: seconds after which a pooled connection is replaced, -1 for never
+		:param bool pool_pre_ping: if True, checks a pooled connection is alive before using it
+		:param RetryPolicy or NoneType retry_policy: retries lost connections and serialization failures,
+		a default RetryPolicy if None
 		"""
 		self._server = server
 		self._port = port
 		self._database = database
 		self._user_id = user_id
 		self._password = password
-		self._engine = create_engine(self._engine_string)
+		self._pool_settings = {
+			'pool_size': pool_size, 'max_overflow': max_overflow,
+			'pool_recycle': pool_recycle, 'pool_pre_ping': pool_pre_ping
+		}
+		self._retry_policy = retry_policy or RetryPolicy()
+		self._sqlalchemy_engine = None
 
 	def __getstate__(self):
 		return {
@@ -28,7 +49,9 @@ class BasicRedshift:
 			'port': self._port,
 			'database': self._database,
 			'user_id': self._user_id,
-			'password': self._password
+			'password': self._password,
+			'pool_settings': self._pool_settings,
+			'retry_policy': self._retry_policy
 		}
 
 	def __setstate__(self, state):
@@ -37,7 +60,55 @@ class BasicRedshift:
 		self._database = state['database']
 		self._user_id = state['user_id']
 		self._password = state['password']
-		self._engine = create_engine(self._engine_string)
+		self._pool_settings = state.get('pool_settings', self.DEFAULT_POOL_SETTINGS.copy())
+		self._retry_policy = state.get('retry_policy') or RetryPolicy()
+		self._sqlalchemy_engine = None
+
+	@property
+	def _engine(self):
+		"""
+		the SQLAlchemy engine and its thread-safe connection pool, shared by every query,
+		created on first use so that importing and constructing stay cheap
+		:rtype: sqlalchemy.engine.Engine
+		"""
+		if self._sqlalchemy_engine is None:
+			from sqlalchemy import create_engine
+			self._sqlalchemy_engine = create_engine(self._engine_string, **self._pool_settings)
+		return self._sqlalchemy_engine
+
+	def _raw_connection(self):
+		"""
+		checks out a psycopg2 connection from the pool, closing it returns it to the pool
+		:rtype: sqlalchemy.pool.PoolProxiedConnection
+		"""
+		return self._retry(self._engine.raw_connection)
+
+	@property
+	def retry_policy(self):
+		"""
+		:rtype: RetryPolicy
+		"""
+		return self._retry_policy
+
+	def _retry(self, function, *args, **kwargs):
+		"""
+		calls function through the retry policy, all the queries of a cluster share its rate limit
+		:type function: callable
+		"""
+		return self._retry_policy.call(function, *args, key=self._server, **kwargs)
+
+	@property
+	def pool_stats(self):
+		"""
+		:rtype: dict
+		"""
+		settings = self._pool_settings.copy()
+		if self._sqlalchemy_engine is None:
+			settings.update({'checked_in': 0, 'checked_out': 0, 'overflow': 0})
+			return settings
+		pool = self._sqlalchemy_engine.pool
+		settings.update({'checked_in': pool.checkedin(), 'checked_out': pool.checkedout(), 'overflow': pool.overflow()})
+		return settings
 
 	@property
 	def _engine_string(self):
@@ -50,45 +121,72 @@ class BasicRedshift:
 	def __str__(self):
 		return f'{self._server}/{self.name}'
 
-	def run(self, query):
-		connection = None
+	def _execute(self, query, retry=False):
+		"""
+		runs a query, or a list of queries in one transaction of one session, on a pooled connection
+		and commits it, raising any error
+		:type query: str or list[str]
+		:param bool retry: if True, the queries are run again when they fail with a transient error, only for
+		queries that can run twice since a COMMIT, TRUNCATE or DDL in them commits on its own, otherwise only
+		the checkout of the connection is retried
+		"""
+		queries = [query] if isinstance(query, str) else query
+
+		def _execute_queries(connection):
+			try:
+				cursor = connection.cursor()
+				for each_query in queries:
+					cursor.execute(each_query)
+				connection.commit()
+			except BaseException:
+				try:
+					connection.rollback()
+				except Exception:
+					# the connection is lost, the error of the query is the one worth raising
+					pass
+				raise
+			finally:
+				connection.close()
+
+		if retry:
+			self._retry(lambda: _execute_queries(connection=self._engine.raw_connection()))
+		else:
+			_execute_queries(connection=self._raw_connection())
+
+	def run(self, query, retry=False):
+		"""
+		:type query: str or list[str]
+		:param bool retry: if True, the queries are run again after a transient error, see _execute
+		"""
+		import psycopg2
 		try:
-			connection = psycopg2.connect(f"""
-				dbname='{self._database}' port='{self._port}' 
-				user='{self._user_id}' password='{self._password}' 
-				host='{self._server}'
-			""")
-			cursor = connection.cursor()
-			cursor.execute(query)
-			connection.commit()
+			self._execute(query=query, retry=retry)
 		except (Exception, psycopg2.DatabaseError) as error:
 			print(error)
-		finally:
-			if connection is not None:
-				connection.close()
 
 	def change_password(self, new_password):
 		"""
 		:type new_password: str
 		:return:
 		"""
+		from sqlalchemy import text
 		the_query = "ALTER USER " + self._user_id + " PASSWORD " + "'" + new_password + "'"
-		connection = self._engine.connect()
-		result = connection.execute(text(the_query))
+		with self._engine.connect() as connection:
+			result = connection.execute(text(the_query))
+			if hasattr(connection, 'commit'):
+				connection.commit()
 		self._password = new_password
+		# the pooled connections were opened with the old password
+		self.close()
+		self._sqlalchemy_engine = None
 		return result
 
-	def get_dataframe(self, query, echo=1):
+	@staticmethod
+	def _get_elapsed_time_str(start_time):
 		"""
-		:type query: str
-		:type echo: int
-		:return:
+		:type start_time: float
+		:rtype: str
 		"""
-		start_time = time.time()
-		if echo:
-			print('\n', query, '\n', sep='')
-
-		result = read_sql_query(query, self._engine)
 		elapsed_time = time.time() - start_time
 		if elapsed_time >= 3600:
 			elapsed_time = elapsed_time / 3600
@@ -98,12 +196,394 @@ class BasicRedshift:
 			time_unit = 'minutes'
 		else:
 			time_unit = 'seconds'
+		return f'{round(elapsed_time, 2)}{time_unit}'
 
+	def get_dataframe(self, query, echo=1, stream=False, chunksize=100000, fetch_size=None):
+		"""
+		:type query: str
+		:type echo: int
+		:param bool stream: if True, returns a generator of DataFrames, see iter_dataframes
+		:type chunksize: int
+		:type fetch_size: int or NoneType
+		:return:
+		"""
+		if stream:
+			return self.iter_dataframes(query=query, chunksize=chunksize, fetch_size=fetch_size, echo=echo)
+
+		from pandas import read_sql_query
+		start_time = time.time()
 		if echo:
-			print(f'shape:{result.shape}  elapsed time:{round(elapsed_time, 2)}{time_unit}')
+			print('\n', query, '\n', sep='')
+
+		result = self._retry(read_sql_query, query, self._engine)
+
+		if echo:
+			print(f'shape:{result.shape}  elapsed time:{self._get_elapsed_time_str(start_time)}')
 
 		return result
 
+	@staticmethod
+	def _get_sql_literal(value):
+		"""
+		:type value: int or float or str or datetime
+		:rtype: str
+		"""
+		from numbers import Number
+		if isinstance(value, Number):
+			return str(value)
+		return f"'{value}'"
+
+	def get_partition_queries(self, query, partition_column, num_partitions, method='range'):
+		"""
+		splits a query into queries that each return one partition of its rows, the missing values of
+		partition_column go to the last partition
+		:type query: str
+		:param str partition_column: a numeric or datetime column for range, any column for hash
+		:type num_partitions: int
+		:param str method: 'range' for equal ranges between the minimum and the maximum, 'hash' for FNV_HASH buckets
+		:rtype: list[str]
+		"""
+		query = query.strip().rstrip(';')
+		column = f'"{partition_column}"'
+		if method == 'hash':
+			conditions = [
+				f'{column} IS NOT NULL AND ABS(MOD(FNV_HASH({column}), {num_partitions})) = {index}'
+				for index in range(num_partitions)
+			]
+		elif method == 'range':
+			bounds = self.get_dataframe(
+				query=f'SELECT MIN({column}) AS "minimum", MAX({column}) AS "maximum" FROM ({query}) X', echo=0
+			).iloc[0]
+			minimum, maximum = bounds['minimum'], bounds['maximum']
+			if minimum is None or minimum != minimum:
+				# no rows or only missing values
+				conditions = ['TRUE'] + ['FALSE'] * (num_partitions - 1)
+			else:
+				step = (maximum - minimum) / num_partitions
+				if isinstance(minimum, int) or hasattr(minimum, 'dtype') and minimum.dtype.kind in 'iu':
+					step = -(-(maximum - minimum) // num_partitions) or 1
+				boundaries = [minimum + step * index for index in range(1, num_partitions)]
+				lower = [None] + boundaries
+				upper = boundaries + [None]
+				conditions = []
+				for low, high in zip(lower, upper):
+					condition = []
+					if low is not None:
+						condition.append(f'{column} >= {self._get_sql_literal(low)}')
+					if high is not None:
+						condition.append(f'{column} < {self._get_sql_literal(high)}')
+					conditions.append(' AND '.join(condition) if len(condition) > 0 else 'TRUE')
+		else:
+			raise ValueError(f'method should be "range" or "hash" but it is "{method}"!')
+
+		conditions[-1] = f'({conditions[-1]}) OR {column} IS NULL'
+		return [f'SELECT * FROM ({query}) X WHERE {condition}' for condition in conditions]
+
+	def _get_partition(self, index, query):
+		"""
+		:type index: int
+		:type query: str
+		:rtype: DataFrame
+		"""
+		start_time = time.time()
+		result = self.get_dataframe(query=query, echo=0)
+		result.attrs['partition'] = {
+			'partition': index, 'query': query, 'num_rows': len(result), 'seconds': time.time() - start_time
+		}
+		return result
+
+	def get_dataframe_parallel(
+			self, query, partition_column, num_partitions=None, method='range', workers=None, stream=False, echo=1
+	):
+		"""
+		splits a query into partitions of a column, runs them concurrently over pooled connections
+		and concatenates the results, whose attrs['partitions'] has the timing of every partition
+		:type query: str
+		:type partition_column: str
+		:param int or NoneType num_partitions: the pool size by default
+		:param str method: 'range' or 'hash', see get_partition_queries
+		:param int or NoneType workers: number of partitions running at the same time, the pool size by default
+		:param bool stream: if True, returns a generator that yields each partition as soon as it is complete
+		:type echo: int
+		:rtype: DataFrame or generator
+		"""
+		workers = workers or self._pool_settings['pool_size']
+		num_partitions = num_partitions or workers
+		queries = self.get_partition_queries(
+			query=query, partition_column=partition_column, num_partitions=num_partitions, method=method
+		)
+		if echo:
+			print('\n', '\n'.join(queries), '\n', sep='')
+		if stream:
+			return self._iter_partitions(queries=queries, workers=workers)
+
+		from concurrent.futures import ThreadPoolExecutor
+		from pandas import concat
+		start_time = time.time()
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			partitions = list(executor.map(self._get_partition, range(len(queries)), queries))
+		result = concat(partitions, ignore_index=True)
+		result.attrs['partitions'] = [partition.attrs['partition'] for partition in partitions]
+		if echo:
+			print(f'shape:{result.shape}  elapsed time:{self._get_elapsed_time_str(start_time)}')
+		return result
+
+	def _iter_partitions(self, queries, workers):
+		"""
+		:type queries: list[str]
+		:type workers: int
+		:rtype: generator
+		"""
+		from concurrent.futures import ThreadPoolExecutor, as_completed
+		executor = ThreadPoolExecutor(max_workers=workers)
+		futures = [executor.submit(self._get_partition, index, query) for index, query in enumerate(queries)]
+		try:
+			for future in as_completed(futures):
+				yield future.result()
+		finally:
+			for future in futures:
+				future.cancel()
+			executor.shutdown(wait=True)
+
+	@classmethod
+	def _get_empty_dataframe(cls, description):
+		"""
+		:param tuple description: cursor.description
+		:rtype: DataFrame
+		"""
+		from pandas import DataFrame, Series
+		return DataFrame({
+			column[0]: Series([], dtype=cls.DESCRIPTION_DATA_TYPES.get(column[1], 'object')) for column in description
+		})
+
+	@staticmethod
+	def _get_arrow_schema(description, data):
+		"""
+		the arrow schema of a query result, from the type oids in cursor.description, so a column that is all
+		NULL in the first chunk does not get the null type, the other oids get the type inferred from data
+		:param tuple description: cursor.description
+		:param DataFrame data: the first chunk
+		:rtype: pyarrow.Schema
+		"""
+		import pyarrow as pa
+		arrow_types = {
+			16: pa.bool_(), 20: pa.int64(), 21: pa.int16(), 23: pa.int32(), 700: pa.float32(), 701: pa.float64(),
+			1700: pa.float64(), 25: pa.string(), 1042: pa.string(), 1043: pa.string(), 1082: pa.date32(),
+			1114: pa.timestamp('us'), 1184: pa.timestamp('us', tz='UTC')
+		}
+		inferred = pa.Table.from_pandas(data, preserve_index=False).schema
+		fields = []
+		for column in description:
+			arrow_type = arrow_types.get(column[1], inferred.field(column[0]).type)
+			fields.append(pa.field(column[0], pa.string() if pa.types.is_null(arrow_type) else arrow_type))
+		return pa.schema(fields)
+
+	def iter_dataframes(self, query, chunksize=100000, fetch_size=None, echo=1):
+		"""
+		runs a query with a named server-side cursor and yields DataFrames of chunksize rows, the last one can
+		be shorter, so the full result is never held in memory, an empty result yields one empty DataFrame
+		with the columns of the query,
+		the chunks have the dtypes of get_dataframe: decimals as floats, timestamps as datetime64
+		and dates as date objects
+		:type query: str
+		:type chunksize: int
+		:param int or NoneType fetch_size: rows fetched from the server per round trip, chunksize by default
+		:type echo: int
+		:rtype: generator
+		"""
+		for _, data in self._iter_dataframes(query=query, chunksize=chunksize, fetch_size=fetch_size, echo=echo):
+			yield data
+
+	def _iter_dataframes(self, query, chunksize, fetch_size, echo):
+		"""
+		:return: a generator of the cursor.description and a DataFrame, see iter_dataframes
+		:rtype: generator
+		"""
+		from pandas import DataFrame
+		start_time = time.time()
+		if echo:
+			print('\n', query, '\n', sep='')
+
+		fetch_size = fetch_size or chunksize
+		num_rows = 0
+		connection = self._raw_connection()
+		try:
+			cursor = connection.cursor(name=f'amazonian_{uuid4().hex}')
+			try:
+				cursor.execute(query)
+				rows = cursor.fetchmany(fetch_size)
+				# a named cursor only has a description after its first fetch
+				description = cursor.description
+				columns = [column[0] for column in description]
+				buffer = []
+				while True:
+					buffer.extend(rows)
+					is_done = len(rows) == 0
+					while len(buffer) >= chunksize or (is_done and len(buffer) > 0):
+						chunk = buffer[:chunksize]
+						del buffer[:chunksize]
+						num_rows += len(chunk)
+						# converts decimals to floats like read_sql_query in get_dataframe does
+						yield description, DataFrame.from_records(chunk, columns=columns, coerce_float=True)
+					if is_done:
+						break
+					rows = cursor.fetchmany(fetch_size)
+				if num_rows == 0:
+					yield description, self._get_empty_dataframe(description=description)
+			finally:
+				cursor.close()
+		finally:
+			# ends the transaction of the cursor before the connection goes back to the pool
+			connection.rollback()
+			connection.close()
+
+		if echo:
+			print(f'rows:{num_rows}  elapsed time:{self._get_elapsed_time_str(start_time)}')
+
+	def export_query(
+			self, query, path, file_format='parquet', s3=None, chunksize=100000, fetch_size=None, echo=1, **kwargs
+	):
+		"""
+		streams the result of a query into one csv or parquet file on local disk, or on S3 if s3 is given,
+		one chunk at a time
+		:type query: str
+		:type path: str
+		:param str file_format: 'csv' or 'parquet'
+		:param .S3.S3 or NoneType s3: writes to S3 with a multipart upload instead of the local disk
+		:type chunksize: int
+		:type fetch_size: int or NoneType
+		:type echo: int
+		:param kwargs: passed to DataFrame.to_csv or pyarrow.parquet.ParquetWriter
+		:return: number of rows
+		:rtype: int
+		"""
+		if file_format not in ('csv', 'parquet'):
+			raise ValueError(f'file_format should be "csv" or "parquet" but it is "{file_format}"!')
+		chunks = self._iter_dataframes(query=query, chunksize=chunksize, fetch_size=fetch_size, echo=echo)
+		num_rows = 0
+		with (s3.open_upload(path=path) if s3 is not None else open(path, 'wb')) as f:
+			if file_format == 'csv':
+				for _, chunk in chunks:
+					f.write(chunk.to_csv(path_or_buf=None, index=False, header=num_rows == 0, **kwargs).encode('utf-8'))
+					num_rows += len(chunk)
+			else:
+				import pyarrow as pa
+				import pyarrow.parquet as pq
+				writer = None
+				try:
+					for description, chunk in chunks:
+						if writer is None:
+							# every row group has the schema of the query, not of the first chunk
+							writer = pq.ParquetWriter(f, self._get_arrow_schema(description=description, data=chunk), **kwargs)
+						writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+						num_rows += len(chunk)
+				finally:
+					if writer is not None:
+						writer.close()
+		return num_rows
+
+
+	def get_unload_query(self, query, s3_path, s3, file_format='parquet', parallel=True, clean_path=True):
+		"""
+		:type query: str
+		:param str or S3Path s3_path: the prefix the files are unloaded to
+		:param .S3.S3 s3: its IAM role or keys authorize Redshift to write to S3
+		:param str file_format: 'parquet' or 'csv', csv files are gzipped and have a header
+		:param bool parallel: if True, every slice writes its own files
+		:param bool clean_path: if True, removes the files already in s3_path, otherwise overwrites them
+		:rtype: str
+		"""
+		from ..S3 import S3Path
+		if file_format == 'parquet':
+			format_clause = 'FORMAT AS PARQUET'
+		elif file_format == 'csv':
+			format_clause = 'FORMAT AS CSV HEADER GZIP'
+		else:
+			raise ValueError(f'file_format should be "parquet" or "csv" but it is "{file_format}"!')
+		if not isinstance(s3_path, S3Path):
+			s3_path = S3Path(s3=s3, path=s3_path)
+		escaped_query = query.strip().rstrip(';').replace("'", "''")
+		return f"""
+			UNLOAD ('{escaped_query}') 
+			TO '{s3_path.full_path.rstrip('/')}/' 
+			{s3._get_redshift_credentials()} 
+			{format_clause} 
+			PARALLEL {'ON' if parallel else 'OFF'} 
+			{'CLEANPATH' if clean_path else 'ALLOWOVERWRITE'};
+		"""
+
+	def _get_empty_result(self, query):
+		"""
+		:type query: str
+		:return: a DataFrame without rows that has the columns of the query
+		:rtype: DataFrame
+		"""
+		return self.get_dataframe(query=f'SELECT * FROM ({query.strip().rstrip(";")}) result LIMIT 0', echo=0)
+
+	def unload(
+			self, query, s3_path, s3, file_format='parquet', parallel=True, clean_path=True, read=True,
+			cleanup=False, workers=8, echo=1
+	):
+		"""
+		unloads the result of a query to S3 with UNLOAD, which every slice of the cluster writes in parallel,
+		then reads the unloaded files back concurrently
+		:type query: str
+		:param str or S3Path s3_path: a prefix dedicated to this unload
+		:param .S3.S3 s3: writes with its IAM role or keys and reads the files back
+		:param str file_format: 'parquet' or 'csv'
+		:type parallel: bool
+		:type clean_path: bool
+		:param bool read: if False, only unloads and returns None
+		:param bool cleanup: if True, deletes the unloaded files after reading them
+		:param int workers: number of files read at the same time
+		:type echo: int
+		:rtype: DataFrame or NoneType
+		"""
+		start_time = time.time()
+		unload_query = self.get_unload_query(
+			query=query, s3_path=s3_path, s3=s3, file_format=file_format, parallel=parallel, clean_path=clean_path
+		)
+		if echo:
+			print('\n', unload_query, '\n', sep='')
+		try:
+			self._execute(query=unload_query)
+		finally:
+			s3._invalidate_cache(s3_path)
+
+		if not read:
+			return None
+
+		try:
+			files = s3.ls(path=s3_path, exclude_empty=True)
+		except FileNotFoundError:
+			files = []
+		if len(files) == 0:
+			# a query without rows can leave no files at all
+			result = self._get_empty_result(query=query)
+		elif file_format == 'parquet':
+			result = s3.read_parquet(path=s3_path, engine='arrow', workers=workers)
+		else:
+			from pandas import concat
+			from concurrent.futures import ThreadPoolExecutor
+
+			def _read_part(part):
+				chunks = list(s3.iter_csv(path=part, chunksize=1000000))
+				return concat(chunks, ignore_index=True) if len(chunks) > 0 else None
+
+			with ThreadPoolExecutor(max_workers=workers) as executor:
+				parts = list(executor.map(_read_part, [s3._get_absolute_path(file.path) for file in files]))
+			parts = [part for part in parts if part is not None]
+			if len(parts) > 0:
+				result = concat(parts, ignore_index=True)
+			else:
+				result = self._get_empty_result(query=query)
+
+		if cleanup:
+			s3.rm(path=s3_path, recursive=True)
+
+		if echo:
+			print(f'shape:{result.shape}  elapsed time:{self._get_elapsed_time_str(start_time)}')
+		return result
 
 	# schemas:
 	_schemas_query = "select * from pg_namespace where nspowner<>'1';"
@@ -145,7 +625,8 @@ class BasicRedshift:
 
 	# close?
 	def close(self):
-		self._engine.dispose()
+		if self._sqlalchemy_engine is not None:
+			self._sqlalchemy_engine.dispose()
 
 	def get_table_scrape_dates_query(self, schema, table, period='month', scrape_date_column='scrape_date'):
 		"""
@@ -247,6 +728,8 @@ class BasicRedshift:
 		:type index:
 		:type if_exists: str
 		"""
+		from numpy import dtype as numpy_dtype
+		from pandas import concat
 		null_data = data.iloc[[0], :]
 		max_data = data.iloc[[0], :]
 		for col in data.columns:
@@ -261,11 +744,154 @@ class BasicRedshift:
 		print(temp_data)
 		temp_data.to_sql(name=name, schema=schema, con=self._engine, index=index, if_exists=if_exists)
 
-	def create_table(self, data, name, schema):
-		query = get_redshift_create_table_query(database=self.name, schema=schema, table=name, data=data)
+	def create_table(
+			self, data, name, schema, sort_key=None, dist_key=None, sample_size=None, infer_dates=False,
+			narrow_integers=False
+	):
+		"""
+		:type data: DataFrame
+		:type name: str
+		:type schema: str
+		:param str or NoneType sort_key: see get_redshift_key_suggestions
+		:param str or NoneType dist_key: see get_redshift_key_suggestions
+		:param int or NoneType sample_size: number of rows used to infer the kind of object columns, None for all
+		:param bool infer_dates: if True, datetime columns whose values are all at midnight are DATE instead of TIMESTAMP
+		:param bool narrow_integers: if True, integer columns whose values fit in 16 bits are SMALLINT instead of INTEGER
+		:rtype: str
+		"""
+		query = get_redshift_create_table_query(
+			database=self.name, schema=schema, table=name, data=data, sort_key=sort_key, dist_key=dist_key,
+			sample_size=sample_size, infer_dates=infer_dates, narrow_integers=narrow_integers
+		)
 		self.run(query=query)
 		return query
 
+	@classmethod
+	def _get_staged_part_bytes(cls, data, file_format):
+		"""
+		:type data: DataFrame
+		:param str file_format: 'csv' for a gzipped csv without header, with CSV_NULL for missing values, or 'parquet'
+		:rtype: bytes
+		"""
+		if file_format == 'csv':
+			from gzip import compress
+			from csv import QUOTE_MINIMAL
+			csv = data.to_csv(path_or_buf=None, index=False, header=False, quoting=QUOTE_MINIMAL, na_rep=cls.CSV_NULL)
+			return compress(csv.encode('utf-8'))
+		else:
+			from io import BytesIO
+			buffer = BytesIO()
+			data.to_parquet(buffer, index=False, engine='pyarrow')
+			return buffer.getvalue()
+
+	def write_dataframe(
+			self, data, schema, table, s3, s3_path, mode='append', keys=None, file_format='csv', num_parts=16,
+			workers=16, cleanup=True, echo=1
+	):
+		"""
+		loads a DataFrame into a table by writing it to S3 as num_parts compressed parts concurrently
+		and loading them with one COPY of a manifest, so that every slice of the cluster loads in parallel
+		:type data: DataFrame
+		:type schema: str
+		:type table: str
+		:param .S3.S3 s3: writes the parts and authorizes the COPY with its IAM role or keys
+		:param str or S3Path s3_path: staging prefix, each load uses its own folder inside it
+		:param str mode: 'append', 'replace' to drop and recreate the table, or 'upsert' to merge on keys
+		:param list[str] or NoneType keys: the columns that identify a row, required by upsert
+		:param str file_format: 'csv' for gzipped csv parts or 'parquet'
+		:param int num_parts: number of parts, ideally a multiple of the number of slices
+		:param int workers: number of parts written at the same time
+		:param bool cleanup: if True, deletes the staged parts after the load
+		:type echo: int
+		:return: the COPY query
+		:rtype: str
+		"""
+		import json
+		if mode not in ('append', 'replace', 'upsert'):
+			raise ValueError(f'mode should be "append", "replace" or "upsert" but it is "{mode}"!')
+		if mode == 'upsert' and not keys:
+			raise ValueError('upsert needs the keys of the table!')
+		if file_format not in ('csv', 'parquet'):
+			raise ValueError(f'file_format should be "csv" or "parquet" but it is "{file_format}"!')
+
+		start_time = time.time()
+		staging_path = f'{s3._get_path(path=s3_path).rstrip("/")}/{uuid4().hex}'
+		extension = 'csv.gz' if file_format == 'csv' else 'parquet'
+		num_parts = max(1, min(num_parts, len(data)))
+		part_size = -(-len(data) // num_parts)
+		parts = [
+			(index, f'{staging_path}/part-{index:05d}.{extension}')
+			for index in range(num_parts)
+		]
+		sizes = {}
+
+		def _write_part(index, part_path):
+			part = data.iloc[index * part_size:(index + 1) * part_size]
+			sizes[part_path] = s3.write_bytes(
+				path=part_path, bytes=self._get_staged_part_bytes(data=part, file_format=file_format)
+			)['bytes']
+
+		try:
+			failures = s3._map_in_threads(function=_write_part, arguments=parts, workers=workers)
+			if len(failures) > 0:
+				raise list(failures.values())[0]
+
+			from ..S3 import S3Path
+			manifest = {'entries': [
+				{
+					'url': S3Path(s3=s3, path=part_path).full_path, 'mandatory': True,
+					'meta': {'content_length': sizes[part_path]}
+				}
+				for _, part_path in parts
+			]}
+			manifest_path = S3Path(s3=s3, path=f'{staging_path}/manifest')
+			s3.write(path=manifest_path, obj=json.dumps(manifest), mode='w')
+
+			columns = ', '.join([f'"{column}"' for column in data.columns])
+			target = f'{schema}.{table}'
+			load_target = f'{table}_staging' if mode == 'upsert' else target
+			if file_format == 'csv':
+				column_list = f' ({columns})'
+				null = self.CSV_NULL.replace('\\', '\\\\')
+				format_clause = f"FORMAT AS CSV GZIP ACCEPTINVCHARS NULL AS '{null}' TIMEFORMAT 'auto' DATEFORMAT 'auto'"
+			else:
+				# parquet columns are matched by position, the DataFrame and the table must have the same order
+				column_list = ''
+				format_clause = 'FORMAT AS PARQUET'
+			copy_query = f"""
+				COPY {load_target}{column_list} FROM '{manifest_path.full_path}' 
+				{s3._get_redshift_credentials()} 
+				MANIFEST {format_clause};
+			"""
+
+			queries = []
+			if mode == 'replace':
+				queries.append(f'DROP TABLE IF EXISTS {target};')
+			queries.append(get_redshift_create_table_query(database=self.name, schema=schema, table=table, data=data))
+			if mode == 'upsert':
+				key_condition = ' AND '.join([f'{target}."{key}" = {load_target}."{key}"' for key in keys])
+				queries += [
+					f'CREATE TEMP TABLE {load_target} (LIKE {target});',
+					copy_query,
+					f'DELETE FROM {target} USING {load_target} WHERE {key_condition};',
+					f'INSERT INTO {target} ({columns}) SELECT {columns} FROM {load_target};',
+					f'DROP TABLE {load_target};'
+				]
+			else:
+				queries.append(copy_query)
+
+			if echo:
+				print('\n', '\n'.join(queries), '\n', sep='')
+			# one session and one transaction so the temporary staging table is visible and the merge is atomic
+			self._execute(query=queries)
+		finally:
+			if cleanup and s3.exists(path=staging_path):
+				s3.rm(path=staging_path, recursive=True)
+
+		if echo:
+			print(f'rows:{len(data)}  elapsed time:{self._get_elapsed_time_str(start_time)}')
+		return copy_query
+
 	def get_errors(self, limit=10, echo=1):
 		"""
 		:type limit: int
@@ -364,3 +990,131 @@ class BasicRedshift:
 	def get_tables_data(self, schema=None, echo=0):
 		result = self.get_dataframe(query=self.get_tables_data_query(schema=schema), echo=echo)
 		return result[~result['table'].str.startswith('#')]
+
+	def get_catalog_queries(self, schema=None, tables=None):
+		"""
+		queries of the system views that list the tables with their row counts and sizes, the number of columns
+		of each table, and the columns with their data types, without scanning stv_blocklist
+		:type schema: str or NoneType
+		:param list[tuple] or NoneType tables: if given, the columns query only reads these (schema, table) pairs
+		:rtype: dict[str,str]
+		"""
+		table_filter = f'AND "schema" = \'{schema}\' ' if schema is not None else ''
+		column_filter = f'AND c.table_schema = \'{schema}\' ' if schema is not None else ''
+		tables_query = f"""
+			SELECT 
+				table_id, 
+				TRIM("schema") AS "schema", 
+				TRIM("table") AS "table", 
+				tbl_rows AS "num_rows", 
+				size AS "mbytes" 
+			FROM svv_table_info 
+			WHERE TRIM("database") = '{self._database}' {table_filter};
+		"""
+		columns_from = f"""
+			FROM svv_columns c 
+			JOIN svv_tables t 
+				ON t.table_catalog = c.table_catalog 
+				AND t.table_schema = c.table_schema 
+				AND t.table_name = c.table_name 
+			WHERE t.table_type = 'BASE TABLE' AND TRIM(c.table_catalog) = '{self._database}' {column_filter}"""
+		column_counts_query = f"""
+			SELECT 
+				TRIM(c.table_catalog) AS "database", 
+				TRIM(c.table_schema) AS "schema", 
+				TRIM(c.table_name) AS "table", 
+				COUNT(*) AS "num_columns" {columns_from}
+			GROUP BY 1, 2, 3;
+		"""
+		if tables is not None:
+			table_names = {}
+			for table_schema, table_name in tables:
+				table_names.setdefault(table_schema, []).append(table_name)
+			conditions = ' OR '.join(
+				f"(c.table_schema = '{table_schema}' AND c.table_name IN ('" + "', '".join(names) + "'))"
+				for table_schema, names in table_names.items()
+			)
+			columns_from += f'AND ({conditions or "FALSE"}) '
+		columns_query = f"""
+			SELECT 
+				TRIM(c.table_catalog) AS "database", 
+				TRIM(c.table_schema) AS "schema", 
+				TRIM(c.table_name) AS "table", 
+				TRIM(c.column_name) AS "column", 
+				c.data_type {columns_from}
+			ORDER BY "schema", "table", c.ordinal_position;
+		"""
+		return {'tables': tables_query, 'column_counts': column_counts_query, 'columns': columns_query}
+
+	def _run_catalog_queries(self, queries, echo=0):
+		"""
+		runs catalog queries concurrently on pooled connections
+		:type queries: dict[str,str]
+		:type echo: int
+		:rtype: dict[str,DataFrame]
+		"""
+		from concurrent.futures import ThreadPoolExecutor
+		with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+			futures = {
+				name: executor.submit(self.get_dataframe, query=query, echo=echo) for name, query in queries.items()
+			}
+			return {name: future.result() for name, future in futures.items()}
+
+	@staticmethod
+	def _add_table_info(table_data, table_info):
+		"""
+		adds table_id, num_rows and mbytes from svv_table_info to the tables found in svv_columns,
+		svv_table_info leaves out empty tables so they get zero rows and megabytes and a table_id of -1
+		:type table_data: DataFrame
+		:type table_info: DataFrame
+		:rtype: DataFrame
+		"""
+		table_data = table_data[~table_data['table'].str.startswith('#')]
+		table_data = table_data.merge(right=table_info, on=['schema', 'table'], how='left')
+		table_data['table_id'] = table_data['table_id'].fillna(-1).astype(int)
+		for column in ['num_rows', 'mbytes', 'num_columns']:
+			table_data[column] = table_data[column].fillna(0).astype(int)
+		table_data = table_data.sort_values(by=['schema', 'table'], kind='mergesort').reset_index(drop=True)
+		return table_data[['table_id', 'database', 'schema', 'table', 'num_rows', 'num_columns', 'mbytes']]
+
+	def get_catalog_data(self, schema=None, echo=0):
+		"""
+		loads table_data and column_data with two concurrent queries on pooled connections
+		:type schema: str or NoneType
+		:type echo: int
+		:rtype: tuple[DataFrame, DataFrame]
+		"""
+		queries = self.get_catalog_queries(schema=schema)
+		results = self._run_catalog_queries(
+			queries={name: queries[name] for name in ['tables', 'columns']}, echo=echo
+		)
+		column_data = results['columns']
+		column_data = column_data[~column_data['table'].str.startswith('#')].reset_index(drop=True)
+		table_data = column_data.groupby(by=['database', 'schema', 'table'], as_index=False).agg(
+			num_columns=('column', 'count')
+		)
+		return self._add_table_info(table_data=table_data, table_info=results['tables']), column_data
+
+	def get_catalog_table_data(self, schema=None, echo=0):
+		"""
+		loads only table_data, with the number of columns of each table counted by Redshift,
+		this is the cheap part of the catalog that tells which tables changed
+		:type schema: str or NoneType
+		:type echo: int
+		:rtype: DataFrame
+		"""
+		queries = self.get_catalog_queries(schema=schema)
+		results = self._run_catalog_queries(
+			queries={name: queries[name] for name in ['tables', 'column_counts']}, echo=echo
+		)
+		return self._add_table_info(table_data=results['column_counts'], table_info=results['tables'])
+
+	def get_catalog_column_data(self, tables, echo=0):
+		"""
+		loads the column_data of some tables only
+		:param list[tuple] tables: (schema, table) pairs
+		:type echo: int
+		:rtype: DataFrame
+		"""
+		query = self.get_catalog_queries(tables=tables)['columns']
+		return self.get_dataframe(query=query, echo=echo)
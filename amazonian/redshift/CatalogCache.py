@@ -0,0 +1,156 @@
+import os
+import re
+import tempfile
+import time
+from pickle import dump as pickle_dump
+from pickle import load as pickle_load
+from threading import Lock
+
+
+class CatalogCache:
+	TABLE_DATA_FILE = 'table_data.feather'
+	COLUMN_DATA_FILE = 'column_data.feather'
+	METADATA_FILE = 'metadata.pkl'
+	# one lock per directory, shared by the caches of the same database
+	_LOCKS = {}
+	_LOCKS_LOCK = Lock()
+
+	def __init__(self, cache_dir, server, database, port='5439', max_age=3600):
+		"""
+		keeps table_data and column_data of one database in uncompressed feather files, which are read without
+		decompressing, and the metadata of its schemas, tables and columns in a pickle next to them,
+		a save and a load in the same process never overlap
+		:param str cache_dir: a directory shared by the databases, each one gets a subdirectory
+		:type server: str
+		:type database: str
+		:type port: str
+		:param int or float or NoneType max_age: seconds after which the catalog is stale, None for never
+		"""
+		self._cache_dir = cache_dir
+		self._directory = os.path.join(os.path.expanduser(cache_dir), re.sub(r'[^\w.-]', '_', f'{server}_{port}_{database}'))
+		self._max_age = max_age
+
+	@property
+	def cache_dir(self):
+		return self._cache_dir
+
+	@property
+	def directory(self):
+		return self._directory
+
+	@property
+	def max_age(self):
+		return self._max_age
+
+	def _get_path(self, name):
+		return os.path.join(self._directory, name)
+
+	@property
+	def _lock(self):
+		"""
+		:rtype: Lock
+		"""
+		with self._LOCKS_LOCK:
+			return self._LOCKS.setdefault(self._directory, Lock())
+
+	@property
+	def saved_at(self):
+		"""
+		:return: the time of the last save, None if there is none
+		:rtype: float or NoneType
+		"""
+		path = self._get_path(self.TABLE_DATA_FILE)
+		if not os.path.exists(path):
+			return None
+		return os.path.getmtime(path)
+
+	@property
+	def age(self):
+		"""
+		:rtype: float or NoneType
+		"""
+		saved_at = self.saved_at
+		if saved_at is None:
+			return None
+		return time.time() - saved_at
+
+	@property
+	def is_stale(self):
+		"""
+		:rtype: bool
+		"""
+		age = self.age
+		if age is None:
+			return True
+		return self._max_age is not None and age > self._max_age
+
+	def load(self):
+		"""
+		:return: table_data, column_data and the metadata records, None if nothing was saved
+		:rtype: tuple[DataFrame, DataFrame, list[dict]] or NoneType
+		"""
+		with self._lock:
+			if self.saved_at is None:
+				return None
+			from pyarrow import feather
+			table_data = feather.read_feather(self._get_path(self.TABLE_DATA_FILE))
+			column_data = feather.read_feather(self._get_path(self.COLUMN_DATA_FILE))
+			metadata_records = []
+			if os.path.exists(self._get_path(self.METADATA_FILE)):
+				with open(self._get_path(self.METADATA_FILE), 'rb') as file:
+					metadata_records = pickle_load(file)
+			return table_data, column_data, metadata_records
+
+	def _replace(self, name, write):
+		"""
+		writes a file next to its final path and then moves it, so a reader never sees half of it,
+		every write gets its own temporary file so concurrent writers never share one
+		:type name: str
+		:param callable write: called with the temporary path
+		"""
+		path = self._get_path(name)
+		handle, temporary_path = tempfile.mkstemp(dir=self._directory, prefix=f'{name}.', suffix='.tmp')
+		os.close(handle)
+		try:
+			write(temporary_path)
+			os.replace(temporary_path, path)
+		finally:
+			if os.path.exists(temporary_path):
+				os.remove(temporary_path)
+
+	def save(self, table_data, column_data, metadata_records):
+		"""
+		:type table_data: DataFrame
+		:type column_data: DataFrame
+		:param list[dict] metadata_records: dictionaries of schema, table, column and metadata
+		"""
+		from pyarrow import feather, Table as ArrowTable
+		os.makedirs(self._directory, exist_ok=True)
+
+		def _write_metadata(path):
+			with open(path, 'wb') as file:
+				pickle_dump(obj=metadata_records, file=file)
+
+		# the three files of one save are never mixed with the files of another
+		with self._lock:
+			self._replace(name=self.METADATA_FILE, write=_write_metadata)
+			self._replace(
+				name=self.COLUMN_DATA_FILE, write=lambda path: feather.write_feather(
+					ArrowTable.from_pandas(column_data, preserve_index=False), path, compression='uncompressed'
+				)
+			)
+			# table_data is written last because its time is the time of the save
+			self._replace(
+				name=self.TABLE_DATA_FILE, write=lambda path: feather.write_feather(
+					ArrowTable.from_pandas(table_data, preserve_index=False), path, compression='uncompressed'
+				)
+			)
+
+	def clear(self):
+		with self._lock:
+			for name in [self.TABLE_DATA_FILE, self.COLUMN_DATA_FILE, self.METADATA_FILE]:
+				if os.path.exists(self._get_path(name)):
+					os.remove(self._get_path(name))
+
+	def __repr__(self):
+		return f'CatalogCache(directory={self._directory!r}, max_age={self._max_age}, age={self.age})'
@@ -1,4 +1,8 @@
+import warnings
+from threading import RLock
 from .BasicRedshift import BasicRedshift
+from .CatalogCache import CatalogCache
+from .TableDataCache import TableDataCache
 from .Schema import Schema
 from .Table import Table
 from .Column import Column
@@ -6,21 +10,50 @@ from .Snapshot import Snapshot
 
 
 class Redshift(BasicRedshift):
-	def __init__(self, user_id, password, server, database, port='5439', echo=0):
-		super().__init__(user_id=user_id, password=password, port=port, server=server, database=database)
+	# the fields of table_data that change when a table is recreated, loaded, deleted from or altered
+	FINGERPRINT_COLUMNS = ['table_id', 'num_rows', 'mbytes', 'num_columns']
+
+	def __init__(
+			self, user_id, password, server, database, port='5439', echo=0,
+			pool_size=5, max_overflow=10, pool_recycle=3600, pool_pre_ping=True, retry_policy=None,
+			cache_dir=None, max_age=3600, max_data_bytes=2 ** 30
+	):
+		"""
+		:param str or NoneType cache_dir: if given, the catalog is saved in this directory, as feather files that
+		need pyarrow, and loaded from it when the next Redshift object of the same database starts
+		:param int or float or NoneType max_age: seconds after which a saved catalog is refreshed in the background,
+		None for never
+		:param int or NoneType max_data_bytes: memory ceiling of the data read from all the tables, above which
+		the least recently used data is evicted, None for no ceiling, data larger than the ceiling is not cached
+		"""
+		super().__init__(
+			user_id=user_id, password=password, port=port, server=server, database=database,
+			pool_size=pool_size, max_overflow=max_overflow, pool_recycle=pool_recycle, pool_pre_ping=pool_pre_ping,
+			retry_policy=retry_policy
+		)
 		self._schema_dict = None
 		self._hierarchy = None
 		self._table_data = None
 		self._column_data = None
+		self._index = None
+		# guards table_data, column_data, the index and the hierarchy, which a background refresh replaces together
+		self._catalog_lock = RLock()
 		self._echo = echo
+		self._data_cache = TableDataCache(max_bytes=max_data_bytes)
+		self._refresh_thread = None
+		self._catalog_cache = None
+		if cache_dir is not None:
+			self._catalog_cache = CatalogCache(
+				cache_dir=cache_dir, server=server, database=database, port=port, max_age=max_age
+			)
+			self._load_catalog()
 
 	def reset(self):
 		if self._schema_dict is not None:
 			for schema in self.schemas:
 				schema.reset()
-		self._hierarchy = None
-		self._table_data = None
-		self._column_data = None
+		with self._catalog_lock:
+			self._table_data, self._column_data, self._index, self._hierarchy = None, None, None, None
 
 	def __getstate__(self):
 		state = super().__getstate__()
@@ -30,6 +63,9 @@ class Redshift(BasicRedshift):
 			'table_data': self._table_data,
 			'column_data': self._column_data,
 			'echo': self._echo,
+			'cache_dir': None if self._catalog_cache is None else self._catalog_cache.cache_dir,
+			'max_age': None if self._catalog_cache is None else self._catalog_cache.max_age,
+			'max_data_bytes': self._data_cache.max_bytes
 		})
 		return state
 
@@ -39,7 +75,17 @@ class Redshift(BasicRedshift):
 		self._hierarchy = state['hierarchy']
 		self._table_data = state['table_data']
 		self._column_data = state['column_data']
+		self._index = None
+		self._catalog_lock = RLock()
 		self._echo = state['echo']
+		self._data_cache = TableDataCache(max_bytes=state.get('max_data_bytes', 2 ** 30))
+		self._refresh_thread = None
+		self._catalog_cache = None
+		if state.get('cache_dir') is not None:
+			self._catalog_cache = CatalogCache(
+				cache_dir=state['cache_dir'], server=self._server, database=self._database, port=self._port,
+				max_age=state['max_age']
+			)
 		self.add_database_to_schemas()
 
 	@property
@@ -50,45 +96,249 @@ class Redshift(BasicRedshift):
 	def echo(self, echo):
 		self._echo = echo
 
+	def _update_catalog(self):
+		table_data, column_data = self.get_catalog_data(echo=self.echo)
+		self._replace_catalog(table_data=table_data, column_data=column_data)
+		self._save_catalog()
+
+	@property
+	def data_cache(self):
+		"""
+		:rtype: TableDataCache
+		"""
+		return self._data_cache
+
+	@property
+	def catalog_cache(self):
+		"""
+		:rtype: CatalogCache or NoneType
+		"""
+		return self._catalog_cache
+
+	def _get_metadata_records(self):
+		"""
+		:return: the metadata of every schema, table and column that has any
+		:rtype: list[dict]
+		"""
+		records = []
+		if self._schema_dict is None:
+			return records
+		for schema in self.schemas:
+			if schema._metadata is not None:
+				records.append({'schema': schema.name, 'table': None, 'column': None, 'metadata': schema._metadata})
+			if schema._table_dict is None:
+				continue
+			for table in schema.tables:
+				if table._metadata is not None:
+					records.append({
+						'schema': schema.name, 'table': table.name, 'column': None, 'metadata': table._metadata
+					})
+				if table._columns is None:
+					continue
+				for column in table.columns:
+					if column._metadata is not None:
+						records.append({
+							'schema': schema.name, 'table': table.name, 'column': column.name,
+							'metadata': column._metadata
+						})
+		return records
+
+	def _apply_metadata_records(self, records):
+		"""
+		:type records: list[dict]
+		"""
+		for record in records:
+			try:
+				self.add_metadata(
+					metadata=record['metadata'], schema=record['schema'], table=record['table'], column=record['column']
+				)
+			except KeyError:
+				# the schema, table or column is not in the catalog anymore
+				pass
+
+	def _load_catalog(self):
+		"""
+		starts from the saved catalog, if there is one, and refreshes it in the background when it is stale
+		"""
+		try:
+			loaded = self._catalog_cache.load()
+		except Exception as error:
+			warnings.warn(f'could not load the saved catalog of {self}: {error}')
+			return
+		if loaded is None:
+			return
+		table_data, column_data, metadata_records = loaded
+		self._replace_catalog(table_data=table_data, column_data=column_data)
+		self._apply_metadata_records(records=metadata_records)
+		if self._catalog_cache.is_stale:
+			self.refresh_in_background()
+
+	def save_catalog(self):
+		"""
+		saves table_data, column_data and the metadata of the schemas, tables and columns to the catalog cache
+		"""
+		if self._catalog_cache is None:
+			raise RuntimeError(f'{self} has no cache_dir!')
+		table_data, column_data, _ = self._get_catalog()
+		self._catalog_cache.save(
+			table_data=table_data, column_data=column_data, metadata_records=self._get_metadata_records()
+		)
+
+	def _save_catalog(self):
+		if self._catalog_cache is None:
+			return
+		try:
+			self.save_catalog()
+		except Exception as error:
+			warnings.warn(f'could not save the catalog of {self}: {error}')
+
+	def refresh_in_background(self):
+		"""
+		runs an incremental refresh in a daemon thread, the current catalog stays usable until it is replaced
+		:rtype: threading.Thread
+		"""
+		from threading import Thread
+		if self._refresh_thread is not None and self._refresh_thread.is_alive():
+			return self._refresh_thread
+
+		def _refresh():
+			try:
+				self.refresh(incremental=True)
+			except Exception as error:
+				warnings.warn(f'could not refresh the catalog of {self} in the background: {error}')
+
+		self._refresh_thread = Thread(target=_refresh, daemon=True)
+		self._refresh_thread.start()
+		return self._refresh_thread
+
+	def wait_for_refresh(self, timeout=None):
+		"""
+		:param float or NoneType timeout: seconds to wait for the background refresh, None for as long as it takes
+		"""
+		if self._refresh_thread is not None:
+			self._refresh_thread.join(timeout=timeout)
+
+	def _get_catalog(self):
+		"""
+		table_data, column_data and the index that was built from them, read together so that a refresh
+		in another thread cannot pair the positions of one catalog with the rows of another
+		:rtype: tuple[DataFrame, DataFrame, dict[str,dict]]
+		"""
+		with self._catalog_lock:
+			if self._table_data is None or self._column_data is None:
+				self._update_catalog()
+			elif self._index is None:
+				# unpickled, the index is not part of the state
+				self._replace_catalog(table_data=self._table_data, column_data=self._column_data)
+			return self._table_data, self._column_data, self._index
+
 	def _update_tables_data(self):
-		self._table_data = self.get_tables_data(echo=self.echo)
+		self._update_catalog()
 
 	@property
 	def table_data(self):
 		"""
 		:rtype: DataFrame
 		"""
-		if self._table_data is None:
-			self._update_tables_data()
-		return self._table_data
+		return self._get_catalog()[0]
 
 	shape = table_data
 
 	def _update_columns_data(self):
-		self._column_data = self.get_columns_data(echo=self.echo)
+		self._update_catalog()
 
 	@property
 	def column_data(self):
 		"""
 		:rtype: DataFrame
 		"""
-		if self._column_data is None:
-			self._update_columns_data()
-		return self._column_data
+		return self._get_catalog()[1]
+
+	@staticmethod
+	def _get_index(table_data, column_data):
+		"""
+		groups table_data and column_data once so that every schema, table and column finds its rows
+		with a dictionary lookup instead of a scan of the whole catalog
+		:type table_data: DataFrame
+		:type column_data: DataFrame
+		:rtype: dict[str,dict]
+		"""
+		table_records = {}
+		for record in table_data.to_dict('records'):
+			table_records.setdefault((record['schema'], record['table']), record)
+		return {
+			'table_records': table_records,
+			'table_positions': table_data.groupby(by=['schema', 'table'], sort=False).indices,
+			'schema_positions': table_data.groupby(by='schema').indices,
+			'column_positions': column_data.groupby(by=['schema', 'table'], sort=False).indices
+		}
 
-	def _update_hierarchy(self):
-		self._hierarchy = {
-			schema: list(data['table'].unique()) for schema, data in self.table_data.groupby(by='schema')
+	@staticmethod
+	def _get_hierarchy(table_data, index):
+		"""
+		:type table_data: DataFrame
+		:type index: dict[str,dict]
+		:rtype: dict[str,list[str]]
+		"""
+		table_names = table_data['table'].values
+		return {
+			schema: list(dict.fromkeys(table_names[positions]))
+			for schema, positions in sorted(index['schema_positions'].items())
 		}
 
+	@property
+	def catalog_index(self):
+		"""
+		:rtype: dict[str,dict]
+		"""
+		return self._get_catalog()[2]
+
+	def get_table_record(self, schema, table):
+		"""
+		:type schema: str
+		:type table: str
+		:return: the row of the table in table_data, None if there is no such table
+		:rtype: dict or NoneType
+		"""
+		record = self.catalog_index['table_records'].get((schema, table))
+		if record is None:
+			return None
+		return record.copy()
+
+	def get_table_shape(self, schema, table):
+		"""
+		:type schema: str
+		:type table: str
+		:rtype: DataFrame
+		"""
+		table_data, _, index = self._get_catalog()
+		return table_data.iloc[index['table_positions'].get((schema, table), [])]
+
+	def get_schema_shape(self, schema):
+		"""
+		:type schema: str
+		:rtype: DataFrame
+		"""
+		table_data, _, index = self._get_catalog()
+		return table_data.iloc[index['schema_positions'].get(schema, [])]
+
+	def get_column_info(self, schema, table):
+		"""
+		:type schema: str
+		:type table: str
+		:rtype: DataFrame
+		"""
+		_, column_data, index = self._get_catalog()
+		return column_data.iloc[index['column_positions'].get((schema, table), [])].reset_index(drop=True)
+
 	@property
 	def hierarchy(self):
 		"""
 		:rtype: dict[str,list[str]]
 		"""
-		if self._hierarchy is None:
-			self._update_hierarchy()
-		return self._hierarchy
+		with self._catalog_lock:
+			self._get_catalog()
+			return self._hierarchy
 
 	def _update_schemas(self):
 		self._schema_dict = {schema: Schema(name=schema, database=self) for schema in self.get_schema_list()}
@@ -130,7 +380,7 @@ class Redshift(BasicRedshift):
 				schema.add_schema_to_tables()
 
 	def get_schema_list(self):
-		return list(self.table_data['schema'].unique())
+		return list(self.hierarchy)
 
 	def get_table(self, schema, table):
 		return self.schema[schema].table[table]
@@ -141,12 +391,174 @@ class Redshift(BasicRedshift):
 	def __getattr__(self, item):
 		return self[item]
 
-	def refresh(self):
-		self.reset()
-		self._update_tables_data()
-		self._update_columns_data()
-		self._update_hierarchy()
-		self._update_schemas()
+	def refresh(self, schema=None, incremental=False):
+		"""
+		reloads the catalog and rebuilds the schemas, tables and columns
+		:param str or NoneType schema: if given, only this schema is reloaded and the others keep their caches
+		:param bool incremental: if True, only the tables whose fingerprint changed lose their caches
+		:return: the new, changed and missing tables as (schema, table) tuples if incremental
+		:rtype: dict[str,list[tuple]] or NoneType
+		"""
+		has_catalog = self._table_data is not None and self._column_data is not None
+		if not has_catalog or (schema is None and not incremental):
+			metadata_records = self._get_metadata_records()
+			table_data, column_data = self.get_catalog_data(echo=self.echo)
+			if self._schema_dict is not None:
+				for schema_object in self.schemas:
+					schema_object.reset()
+			self._replace_catalog(table_data=table_data, column_data=column_data)
+			self._update_schemas()
+			self._apply_metadata_records(records=metadata_records)
+			self._save_catalog()
+			return None
+
+		if incremental:
+			changes = self._refresh_changed_tables(schema=schema)
+			self._update_changed_objects(changes=changes)
+			self._save_catalog()
+			return changes
+
+		table_data, column_data = self.get_catalog_data(schema=schema, echo=self.echo)
+		self._replace_catalog(table_data=table_data, column_data=column_data, schema=schema)
+		if self._schema_dict is not None:
+			# a new dictionary replaces the old one so that code iterating over the old one is not disturbed
+			schema_dict = self._schema_dict.copy()
+			if schema not in self.hierarchy:
+				schema_dict.pop(schema, None)
+			elif schema in schema_dict:
+				# the schema object keeps its metadata, its tables are created again from the new catalog
+				schema_dict[schema].reset()
+				schema_dict[schema]._table_dict = None
+			else:
+				schema_dict[schema] = Schema(name=schema, database=self)
+			self._schema_dict = dict(sorted(schema_dict.items()))
+		self._save_catalog()
+		return None
+
+	def _replace_catalog(self, table_data, column_data, schema=None):
+		"""
+		replaces table_data and column_data, or only the rows of one schema, and rebuilds the index,
+		everything is built first and then published at once so that readers see either the old catalog or the new
+		:type table_data: DataFrame
+		:type column_data: DataFrame
+		:type schema: str or NoneType
+		"""
+		if schema is not None:
+			from pandas import concat
+			with self._catalog_lock:
+				old_table_data, old_column_data = self._table_data, self._column_data
+			# a stable sort keeps the columns of each table in their ordinal order
+			table_data = concat(
+				[old_table_data[old_table_data['schema'] != schema], table_data]
+			).sort_values(by=['schema', 'table'], kind='mergesort').reset_index(drop=True)
+			column_data = concat(
+				[old_column_data[old_column_data['schema'] != schema], column_data]
+			).sort_values(by=['schema', 'table'], kind='mergesort').reset_index(drop=True)
+		index = self._get_index(table_data=table_data, column_data=column_data)
+		hierarchy = self._get_hierarchy(table_data=table_data, index=index)
+		with self._catalog_lock:
+			self._table_data, self._column_data, self._index, self._hierarchy = table_data, column_data, index, hierarchy
+
+	def _refresh_changed_tables(self, schema=None):
+		"""
+		reads table_data again, which is cheap, and the columns of only the tables whose fingerprint changed,
+		then splices them into column_data
+		:type schema: str or NoneType
+		:return: the new, changed and missing tables as (schema, table) tuples
+		:rtype: dict[str,list[tuple]]
+		"""
+		from pandas import concat, MultiIndex
+		table_data = self.get_catalog_table_data(schema=schema, echo=self.echo)
+		old_table_data, column_data, _ = self._get_catalog()
+		all_table_data = old_table_data
+		if schema is not None:
+			old_table_data = old_table_data[old_table_data['schema'] == schema]
+		changes = self._get_catalog_changes(old_table_data=old_table_data, new_table_data=table_data)
+
+		read_tables = changes['new_tables'] + changes['changed_tables']
+		dropped_tables = changes['changed_tables'] + changes['missing_tables']
+		if len(dropped_tables) > 0:
+			keys = MultiIndex.from_frame(column_data[['schema', 'table']])
+			column_data = column_data[~keys.isin(dropped_tables)]
+		if len(read_tables) > 0:
+			column_data = concat([column_data, self.get_catalog_column_data(tables=read_tables, echo=self.echo)])
+		# a stable sort keeps the columns of each table in their ordinal order
+		column_data = column_data.sort_values(by=['schema', 'table'], kind='mergesort').reset_index(drop=True)
+
+		if schema is not None:
+			table_data = concat([all_table_data[all_table_data['schema'] != schema], table_data])
+			table_data = table_data.sort_values(by=['schema', 'table'], kind='mergesort').reset_index(drop=True)
+		self._replace_catalog(table_data=table_data, column_data=column_data)
+		return changes
+
+	@classmethod
+	def _get_fingerprints(cls, table_data):
+		"""
+		:type table_data: DataFrame
+		:rtype: DataFrame
+		"""
+		return table_data[['schema', 'table'] + cls.FINGERPRINT_COLUMNS].drop_duplicates(subset=['schema', 'table'])
+
+	def _get_catalog_changes(self, old_table_data, new_table_data):
+		"""
+		compares the fingerprints of the tables in two versions of table_data, a column renamed without
+		changing the number of columns is only seen by a full refresh
+		:rtype: dict[str,list[tuple]]
+		"""
+		comparison = self._get_fingerprints(table_data=old_table_data).merge(
+			right=self._get_fingerprints(table_data=new_table_data),
+			on=['schema', 'table'], how='outer', indicator='indicator', suffixes=('_old', '_new')
+		)
+		is_changed = comparison['indicator'] == 'both'
+		is_different = False
+		for column in self.FINGERPRINT_COLUMNS:
+			is_different = is_different | (comparison[f'{column}_old'] != comparison[f'{column}_new'])
+		is_changed = is_changed & is_different
+
+		def _get_tables(mask):
+			return list(zip(comparison.loc[mask, 'schema'], comparison.loc[mask, 'table']))
+
+		return {
+			'new_tables': _get_tables(comparison['indicator'] == 'right_only'),
+			'changed_tables': _get_tables(is_changed),
+			'missing_tables': _get_tables(comparison['indicator'] == 'left_only')
+		}
+
+	def _update_changed_objects(self, changes):
+		"""
+		resets the tables that changed, adds the new ones and removes the missing ones,
+		every other schema, table and column keeps its caches and metadata
+		:type changes: dict[str,list[tuple]]
+		"""
+		if self._schema_dict is None:
+			return
+		hierarchy = self.hierarchy
+		# the dictionaries are copied, changed and then replaced, never changed in place,
+		# so that code iterating over the schemas or tables while this runs in the background is not disturbed
+		schema_dict = {name: schema for name, schema in self._schema_dict.items() if name in hierarchy}
+		for schema in hierarchy:
+			if schema not in schema_dict:
+				schema_dict[schema] = Schema(name=schema, database=self)
+
+		for schema, table in changes['changed_tables']:
+			table_dict = schema_dict[schema]._table_dict
+			if table_dict is not None and table in table_dict:
+				table_dict[table].refresh()
+		for schema, table in changes['missing_tables']:
+			self._data_cache.invalidate(schema=schema, table=table)
+		changed_schemas = {schema for schema, _ in changes['missing_tables'] + changes['new_tables']}
+		for schema in changed_schemas:
+			schema_object = schema_dict.get(schema)
+			if schema_object is None or schema_object._table_dict is None:
+				continue
+			table_dict = {
+				name: table for name, table in schema_object._table_dict.items() if name in hierarchy[schema]
+			}
+			for table in hierarchy[schema]:
+				if table not in table_dict:
+					table_dict[table] = Table(name=table, schema=schema_object)
+			schema_object._table_dict = dict(sorted(table_dict.items()))
+		self._schema_dict = dict(sorted(schema_dict.items()))
 
 	def take_snapshot(self):
 		return Snapshot(database=self)
@@ -17,7 +17,7 @@ class Schema:
 			self._echo = max(0, self.database.echo-1)
 		else:
 			self._echo = echo
-		if name not in database.get_schema_list():
+		if name not in database.hierarchy:
 			raise KeyError('schema "{name}" not in database!')
 
 	def reset(self):
@@ -145,7 +145,7 @@ class Schema:
 
 	@property
 	def shape(self):
-		return self.database.shape[self.database.shape['schema'] == self.name]
+		return self.database.get_schema_shape(schema=self.name)
 
 	def __str__(self):
 		return f'{str(self.database)}.{self.name}'
@@ -1,5 +1,4 @@
 from datetime import datetime
-import numpy as np
 
 
 class Snapshot:
@@ -60,6 +59,7 @@ class SnapshotDifference:
 		:type new_snapshot: Snapshot
 		"""
 
+		import numpy as np
 		column_comparison_cols = ['schema', 'table', 'column']
 		columns1 = old_snapshot.column_data[column_comparison_cols]
 		columns2 = new_snapshot.column_data[column_comparison_cols]
@@ -12,12 +12,11 @@ class Table:
 		"""
 		self._name = name
 		self._schema = schema
-		self._data = None
 		self._columns_info = None
 		self._columns = None
 		self._dictionary = None
 		self._metadata = None
-		if name not in schema.table_names:
+		if schema.database.get_table_record(schema=schema.name, table=name) is None:
 			raise KeyError(f'"{name}" not in "{schema}"')
 		if echo is None:
 			self._echo = max(0, self.schema.echo-1)
@@ -42,17 +41,28 @@ class Table:
 		self._dictionary = state['dictionary']
 		self._metadata = state['metadata']
 		self._echo = state['echo']
-		self._data = None
 		self.add_table_to_columns()
 
 	def reset(self):
-		self._data = None
+		if self._schema is not None and self._schema.database is not None:
+			self._schema.database.data_cache.invalidate(schema=self._schema.name, table=self._name)
 		self._columns_info = None
 		if self._columns is not None:
 			for column in self.columns:
 				column.reset()
 		self._dictionary = None
 
+	def refresh(self):
+		"""
+		clears the caches after the table changed, the columns that are still there keep their Column objects
+		"""
+		self.reset()
+		if self._columns is not None:
+			self._columns = {
+				name: self._columns[name] if name in self._columns else Column(name=name, table=self)
+				for name in self.column_names
+			}
+
 	def __eq__(self, other):
 		"""
 		:type other: Table
@@ -138,22 +148,248 @@ class Table:
 
 	@property
 	def data(self):
-		if self._data is None:
-			query = 'SELECT * FROM ' + self.schema.name + '.' + self.name
-			self._data = self.schema.database.get_dataframe(query=query, echo=self.echo)
-		return self._data
+		return self.get_data()
+
+	def get_query(self, columns=None, where=None, limit=None, sample=None, sample_column=None, seed=0):
+		"""
+		:param list[str] or NoneType columns: the columns to read, all of them if None
+		:param str or NoneType where: a condition such as "year >= 2020"
+		:param int or NoneType limit: the most rows to read
+		:param float or NoneType sample: fraction of the rows to read, chosen by the hash of sample_column so
+		the same rows come back every time, rows whose sample_column is missing are never chosen
+		:param str or NoneType sample_column: the first column if None, a key column gives an even sample
+		:param int seed: a different seed chooses a different sample
+		:rtype: str
+		"""
+		columns_str = '*' if columns is None else ', '.join([f'"{column}"' for column in columns])
+		conditions = []
+		if where is not None:
+			conditions.append(f'({where})')
+		if sample is not None:
+			if not 0 < sample <= 1:
+				raise ValueError(f'sample should be a fraction between 0 and 1 but it is {sample}!')
+			sample_column = sample_column or self.column_names[0]
+			conditions.append(
+				f'ABS(MOD(FNV_HASH("{sample_column}", {int(seed)}), 1000000)) < {int(round(sample * 1000000))}'
+			)
+		query = f'SELECT {columns_str} FROM {self.schema.name}.{self.name}'
+		if len(conditions) > 0:
+			query += ' WHERE ' + ' AND '.join(conditions)
+		if limit is not None:
+			# UNLOAD only accepts a limit in a nested query
+			query = f'SELECT * FROM ({query} LIMIT {int(limit)}) limited'
+		return query
+
+	def get_data(
+			self, method='query', s3=None, s3_path=None, columns=None, where=None, limit=None, sample=None,
+			sample_column=None, seed=0, **kwargs
+	):
+		"""
+		reads the table, or the part of it that is asked for, and caches it in the data cache of the database,
+		which is shared by all the tables and evicts the least recently used data when it is full
+		:param str method: 'query' to read through the leader node or 'unload' to UNLOAD to S3 and read it back
+		:param .S3.S3 or NoneType s3: required by unload
+		:param str or NoneType s3_path: required by unload, a prefix dedicated to this table
+		:param list[str] or NoneType columns: the columns to read, all of them if None
+		:param str or NoneType where: a condition such as "year >= 2020"
+		:param int or NoneType limit: the most rows to read
+		:param float or NoneType sample: fraction of the rows to read, see get_query
+		:param str or NoneType sample_column: the column whose hash chooses the sample
+		:param int seed: a different seed chooses a different sample
+		:param kwargs: passed to Redshift.unload
+		:rtype: DataFrame
+		"""
+		if method not in ('query', 'unload'):
+			raise ValueError(f'method should be "query" or "unload" but it is "{method}"!')
+		query = self.get_query(
+			columns=columns, where=where, limit=limit, sample=sample, sample_column=sample_column, seed=seed
+		)
+		database = self.schema.database
+		# the same rows are cached once whichever way they were read
+		key = (self.schema.name, self.name, query)
+		data = database.data_cache.get(key=key)
+		if data is None:
+			if method == 'query':
+				data = database.get_dataframe(query=query, echo=self.echo)
+			else:
+				if s3 is None or s3_path is None:
+					raise ValueError('the unload method needs s3 and s3_path!')
+				data = database.unload(query=query, s3_path=s3_path, s3=s3, echo=self.echo, **kwargs)
+			database.data_cache.put(key=key, data=data)
+		return data
+
+	def iter_data(
+			self, chunksize=100000, fetch_size=None, columns=None, where=None, limit=None, sample=None,
+			sample_column=None, seed=0
+	):
+		"""
+		streams the table, or the part of it that is asked for, as DataFrames of at most chunksize rows
+		without caching them
+		:type chunksize: int
+		:type fetch_size: int or NoneType
+		:param list[str] or NoneType columns: the columns to read, all of them if None
+		:param str or NoneType where: a condition such as "year >= 2020"
+		:param int or NoneType limit: the most rows to read
+		:param float or NoneType sample: fraction of the rows to read, see get_query
+		:param str or NoneType sample_column: the column whose hash chooses the sample
+		:param int seed: a different seed chooses a different sample
+		:rtype: generator
+		"""
+		query = self.get_query(
+			columns=columns, where=where, limit=limit, sample=sample, sample_column=sample_column, seed=seed
+		)
+		return self.schema.database.iter_dataframes(
+			query=query, chunksize=chunksize, fetch_size=fetch_size, echo=self.echo
+		)
 
 	def get_head(self, num_rows=5):
 		query = f'SELECT TOP {num_rows} * FROM ' + self.schema.name + '.' + self.name
 		return self.schema.database.get_dataframe(query=query, echo=self.echo)
 
+	# types that cannot be grouped, compared or counted distinctly
+	UNPROFILED_DATA_TYPES = ('super', 'geometry', 'geography', 'hllsketch', 'varbyte', 'binary varying')
+	# a summary query has up to 4 expressions per column and Redshift allows 1600 in a select list
+	SUMMARY_BATCH_SIZE = 300
+
+	def _get_data_types(self):
+		"""
+		:rtype: dict[str,str]
+		"""
+		if 'data_type' not in self.column_info:
+			return {}
+		return dict(zip(self.column_info['column'], self.column_info['data_type'].str.lower()))
+
+	def _get_profile_summary_query(self, indexed_columns, data_types, approximate):
+		"""
+		one scan that counts the values and distinct values and finds the minimum and maximum of several columns
+		:param list[tuple[int,str]] indexed_columns: positions and names of the columns
+		:type data_types: dict[str,str]
+		:type approximate: bool
+		:rtype: str
+		"""
+		count_distinct = 'APPROXIMATE COUNT(DISTINCT' if approximate else 'COUNT(DISTINCT'
+		expressions = ['COUNT(*) AS "num_rows"']
+		for i, column in indexed_columns:
+			data_type = data_types.get(column, '')
+			expressions.append(f'COUNT("{column}") AS "num_values_{i}"')
+			if data_type in self.UNPROFILED_DATA_TYPES:
+				continue
+			expressions.append(f'{count_distinct} "{column}") AS "num_distinct_{i}"')
+			if data_type != 'boolean':
+				expressions.append(f'MIN("{column}") AS "min_{i}"')
+				expressions.append(f'MAX("{column}") AS "max_{i}"')
+		return f'SELECT {", ".join(expressions)} FROM {self.schema.name}.{self.name}'
+
+	def _get_top_values_query(self, indexed_columns, top_k):
+		"""
+		one scan that counts the values of several columns with grouping sets and keeps the top_k of each
+		:param list[tuple[int,str]] indexed_columns: positions and names of the columns
+		:type top_k: int or NoneType
+		:rtype: str
+		"""
+		values = ', '.join([f'"{column}" AS "value_{i}"' for i, column in indexed_columns])
+		groupings = ', '.join([f'GROUPING("{column}") AS "grouping_{i}"' for i, column in indexed_columns])
+		grouping_sets = ', '.join([f'("{column}")' for _, column in indexed_columns])
+		partition = ', '.join([f'"grouping_{i}"' for i, _ in indexed_columns])
+		where_clause = '' if top_k is None else f'WHERE "rank" <= {int(top_k)}'
+		return f"""
+			SELECT * FROM (
+				SELECT *, ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY "count" DESC) AS "rank"
+				FROM (
+					SELECT {values}, {groupings}, COUNT(*) AS "count"
+					FROM {self.schema.name}.{self.name}
+					GROUP BY GROUPING SETS ({grouping_sets})
+				) grouped
+			) ranked
+			{where_clause}
+		"""
+
+	def profile(self, columns=None, top_k=10, approximate=True, batch_size=10, workers=4):
+		"""
+		profiles many columns with one scan per SUMMARY_BATCH_SIZE columns for counts, distinct counts, minimums and
+		maximums and one grouping sets scan per batch_size columns for the most frequent values, all the queries run
+		at the same time, the value counts that are complete are cached on the columns
+		:param list[str] or NoneType columns: all the columns if None
+		:param int or NoneType top_k: number of most frequent values per column, None for all of them
+		:param bool approximate: if True, uses APPROXIMATE COUNT(DISTINCT), which is much faster
+		:param int batch_size: number of columns counted by one grouping sets query
+		:param int workers: number of queries running at the same time
+		:rtype: DataFrame
+		"""
+		from concurrent.futures import ThreadPoolExecutor
+		from pandas import DataFrame, concat
+		columns = self.column_names if columns is None else list(columns)
+		missing_columns = [column for column in columns if column not in self.column_names]
+		if len(missing_columns) > 0:
+			raise KeyError(f'{missing_columns} not in "{self}"')
+		data_types = self._get_data_types()
+		database = self.schema.database
+
+		indexed_columns = [
+			(i, column) for i, column in enumerate(columns)
+			if data_types.get(column, '') not in self.UNPROFILED_DATA_TYPES
+		]
+		batches = [indexed_columns[start:start + batch_size] for start in range(0, len(indexed_columns), batch_size)]
+		all_columns = list(enumerate(columns))
+		summary_batches = [
+			all_columns[start:start + self.SUMMARY_BATCH_SIZE]
+			for start in range(0, max(len(columns), 1), self.SUMMARY_BATCH_SIZE)
+		]
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			summary_futures = [
+				executor.submit(
+					database.get_dataframe, echo=self.echo, query=self._get_profile_summary_query(
+						indexed_columns=summary_batch, data_types=data_types, approximate=approximate
+					)
+				)
+				for summary_batch in summary_batches
+			]
+			batch_futures = [
+				executor.submit(
+					database.get_dataframe, echo=self.echo,
+					query=self._get_top_values_query(indexed_columns=batch, top_k=top_k)
+				)
+				for batch in batches
+			]
+			summaries = [future.result().iloc[0] for future in summary_futures]
+			# every summary has its own num_rows, the first one is kept
+			summary = concat([summaries[0]] + [each.drop('num_rows') for each in summaries[1:]])
+			batch_results = [future.result() for future in batch_futures]
+
+		value_counts = {}
+		for batch, result in zip(batches, batch_results):
+			for i, column in batch:
+				rows = result[result[f'grouping_{i}'] == 0].sort_values(by='count', ascending=False)
+				value_counts[column] = DataFrame({
+					'schema': self.schema.name, 'table': self.name, 'column': column,
+					'value': rows[f'value_{i}'].values, 'count': rows['count'].values
+				})
+				# fewer than top_k values means none were left out
+				if top_k is None or len(rows) < top_k:
+					self.column[column]._value_counts = value_counts[column]
+
+		num_rows = int(summary['num_rows'])
+		records = []
+		for i, column in enumerate(columns):
+			num_nulls = num_rows - int(summary[f'num_values_{i}'])
+			records.append({
+				'column': column,
+				'data_type': data_types.get(column),
+				'num_rows': num_rows,
+				'num_nulls': num_nulls,
+				'null_ratio': num_nulls / num_rows if num_rows > 0 else None,
+				'num_distinct': summary.get(f'num_distinct_{i}'),
+				'min': summary.get(f'min_{i}'),
+				'max': summary.get(f'max_{i}'),
+				'top_values': list(value_counts[column]['value']) if column in value_counts else None,
+				'top_counts': list(value_counts[column]['count']) if column in value_counts else None
+			})
+		return DataFrame.from_records(records)
+
 	@property
 	def column_info(self):
 		if self._columns_info is None:
-			columns_data = self.schema.database.column_data
-			self._columns_info = columns_data[
-				(columns_data['schema'] == self.schema.name) & (columns_data['table'] == self.name)
-			].copy().reset_index(drop=True)
+			self._columns_info = self.schema.database.get_column_info(schema=self.schema.name, table=self.name)
 		return self._columns_info
 
 	@property
@@ -186,8 +422,7 @@ class Table:
 
 	@property
 	def shape(self):
-		database_shape = self.schema.database.shape
-		return database_shape[(database_shape['table'] == self.name) & (database_shape['schema'] == self.schema.name)]
+		return self.schema.database.get_table_shape(schema=self.schema.name, table=self.name)
 
 	@property
 	def dictionary(self):
@@ -195,7 +430,7 @@ class Table:
 		:rtype: dict
 		"""
 		if self._dictionary is None:
-			self._dictionary = self.shape.iloc[0].to_dict()
+			self._dictionary = self.schema.database.get_table_record(schema=self.schema.name, table=self.name)
 		return self._dictionary.copy()
 
 	@property
@@ -0,0 +1,118 @@
+import warnings
+from collections import OrderedDict
+from threading import Lock
+
+
+class TableDataCache:
+	def __init__(self, max_bytes=2 ** 30):
+		"""
+		a least-recently-used cache of the DataFrames read from the tables of one database, the least recently
+		used ones are evicted when all of them together take more than max_bytes of memory, a DataFrame larger
+		than max_bytes is not cached, with a warning, and is counted in the rejections of stats
+		:param int or NoneType max_bytes: memory ceiling in bytes, None for no ceiling
+		"""
+		self._max_bytes = max_bytes
+		self._entries = OrderedDict()
+		self._num_bytes = 0
+		self._lock = Lock()
+		self._hits = 0
+		self._misses = 0
+		self._evictions = 0
+		self._rejections = 0
+
+	@staticmethod
+	def _get_num_bytes(data):
+		"""
+		:type data: DataFrame
+		:rtype: int
+		"""
+		return int(data.memory_usage(index=True, deep=True).sum())
+
+	def get(self, key):
+		"""
+		:param tuple key: schema, table and the request
+		:rtype: DataFrame or NoneType
+		"""
+		with self._lock:
+			if key in self._entries:
+				self._entries.move_to_end(key)
+				self._hits += 1
+				return self._entries[key][1]
+			self._misses += 1
+			return None
+
+	def put(self, key, data):
+		"""
+		:param tuple key: schema, table and the request
+		:type data: DataFrame
+		"""
+		num_bytes = self._get_num_bytes(data=data)
+		with self._lock:
+			if key in self._entries:
+				self._num_bytes -= self._entries.pop(key)[0]
+			is_rejected = self._max_bytes is not None and num_bytes > self._max_bytes
+			if is_rejected:
+				# larger than the whole cache, keeping it would evict everything else
+				self._rejections += 1
+			else:
+				self._entries[key] = (num_bytes, data)
+				self._num_bytes += num_bytes
+				while self._max_bytes is not None and self._num_bytes > self._max_bytes:
+					_, (evicted_num_bytes, _) = self._entries.popitem(last=False)
+					self._num_bytes -= evicted_num_bytes
+					self._evictions += 1
+		if is_rejected:
+			warnings.warn(
+				f'the data of {key[0]}.{key[1]} is not cached, its {num_bytes} bytes are more than '
+				f'max_bytes={self._max_bytes}, read fewer rows or columns or raise max_data_bytes'
+			)
+
+	def invalidate(self, schema, table=None):
+		"""
+		removes the data of a table, or of every table of a schema
+		:type schema: str
+		:type table: str or NoneType
+		"""
+		with self._lock:
+			keys = [key for key in self._entries if key[0] == schema and (table is None or key[1] == table)]
+			for key in keys:
+				self._num_bytes -= self._entries.pop(key)[0]
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self._num_bytes = 0
+
+	def __len__(self):
+		with self._lock:
+			return len(self._entries)
+
+	@property
+	def max_bytes(self):
+		return self._max_bytes
+
+	@property
+	def num_bytes(self):
+		with self._lock:
+			return self._num_bytes
+
+	@property
+	def stats(self):
+		"""
+		:rtype: dict
+		"""
+		with self._lock:
+			num_requests = self._hits + self._misses
+			return {
+				'size': len(self._entries),
+				'bytes': self._num_bytes,
+				'max_bytes': self._max_bytes,
+				'hits': self._hits,
+				'misses': self._misses,
+				'hit_ratio': self._hits / num_requests if num_requests > 0 else None,
+				'evictions': self._evictions,
+				'rejections': self._rejections
+			}
+
+	def __repr__(self):
+		return f'TableDataCache({self.stats})'
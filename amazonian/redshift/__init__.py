@@ -1,4 +1,5 @@
 from .Redshift import Redshift
+from .AsyncRedshift import AsyncRedshift
 from .Snapshot import Snapshot
 from .Schema import Schema
 from .Table import Table
@@ -1,6 +1,14 @@
 from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
 from math import log2, ceil
 
+SMALLINT_RANGE = (-2 ** 15, 2 ** 15 - 1)
+INTEGER_RANGE = (-2 ** 31, 2 ** 31 - 1)
+BIGINT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+MAX_VARCHAR_LENGTH = 65535
+MAX_DECIMAL_PRECISION = 38
+
 def get_data_types(data):
 	"""
 	returns a dictionary with column names and their respective data types
@@ -10,42 +18,208 @@ def get_data_types(data):
 	dtypes = data.dtypes
 	return OrderedDict(zip(dtypes.index, dtypes.astype(str)))
 
-def get_redshift_data_types(data):
+def _get_sample(values, sample_size):
+	"""
+	:type values: pandas.Series
+	:type sample_size: int or NoneType
+	:rtype: pandas.Series
+	"""
+	if sample_size is None or len(values) <= sample_size:
+		return values
+	return values.sample(n=sample_size, random_state=0)
+
+def _get_integer_type(values, narrow_integers=False):
+	"""
+	INTEGER, or the smallest larger type that holds the range of the values
+	:type values: pandas.Series
+	:param bool narrow_integers: if True, a column whose values fit in 16 bits is a SMALLINT, which a later load
+	of larger values into the same table cannot fit in
+	:rtype: str
+	"""
+	if len(values) == 0:
+		return 'INTEGER'
+	minimum = int(values.min())
+	maximum = int(values.max())
+	if narrow_integers and SMALLINT_RANGE[0] <= minimum and maximum <= SMALLINT_RANGE[1]:
+		return 'SMALLINT'
+	if INTEGER_RANGE[0] <= minimum and maximum <= INTEGER_RANGE[1]:
+		return 'INTEGER'
+	if BIGINT_RANGE[0] <= minimum and maximum <= BIGINT_RANGE[1]:
+		return 'BIGINT'
+	# only unsigned 64 bit integers get here
+	return 'DECIMAL(20,0)'
+
+def _get_max_byte_length(strings):
+	"""
+	:type strings: pandas.Series
+	:rtype: int
+	"""
+	if len(strings) == 0:
+		return 0
+	try:
+		import pyarrow as pa
+		import pyarrow.compute as pc
+		return pc.max(pc.binary_length(pa.array(strings, type=pa.string()))).as_py()
+	except ImportError:
+		return int(strings.str.encode('utf-8').str.len().max())
+
+def _get_varchar_type(values):
+	"""
+	:type values: pandas.Series
+	:rtype: str
+	"""
+	max_length = _get_max_byte_length(values.astype(str))
+	nearest_power_of_two = 2 ** ceil(log2(max_length + 1)) - 1
+	return f'VARCHAR({min(max(nearest_power_of_two, 1), MAX_VARCHAR_LENGTH)})'
+
+def _get_decimal_type(values):
+	"""
+	:param pandas.Series values: decimal.Decimal values
+	:rtype: str
+	"""
+	exponents = [value.as_tuple() for value in values]
+	scale = max([0] + [-exponent for _, _, exponent in exponents if isinstance(exponent, int)])
+	integer_digits = max([1] + [
+		len(digits) + exponent for _, digits, exponent in exponents if isinstance(exponent, int)
+	])
+	precision = min(integer_digits + scale, MAX_DECIMAL_PRECISION)
+	return f'DECIMAL({precision},{min(scale, precision)})'
+
+def _get_object_type(values, sample_size):
+	"""
+	infers the kind of an object column from a sample and sizes it with a pass over all of its values
+	:type values: pandas.Series
+	:type sample_size: int or NoneType
+	:rtype: str
+	"""
+	sample = _get_sample(values=values, sample_size=sample_size)
+	if len(sample) > 0:
+		if all(isinstance(value, bool) for value in sample):
+			return 'BOOLEAN'
+		if all(isinstance(value, datetime) for value in sample):
+			return 'TIMESTAMP'
+		if all(isinstance(value, date) for value in sample):
+			return 'DATE'
+		if all(isinstance(value, Decimal) for value in sample):
+			try:
+				return _get_decimal_type(values)
+			except AttributeError:
+				# the sample missed values that are not decimals
+				pass
+	return _get_varchar_type(values)
+
+def _get_datetime_type(values, data_type, infer_dates=False):
+	"""
+	:type values: pandas.Series
+	:type data_type: str
+	:param bool infer_dates: if True, a column whose values are all at midnight is a DATE instead of a TIMESTAMP
+	:rtype: str
+	"""
+	if '[' in data_type and ',' in data_type:
+		# datetime64[ns, tz]
+		return 'TIMESTAMPTZ'
+	if infer_dates and len(values) > 0 and (values.dt.normalize() == values).all():
+		return 'DATE'
+	return 'TIMESTAMP'
+
+def get_redshift_data_types(data, sample_size=None, not_null=False, infer_dates=False, narrow_integers=False):
 	"""
-	returns a dictionary with column names and their respective redshift data types
+	returns a dictionary with column names and their respective redshift data types,
+	sizes and ranges are computed with vectorized passes over whole columns
 	:param pandas.DataFrame data: a dataframe
+	:param int or NoneType sample_size: number of rows used to infer the kind of object columns, None for all
+	:param bool not_null: if True, adds NOT NULL to the columns without missing values
+	:param bool infer_dates: if True, datetime columns whose values are all at midnight are DATE instead of TIMESTAMP
+	:param bool narrow_integers: if True, integer columns whose values fit in 16 bits are SMALLINT instead of INTEGER
 	:rtype: dict[str,str]
 	"""
 	data_types = get_data_types(data)
+	has_nulls = data.isna().any()
 	redshift_data_types = OrderedDict()
 	for column, data_type in data_types.items():
-		if data_type.startswith('int'):
-			redshift_data_types[column] = 'INTEGER'
-		elif data_type.startswith('float'):
+		values = data[column].dropna()
+		lower_data_type = data_type.lower()
+		if lower_data_type.startswith('int') or lower_data_type.startswith('uint'):
+			redshift_data_types[column] = _get_integer_type(values, narrow_integers=narrow_integers)
+		elif lower_data_type.startswith('float'):
 			redshift_data_types[column] = 'REAL'
-		elif data_type.startswith('datetime'):
-			redshift_data_types[column] = 'TIMESTAMP'
-		elif data_type.startswith('bool'):
+		elif lower_data_type.startswith('datetime'):
+			redshift_data_types[column] = _get_datetime_type(values, data_type=data_type, infer_dates=infer_dates)
+		elif lower_data_type.startswith('bool'):
 			redshift_data_types[column] = 'BOOLEAN'
 		else:
-			max_length = int(max([len(bytes(str(x), 'utf-8')) for x in data[column].values]))
-			nearest_power_of_two = 2 ** ceil(log2(max_length+1))-1
-			redshift_data_types[column] = f'VARCHAR({nearest_power_of_two})'
+			redshift_data_types[column] = _get_object_type(values, sample_size=sample_size)
+
+		if not_null and not has_nulls[column]:
+			redshift_data_types[column] += ' NOT NULL'
 	return redshift_data_types
 
-def get_redshift_create_table_query(database, schema, table, data, data_types=None):
+def get_redshift_key_suggestions(data, sample_size=100000):
+	"""
+	suggests a sort key, the first date or time column or else the first increasing integer column,
+	and a distribution key, the integer or string column with the most distinct values and no missing ones
+	:param pandas.DataFrame data: a dataframe
+	:param int or NoneType sample_size: number of rows used to measure distinct values
+	:rtype: dict[str,str or NoneType]
+	"""
+	data_types = get_redshift_data_types(data=data, sample_size=sample_size)
+	sort_key = None
+	for column, data_type in data_types.items():
+		if data_type.startswith('DATE') or data_type.startswith('TIMESTAMP'):
+			sort_key = column
+			break
+	if sort_key is None:
+		for column, data_type in data_types.items():
+			if data_type in ('SMALLINT', 'INTEGER', 'BIGINT') and data[column].is_monotonic_increasing:
+				sort_key = column
+				break
+
+	dist_key = None
+	best_distinct_ratio = 0.5
+	has_nulls = data.isna().any()
+	for column, data_type in data_types.items():
+		is_candidate = data_type in ('SMALLINT', 'INTEGER', 'BIGINT') or data_type.startswith('VARCHAR')
+		if has_nulls[column] or not is_candidate:
+			continue
+		sample = _get_sample(values=data[column], sample_size=sample_size)
+		if len(sample) == 0:
+			continue
+		distinct_ratio = sample.nunique() / len(sample)
+		# an even spread of values keeps the slices balanced
+		if distinct_ratio > best_distinct_ratio:
+			dist_key = column
+			best_distinct_ratio = distinct_ratio
+
+	return {'sort_key': sort_key, 'dist_key': dist_key}
+
+def get_redshift_create_table_query(
+		database, schema, table, data, data_types=None, sort_key=None, dist_key=None, sample_size=None,
+		infer_dates=False, narrow_integers=False
+):
 	"""
 	:param str database: name of database
 	:param str schema: name of schema
 	:param str table: name of table
 	:param pandas.DataFrame data: data to be uploaded
 	:param dict[str,str] data_types: a dictionary of the redshift data types
+	:param str or NoneType sort_key: name of the sort key column
+	:param str or NoneType dist_key: name of the distribution key column
+	:param int or NoneType sample_size: number of rows used to infer the kind of object columns, None for all
+	:param bool infer_dates: if True, datetime columns whose values are all at midnight are DATE instead of TIMESTAMP
+	:param bool narrow_integers: if True, integer columns whose values fit in 16 bits are SMALLINT instead of INTEGER
 	:rtype: str
 	"""
-	data_types = data_types or get_redshift_data_types(data=data)
+	data_types = data_types or get_redshift_data_types(
+		data=data, sample_size=sample_size, infer_dates=infer_dates, narrow_integers=narrow_integers
+	)
 	data_types_str = ', \n'.join([f'"{col}" {dtype}' for col, dtype in data_types.items()])
+	keys_str = ''
+	if dist_key is not None:
+		keys_str += f' DISTKEY("{dist_key}")'
+	if sort_key is not None:
+		keys_str += f' SORTKEY("{sort_key}")'
 	return f"""
 		CREATE TABLE IF NOT EXISTS {database}.{schema}.{table} (
 			{data_types_str}
-		)
+		){keys_str}
 	"""
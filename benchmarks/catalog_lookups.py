@@ -0,0 +1,92 @@
+"""
+compares the lookups of the Redshift catalog index with the boolean masks over the whole of table_data and
+column_data that they replaced, on a synthetic catalog with 100,000 columns by default
+
+	python benchmarks/catalog_lookups.py --num_tables 5000 --columns_per_table 20
+
+needs pandas
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_catalog(num_schemas, num_tables, columns_per_table):
+	"""
+	:return: table_data and column_data like the ones Redshift.get_catalog_data returns
+	:rtype: tuple[DataFrame, DataFrame]
+	"""
+	import numpy as np
+	from pandas import DataFrame
+	schemas = np.array([f'schema_{index % num_schemas:03d}' for index in range(num_tables)])
+	tables = np.array([f'table_{index:06d}' for index in range(num_tables)])
+	table_data = DataFrame({
+		'table_id': np.arange(num_tables), 'database': 'database', 'schema': schemas, 'table': tables,
+		'num_rows': np.arange(num_tables) * 10, 'num_columns': columns_per_table, 'mbytes': 1
+	}).sort_values(by=['schema', 'table'], kind='mergesort').reset_index(drop=True)
+	column_data = DataFrame({
+		'database': 'database',
+		'schema': np.repeat(table_data['schema'].values, columns_per_table),
+		'table': np.repeat(table_data['table'].values, columns_per_table),
+		'column': np.tile([f'column_{index}' for index in range(columns_per_table)], num_tables),
+		'data_type': 'integer'
+	})
+	return table_data, column_data
+
+
+def get_redshift(table_data, column_data):
+	from amazonian import Redshift
+	redshift = Redshift(user_id='user', password='password', server='server', database='database')
+	redshift._replace_catalog(table_data=table_data, column_data=column_data)
+	return redshift
+
+
+def get_column_info_with_mask(column_data, schema, table):
+	return column_data[(column_data['schema'] == schema) & (column_data['table'] == table)].reset_index(drop=True)
+
+
+def get_table_shape_with_mask(table_data, schema, table):
+	return table_data[(table_data['schema'] == schema) & (table_data['table'] == table)]
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--num_schemas', type=int, default=50)
+	parser.add_argument('--num_tables', type=int, default=5000)
+	parser.add_argument('--columns_per_table', type=int, default=20)
+	parser.add_argument('--num_lookups', type=int, default=1000)
+	arguments = parser.parse_args()
+
+	table_data, column_data = get_catalog(
+		num_schemas=arguments.num_schemas, num_tables=arguments.num_tables,
+		columns_per_table=arguments.columns_per_table
+	)
+	start_time = time.time()
+	redshift = get_redshift(table_data=table_data, column_data=column_data)
+	print(f'columns:{len(column_data)}  index built in {round(time.time() - start_time, 3)} seconds')
+
+	step = max(len(table_data) // arguments.num_lookups, 1)
+	keys = list(zip(table_data['schema'], table_data['table']))[::step][:arguments.num_lookups]
+	for schema, table in keys[:10]:
+		assert redshift.get_column_info(schema=schema, table=table).equals(
+			get_column_info_with_mask(column_data=column_data, schema=schema, table=table)
+		)
+
+	for name, function in [
+		('column_info mask', lambda schema, table: get_column_info_with_mask(column_data, schema, table)),
+		('column_info index', lambda schema, table: redshift.get_column_info(schema=schema, table=table)),
+		('table_shape mask', lambda schema, table: get_table_shape_with_mask(table_data, schema, table)),
+		('table_shape index', lambda schema, table: redshift.get_table_shape(schema=schema, table=table))
+	]:
+		start_time = time.time()
+		for schema, table in keys:
+			function(schema, table)
+		elapsed_time = time.time() - start_time
+		print(f'{name:<18}  lookups:{len(keys)}  milliseconds per lookup:{round(elapsed_time / len(keys) * 1000, 4)}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,112 @@
+"""
+times a cold "from amazonian import S3, Redshift" and the first S3(...) and Redshift(...) in new interpreters,
+for the working tree and for any git revisions, such as the one before the heavy imports were deferred
+
+	python benchmarks/import_time.py --revisions HEAD~5 --repeat 10 --importtime
+
+nothing is connected, the constructors get placeholder credentials
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from statistics import median
+
+PACKAGE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIMED_CODE = '''
+import time
+start_time = time.perf_counter()
+from amazonian import S3, Redshift
+import_time = time.perf_counter()
+S3(key='key', secret='secret')
+s3_time = time.perf_counter()
+Redshift(user_id='user', password='password', server='server', database='database')
+redshift_time = time.perf_counter()
+print(import_time - start_time, s3_time - import_time, redshift_time - s3_time)
+'''
+
+
+def export_revision(revision, directory):
+	"""
+	writes the files of a git revision into a directory
+	:type revision: str
+	:type directory: str
+	"""
+	archive = subprocess.run(
+		['git', 'archive', '--format=tar', revision], cwd=PACKAGE_DIRECTORY, capture_output=True, check=True
+	).stdout
+	subprocess.run(['tar', '-x', '-C', directory], input=archive, check=True)
+
+
+def measure(directory, repeat):
+	"""
+	:param str directory: the directory amazonian is imported from
+	:type repeat: int
+	:return: median milliseconds of the import, the first S3 and the first Redshift
+	:rtype: dict[str,float]
+	"""
+	runs = []
+	for _ in range(repeat):
+		output = subprocess.run(
+			[sys.executable, '-c', TIMED_CODE], cwd=directory, capture_output=True, text=True, check=True
+		).stdout
+		runs.append([float(value) * 1000 for value in output.split()])
+	return {
+		name: median(run[index] for run in runs)
+		for index, name in enumerate(['import_ms', 's3_ms', 'redshift_ms'])
+	}
+
+
+def get_slowest_imports(directory, num_modules):
+	"""
+	:return: the modules with the largest cumulative milliseconds in -X importtime, slowest first
+	:rtype: list[tuple[str,float]]
+	"""
+	stderr = subprocess.run(
+		[sys.executable, '-X', 'importtime', '-c', 'from amazonian import S3, Redshift'],
+		cwd=directory, capture_output=True, text=True, check=True
+	).stderr
+	modules = []
+	for line in stderr.splitlines():
+		# import time: self [us] | cumulative | imported package
+		if not line.startswith('import time:') or 'cumulative' in line:
+			continue
+		_, cumulative, module = line[len('import time:'):].split('|')
+		modules.append((module.strip(), int(cumulative) / 1000))
+	return sorted(modules, key=lambda module: -module[1])[:num_modules]
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--revisions', nargs='*', default=[], help='git revisions to time besides the working tree')
+	parser.add_argument('--repeat', type=int, default=5, help='new interpreters per revision, the median is shown')
+	parser.add_argument('--importtime', action='store_true', help='also show the slowest imports of -X importtime')
+	parser.add_argument('--num_modules', type=int, default=10)
+	arguments = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as temporary_directory:
+		directories = [('working tree', PACKAGE_DIRECTORY)]
+		for revision in arguments.revisions:
+			directory = os.path.join(temporary_directory, str(len(directories)))
+			os.makedirs(directory)
+			export_revision(revision=revision, directory=directory)
+			directories.append((revision, directory))
+
+		for name, directory in directories:
+			try:
+				result = measure(directory=directory, repeat=arguments.repeat)
+			except subprocess.CalledProcessError as error:
+				# such as a revision that imports a dependency which is not installed here
+				print(f'{name:<14}  failed: {error.stderr.strip().splitlines()[-1]}')
+				continue
+			times = '  '.join(f'{key}:{round(value, 2)}' for key, value in result.items())
+			print(f'{name:<14}  {times}')
+			if arguments.importtime:
+				for module, milliseconds in get_slowest_imports(directory=directory, num_modules=arguments.num_modules):
+					print(f'    {module:<40} {round(milliseconds, 2)}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,81 @@
+"""
+compares the two ways of reading the parts of a parquet folder into one Spark DataFrame,
+a chain of unions of one read per part, which S3.read_parquet(parallel=False) used to build,
+and the one read of every part that it builds now, on N local parts
+
+	python benchmarks/read_parquet_plan.py --num_parts 50 100 200
+
+needs pyspark, pandas and pyarrow
+"""
+import argparse
+import os
+import tempfile
+import time
+from functools import reduce
+
+
+def write_parts(directory, num_parts, num_rows):
+	"""
+	:type directory: str
+	:type num_parts: int
+	:type num_rows: int
+	:rtype: list[str]
+	"""
+	from pandas import DataFrame
+	paths = []
+	for index in range(num_parts):
+		path = os.path.join(directory, f'part-{index:05d}.parquet')
+		DataFrame({'id': range(index * num_rows, (index + 1) * num_rows), 'part': index}).to_parquet(path, index=False)
+		paths.append(path)
+	return paths
+
+
+def read_with_unions(spark, paths):
+	return reduce(lambda x, y: x.union(y), [spark.read.parquet(path) for path in paths])
+
+
+def read_at_once(spark, paths):
+	return spark.read.parquet(*paths)
+
+
+def measure(function, spark, paths, count):
+	"""
+	:return: seconds to build the DataFrame and its optimized plan, and to count its rows if count
+	:rtype: dict[str,float]
+	"""
+	start_time = time.time()
+	data = function(spark, paths)
+	# forces the analysis and optimization of the whole plan without running it
+	data._jdf.queryExecution().optimizedPlan()
+	result = {'plan_seconds': time.time() - start_time}
+	if count:
+		start_time = time.time()
+		data.count()
+		result['count_seconds'] = time.time() - start_time
+	return result
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--num_parts', type=int, nargs='+', default=[10, 50, 100])
+	parser.add_argument('--num_rows', type=int, default=1000, help='rows per part')
+	parser.add_argument('--count', action='store_true', help='also count the rows, which runs the plan')
+	arguments = parser.parse_args()
+
+	from pyspark.sql import SparkSession
+	spark = SparkSession.builder.master('local[*]').appName('read_parquet_plan').getOrCreate()
+	spark.sparkContext.setLogLevel('ERROR')
+	try:
+		for num_parts in arguments.num_parts:
+			with tempfile.TemporaryDirectory() as directory:
+				paths = write_parts(directory=directory, num_parts=num_parts, num_rows=arguments.num_rows)
+				for name, function in [('unions', read_with_unions), ('one read', read_at_once)]:
+					result = measure(function=function, spark=spark, paths=paths, count=arguments.count)
+					times = '  '.join(f'{key}:{round(value, 3)}' for key, value in result.items())
+					print(f'parts:{num_parts}  {name:<8}  {times}')
+	finally:
+		spark.stop()
+
+
+if __name__ == '__main__':
+	main()
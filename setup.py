@@ -33,6 +33,7 @@ setup(
 		'numpy', 'pandas', 'sqlalchemy', 'psycopg2-binary', 's3fs>=2022.2.0', 'urllib3>=1.26.8' #, 'pyspark', 'botocore'
 		#'aiobotocore==1.3.3' #todo check if the new update to s3fs has solved the issue, if yes, remove this line
 	],
+	extras_require={'arrow': ['pyarrow']},
 	python_requires='~=3.6',
 	zip_safe=False
 )
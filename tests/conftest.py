@@ -0,0 +1,190 @@
+import asyncio
+import random
+
+import pytest
+
+from amazonian import S3
+
+
+class FakeClient:
+	"""
+	an in-memory S3 client with the async methods of the aiobotocore client s3fs connects
+	"""
+	def __init__(self, objects):
+		self.objects = objects
+		self.uploads = {}
+		self.calls = []
+		# keys delete_objects reports as errors
+		self.undeletable_keys = set()
+		self.in_flight = 0
+		self.max_in_flight = 0
+
+	async def put_object(self, Bucket, Key, Body):
+		self.calls.append('put_object')
+		self.objects[(Bucket, Key)] = bytes(Body)
+		return {'ETag': '"etag"'}
+
+	async def create_multipart_upload(self, Bucket, Key):
+		self.calls.append('create_multipart_upload')
+		upload_id = f'upload-{len(self.uploads)}'
+		self.uploads[upload_id] = {}
+		return {'UploadId': upload_id}
+
+	async def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+		self.calls.append('upload_part')
+		self.in_flight += 1
+		self.max_in_flight = max(self.max_in_flight, self.in_flight)
+		try:
+			# the parts finish out of order
+			await asyncio.sleep(random.random() / 100)
+			self.uploads[UploadId][PartNumber] = bytes(Body)
+		finally:
+			self.in_flight -= 1
+		return {'ETag': f'"{PartNumber}"'}
+
+	async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+		self.calls.append('complete_multipart_upload')
+		parts = self.uploads.pop(UploadId)
+		part_numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+		if part_numbers != sorted(parts) or [part['ETag'] for part in MultipartUpload['Parts']] != [
+			f'"{number}"' for number in part_numbers
+		]:
+			raise ValueError(f'parts {part_numbers} do not match the uploaded parts {sorted(parts)}!')
+		self.objects[(Bucket, Key)] = b''.join(parts[number] for number in part_numbers)
+		return {'ETag': '"etag"'}
+
+	async def abort_multipart_upload(self, Bucket, Key, UploadId):
+		self.calls.append('abort_multipart_upload')
+		del self.uploads[UploadId]
+		return {}
+
+	async def delete_objects(self, Bucket, Delete):
+		self.calls.append('delete_objects')
+		errors = []
+		for entry in Delete['Objects']:
+			if entry['Key'] in self.undeletable_keys:
+				errors.append({'Key': entry['Key'], 'Code': 'AccessDenied', 'Message': 'Access Denied'})
+			else:
+				self.objects.pop((Bucket, entry['Key']), None)
+		return {'Errors': errors} if len(errors) > 0 else {}
+
+	async def list_objects_v2(self, Bucket, Prefix='', Delimiter='', MaxKeys=1000, ContinuationToken=None):
+		self.calls.append('list_objects_v2')
+		items = {}
+		for (bucket, key), body in self.objects.items():
+			if bucket != Bucket or not key.startswith(Prefix):
+				continue
+			rest = key[len(Prefix):]
+			if Delimiter and Delimiter in rest:
+				common_prefix = Prefix + rest[:rest.index(Delimiter) + 1]
+				items[common_prefix] = None
+			else:
+				items[key] = {'Key': key, 'Size': len(body), 'ETag': '"etag"', 'StorageClass': 'STANDARD'}
+		names = sorted(items)
+		start = int(ContinuationToken or 0)
+		names_of_page = names[start:start + MaxKeys]
+		page = {
+			'Contents': [items[name] for name in names_of_page if items[name] is not None],
+			'CommonPrefixes': [{'Prefix': name} for name in names_of_page if items[name] is None],
+			'IsTruncated': start + MaxKeys < len(names)
+		}
+		if page['IsTruncated']:
+			page['NextContinuationToken'] = str(start + MaxKeys)
+		return page
+
+
+class FakeFileSystem:
+	"""
+	the parts of s3fs.S3FileSystem that S3 uses, over the same objects as its FakeClient
+	"""
+	def __init__(self):
+		from fsspec.asyn import get_loop
+		self.objects = {}
+		self.client = FakeClient(objects=self.objects)
+		self.loop = get_loop()
+		self.calls = []
+
+	def connect(self):
+		return self.client
+
+	@staticmethod
+	def split_path(path):
+		if path.startswith('s3://'):
+			path = path[len('s3://'):]
+		bucket, _, key = path.partition('/')
+		return bucket, key, None
+
+	def _is_dir(self, path):
+		bucket, key, _ = self.split_path(path)
+		prefix = key.rstrip('/') + '/' if key else ''
+		return any(b == bucket and k.startswith(prefix) for b, k in self.objects)
+
+	def exists(self, path):
+		self.calls.append('exists')
+		bucket, key, _ = self.split_path(path)
+		return (bucket, key) in self.objects or self._is_dir(path)
+
+	def ls(self, path, detail=True):
+		self.calls.append('ls')
+		bucket, key, _ = self.split_path(path)
+		prefix = key.rstrip('/') + '/' if key else ''
+		entries = {}
+		for (object_bucket, object_key), body in self.objects.items():
+			if object_bucket != bucket:
+				continue
+			rest = object_key[len(prefix):]
+			if object_key == key or (object_key.startswith(prefix) and '/' not in rest):
+				# like s3fs, the listing of a file is the file itself
+				name = f'{bucket}/{object_key}'
+				entries[name] = {'name': name, 'Key': object_key, 'Size': len(body), 'size': len(body), 'type': 'file'}
+			elif object_key.startswith(prefix):
+				name = f'{bucket}/{prefix}{rest.split("/")[0]}'
+				entries[name] = {'name': name, 'Key': name, 'Size': 0, 'size': 0, 'type': 'directory'}
+		return [entries[name] for name in sorted(entries)]
+
+	def isdir(self, path):
+		self.calls.append('isdir')
+		return self._is_dir(path)
+
+	def isfile(self, path):
+		self.calls.append('isfile')
+		bucket, key, _ = self.split_path(path)
+		return (bucket, key) in self.objects
+
+	def size(self, path):
+		self.calls.append('size')
+		bucket, key, _ = self.split_path(path)
+		return len(self.objects[(bucket, key)])
+
+	def cat_file(self, path, start=None, end=None):
+		self.calls.append('cat_file')
+		bucket, key, _ = self.split_path(path)
+		return self.objects[(bucket, key)][start:end]
+
+	def put(self, path, body):
+		"""
+		adds an object without going through S3, for the setup of a test
+		"""
+		bucket, key, _ = self.split_path(path)
+		self.objects[(bucket, key)] = body
+
+
+class StubS3(S3):
+	"""
+	an S3 over a FakeFileSystem instead of a bucket
+	"""
+	def __init__(self, cache=None):
+		super().__init__(key='key', secret='secret', cache=cache)
+		self._file_system = FakeFileSystem()
+
+
+@pytest.fixture
+def s3():
+	pytest.importorskip('fsspec')
+	return StubS3()
+
+
+@pytest.fixture
+def cached_s3():
+	pytest.importorskip('fsspec')
+	return StubS3(cache=True)
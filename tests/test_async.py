@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+from amazonian import AsyncRedshift, AsyncS3, RetryPolicy
+from amazonian.redshift.BasicRedshift import BasicRedshift
+
+
+class FakeAsyncFileSystem:
+	"""
+	the parts of an asynchronous s3fs.S3FileSystem that AsyncS3 uses
+	"""
+	instances = []
+
+	def __init__(self, **kwargs):
+		self.listings = {}
+		self._s3 = None
+		FakeAsyncFileSystem.instances.append(self)
+
+	async def set_session(self):
+		# other coroutines run while the session is being set
+		await asyncio.sleep(0.01)
+
+	async def _ls(self, path, detail=True):
+		return self.listings[path]
+
+
+@pytest.fixture
+def async_s3(monkeypatch, cached_s3):
+	s3fs = pytest.importorskip('s3fs')
+	monkeypatch.setattr(s3fs, 'S3FileSystem', FakeAsyncFileSystem)
+	FakeAsyncFileSystem.instances = []
+	return AsyncS3(s3=cached_s3)
+
+
+def test_concurrent_first_calls_share_one_file_system(async_s3):
+	async def _main():
+		return await asyncio.gather(*[async_s3._get_file_system() for _ in range(5)])
+
+	file_systems = asyncio.run(_main())
+	assert len(FakeAsyncFileSystem.instances) == 1
+	assert all(file_system is file_systems[0] for file_system in file_systems)
+
+
+def test_ls_of_a_file_is_empty_and_caches_the_file(async_s3):
+	async def _main():
+		file_system = await async_s3._get_file_system()
+		file_system.listings['s3://bucket/x/a'] = [{'name': 'bucket/x/a', 'Size': 4, 'type': 'file'}]
+		file_system.listings['s3://bucket/x'] = [
+			{'name': 'bucket/x/a', 'Size': 4, 'type': 'file'}, {'name': 'bucket/x/b', 'Size': 0, 'type': 'file'}
+		]
+		file_listing = await async_s3.ls('s3://bucket/x/a')
+		# the same cache entries as S3.ls_files
+		assert async_s3.s3.cache.get_file(path='bucket/x/a').size == 4
+		assert async_s3.s3.cache.get_listing(path='bucket/x') is None
+		return file_listing, await async_s3.ls('s3://bucket/x', exclude_empty=True)
+
+	file_listing, directory_listing = asyncio.run(_main())
+	assert file_listing == []
+	assert [entry.path for entry in directory_listing] == ['bucket/x/a']
+	assert len(async_s3.s3.cache.get_listing(path='bucket/x')) == 2
+
+
+class FakeCursor:
+	def __init__(self, connection):
+		self.connection = connection
+		self.description = None
+
+	def execute(self, query):
+		self.connection.queries.append(query)
+		if 'error' in query:
+			import psycopg2
+			raise psycopg2.ProgrammingError(f'syntax error in "{query}"')
+		self.description = (('id',),)
+
+	def fetchall(self):
+		return [(1,), (2,)]
+
+
+class FakeConnection:
+	def __init__(self):
+		self.queries = []
+		self.closed = False
+
+	def cursor(self):
+		return FakeCursor(connection=self)
+
+	def close(self):
+		self.closed = True
+
+
+class StubAsyncRedshift(AsyncRedshift):
+	"""
+	an AsyncRedshift over fake connections, the first num_failures connections fail
+	"""
+	def __init__(self, num_failures=0):
+		redshift = BasicRedshift(
+			user_id='user', password='password', server='server', database='database',
+			retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001)
+		)
+		super().__init__(redshift=redshift)
+		self.num_failures = num_failures
+		self.connections = []
+
+	async def _connect(self):
+		import psycopg2
+		if len(self.connections) < self.num_failures:
+			self.connections.append(None)
+			raise psycopg2.OperationalError('could not connect to server')
+		connection = FakeConnection()
+		self.connections.append(connection)
+		return connection
+
+	@staticmethod
+	async def _wait(connection):
+		await asyncio.sleep(0)
+
+
+@pytest.fixture
+def psycopg2():
+	return pytest.importorskip('psycopg2')
+
+
+def test_run_prints_the_error_like_basic_redshift(psycopg2, capsys):
+	asyncio.run(StubAsyncRedshift().run(query='SELECT error'))
+	assert 'syntax error in "SELECT error"' in capsys.readouterr().out
+
+
+def test_connections_are_retried(psycopg2):
+	pandas = pytest.importorskip('pandas')
+	async_redshift = StubAsyncRedshift(num_failures=2)
+	result = asyncio.run(async_redshift.get_dataframe(query='SELECT id', echo=0))
+	assert result.equals(pandas.DataFrame({'id': [1, 2]}))
+	assert len(async_redshift.connections) == 3
+	assert async_redshift.redshift.retry_policy.stats['retries'] == 2
+
+
+def test_connection_errors_stop_after_max_attempts(psycopg2):
+	async_redshift = StubAsyncRedshift(num_failures=3)
+	with pytest.raises(psycopg2.OperationalError):
+		asyncio.run(async_redshift._execute(query='SELECT id', fetch=True))
+	assert len(async_redshift.connections) == 3
+
+
+def test_wait_polls_in_the_running_loop(psycopg2):
+	class PollingConnection:
+		def __init__(self):
+			self.states = [psycopg2.extensions.POLL_WRITE, psycopg2.extensions.POLL_OK]
+
+		def poll(self):
+			return self.states.pop(0)
+
+		def fileno(self):
+			return writer.fileno()
+
+	import socket
+	reader, writer = socket.socketpair()
+	try:
+		asyncio.run(asyncio.wait_for(AsyncRedshift._wait(PollingConnection()), timeout=1))
+	finally:
+		reader.close()
+		writer.close()
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pandas = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+
+from amazonian.redshift.CatalogCache import CatalogCache
+
+
+def get_cache(directory):
+	return CatalogCache(cache_dir=str(directory), server='server', database='database')
+
+
+def get_data(index):
+	table_data = pandas.DataFrame({'schema': ['s'] * (index + 1), 'table': [f't{i}' for i in range(index + 1)]})
+	column_data = pandas.DataFrame({'table': [f't{i}' for i in range(index + 1)], 'column': 'c'})
+	return table_data, column_data, [{'schema': 's', 'table': None, 'column': None, 'metadata': index}]
+
+
+def test_save_and_load(tmp_path):
+	cache = get_cache(tmp_path)
+	assert cache.load() is None
+	assert cache.is_stale
+	table_data, column_data, metadata_records = get_data(2)
+	cache.save(table_data=table_data, column_data=column_data, metadata_records=metadata_records)
+	loaded_table_data, loaded_column_data, loaded_metadata_records = cache.load()
+	pandas.testing.assert_frame_equal(loaded_table_data, table_data)
+	pandas.testing.assert_frame_equal(loaded_column_data, column_data)
+	assert loaded_metadata_records == metadata_records
+	assert not cache.is_stale
+
+
+def test_concurrent_saves_are_not_mixed(tmp_path):
+	caches = [get_cache(tmp_path) for _ in range(8)]
+
+	def _save(index):
+		table_data, column_data, metadata_records = get_data(index)
+		caches[index].save(table_data=table_data, column_data=column_data, metadata_records=metadata_records)
+
+	with ThreadPoolExecutor(max_workers=8) as executor:
+		list(executor.map(_save, range(8)))
+
+	table_data, column_data, metadata_records = caches[0].load()
+	# the three files come from the same save
+	index = metadata_records[0]['metadata']
+	assert len(table_data) == len(column_data) == index + 1
+	assert not [name for name in os.listdir(caches[0].directory) if name.endswith('.tmp')]
+
+
+def test_clear(tmp_path):
+	cache = get_cache(tmp_path)
+	cache.save(*get_data(0))
+	cache.clear()
+	assert cache.load() is None
@@ -0,0 +1,63 @@
+import pytest
+
+pandas = pytest.importorskip('pandas')
+
+from amazonian import Redshift
+
+
+def get_catalog(num_schemas=3, num_tables=30, columns_per_table=4):
+	table_records = []
+	column_records = []
+	for index in range(num_tables):
+		schema = f'schema_{index % num_schemas}'
+		table = f'table_{index:03d}'
+		table_records.append({
+			'table_id': index, 'database': 'database', 'schema': schema, 'table': table,
+			'num_rows': index * 10, 'num_columns': columns_per_table, 'mbytes': 1
+		})
+		for column_index in range(columns_per_table):
+			column_records.append({
+				'database': 'database', 'schema': schema, 'table': table,
+				'column': f'column_{column_index}', 'data_type': 'integer'
+			})
+	table_data = pandas.DataFrame(table_records).sort_values(by=['schema', 'table']).reset_index(drop=True)
+	column_data = pandas.DataFrame(column_records).sort_values(
+		by=['schema', 'table'], kind='mergesort'
+	).reset_index(drop=True)
+	return table_data, column_data
+
+
+@pytest.fixture
+def catalog():
+	table_data, column_data = get_catalog()
+	redshift = Redshift(user_id='user', password='password', server='server', database='database')
+	redshift._replace_catalog(table_data=table_data, column_data=column_data)
+	return redshift, table_data, column_data
+
+
+def test_lookups_match_boolean_masks(catalog):
+	redshift, table_data, column_data = catalog
+	for schema, table in zip(table_data['schema'], table_data['table']):
+		table_mask = (table_data['schema'] == schema) & (table_data['table'] == table)
+		column_mask = (column_data['schema'] == schema) & (column_data['table'] == table)
+		assert redshift.get_table_shape(schema=schema, table=table).equals(table_data[table_mask])
+		assert redshift.get_column_info(schema=schema, table=table).equals(
+			column_data[column_mask].reset_index(drop=True)
+		)
+		assert redshift.get_table_record(schema=schema, table=table) == table_data[table_mask].iloc[0].to_dict()
+	for schema in table_data['schema'].unique():
+		assert redshift.get_schema_shape(schema=schema).equals(table_data[table_data['schema'] == schema])
+
+
+def test_missing_objects(catalog):
+	redshift, _, _ = catalog
+	assert redshift.get_table_record(schema='schema_0', table='missing') is None
+	assert len(redshift.get_table_shape(schema='missing', table='table_000')) == 0
+	assert len(redshift.get_column_info(schema='schema_0', table='missing')) == 0
+
+
+def test_hierarchy(catalog):
+	redshift, table_data, _ = catalog
+	assert redshift.get_schema_list() == sorted(table_data['schema'].unique())
+	for schema, tables in redshift.hierarchy.items():
+		assert tables == list(table_data.loc[table_data['schema'] == schema, 'table'])
@@ -0,0 +1,88 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+pandas = pytest.importorskip('pandas')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from amazonian.redshift.BasicRedshift import BasicRedshift
+
+# name and type oid of each column, like cursor.description
+DESCRIPTION = (('id', 23), ('amount', 1700), ('day', 1082), ('note', 1043))
+ROWS = [
+	(1, Decimal('1.5'), datetime.date(2020, 1, 1), None),
+	(2, None, None, None),
+	(3, Decimal('2.25'), datetime.date(2020, 1, 3), 'c'),
+	(None, Decimal('4'), datetime.date(2020, 1, 4), 'd')
+]
+
+
+class FakeCursor:
+	def __init__(self, rows):
+		self.rows = list(rows)
+		self.description = None
+
+	def execute(self, query):
+		pass
+
+	def fetchmany(self, size):
+		self.description = DESCRIPTION
+		rows, self.rows = self.rows[:size], self.rows[size:]
+		return rows
+
+	def close(self):
+		pass
+
+
+class FakeConnection:
+	def __init__(self, rows):
+		self.rows = rows
+
+	def cursor(self, name=None):
+		return FakeCursor(self.rows)
+
+	def rollback(self):
+		pass
+
+	def close(self):
+		pass
+
+
+class StubRedshift(BasicRedshift):
+	"""
+	a Redshift whose queries return ROWS from a fake server-side cursor
+	"""
+	def __init__(self, rows):
+		super().__init__(user_id='user', password='password', server='server', database='database')
+		self.rows = rows
+
+	def _raw_connection(self):
+		return FakeConnection(self.rows)
+
+
+def test_iter_dataframes_converts_decimals_to_floats():
+	chunks = list(StubRedshift(ROWS).iter_dataframes(query='SELECT 1', chunksize=2, echo=0))
+	assert [len(chunk) for chunk in chunks] == [2, 2]
+	assert all(chunk['amount'].dtype == 'float64' for chunk in chunks)
+	assert chunks[0]['amount'].tolist()[0] == 1.5
+
+
+def test_export_parquet_keeps_types_of_null_first_chunk(tmp_path):
+	path = str(tmp_path / 'result.parquet')
+	# the second row is all NULL but for id, so the first chunk of one row has nothing to infer note from
+	rows = [ROWS[1]] + ROWS[2:]
+	num_rows = StubRedshift(rows).export_query(query='SELECT 1', path=path, chunksize=1, echo=0)
+	assert num_rows == 3
+	table = pq.read_table(path)
+	assert [str(field.type) for field in table.schema] == ['int32', 'double', 'date32[day]', 'string']
+	assert table.column('note').to_pylist() == [None, 'c', 'd']
+	assert table.column('amount').to_pylist() == [None, 2.25, 4.0]
+
+
+def test_export_parquet_of_empty_result(tmp_path):
+	path = str(tmp_path / 'result.parquet')
+	assert StubRedshift([]).export_query(query='SELECT 1', path=path, echo=0) == 0
+	table = pq.read_table(path)
+	assert table.num_rows == 0
+	assert table.column_names == ['id', 'amount', 'day', 'note']
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+PACKAGE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'pyspark', 's3fs', 'sqlalchemy', 'pyarrow', 'psycopg2']
+
+
+def get_imported_modules(statement):
+	"""
+	runs a statement in a new interpreter, where nothing else was imported before it
+	:type statement: str
+	:rtype: set[str]
+	"""
+	code = f'import sys\n{statement}\nprint(" ".join(sys.modules))'
+	output = subprocess.run(
+		[sys.executable, '-c', code], cwd=PACKAGE_DIRECTORY, capture_output=True, text=True, check=True
+	).stdout
+	return set(output.split())
+
+
+def test_import_does_not_load_heavy_modules():
+	modules = get_imported_modules('import amazonian')
+	assert 'amazonian' in modules
+	assert [module for module in HEAVY_MODULES if module in modules] == []
+
+
+def test_constructing_does_not_load_heavy_modules():
+	modules = get_imported_modules(
+		'from amazonian import S3, Redshift\n'
+		"S3(key='key', secret='secret')\n"
+		"Redshift(user_id='user', password='password', server='server', database='database')"
+	)
+	assert [module for module in HEAVY_MODULES if module in modules] == []
@@ -0,0 +1,102 @@
+import time
+
+from amazonian.MetadataCache import MetadataCache
+from amazonian.S3File import S3Files
+
+
+def get_files(*paths):
+	return S3Files([{'name': path, 'Size': 1, 'type': 'file'} for path in paths])
+
+
+def get_cache():
+	cache = MetadataCache(ttl=None)
+	cache.put_listing(path='bucket', files=get_files('bucket/a', 'bucket/b'))
+	cache.put_listing(path='bucket/a', files=get_files('bucket/a/x', 'bucket/a/y'))
+	cache.put_listing(path='bucket/a/x', files=get_files('bucket/a/x/1'))
+	cache.put_listing(path='bucket/b', files=get_files('bucket/b/z'))
+	cache.put_file(path='bucket/c', file=get_files('bucket/c')[0])
+	return cache
+
+
+def test_put_listing_also_caches_its_files():
+	cache = get_cache()
+	assert cache.get_file(path='bucket/a/y').path == 'bucket/a/y'
+	assert [file.path for file in cache.get_listing(path='bucket/a')] == ['bucket/a/x', 'bucket/a/y']
+
+
+def test_invalidate_many_removes_the_paths_their_children_and_their_parents():
+	cache = get_cache()
+	cache.invalidate_many(paths=['bucket/a/x'])
+	# the path and everything under it
+	assert cache.get_listing(path='bucket/a/x') is None
+	assert cache.get_file(path='bucket/a/x') is None
+	assert cache.get_file(path='bucket/a/x/1') is None
+	# the parents whose listings include it
+	assert cache.get_listing(path='bucket/a') is None
+	assert cache.get_listing(path='bucket') is None
+	# the siblings
+	assert cache.get_file(path='bucket/a/y') is not None
+	assert cache.get_listing(path='bucket/b') is not None
+	assert cache.get_file(path='bucket/c') is not None
+
+
+def test_invalidate_many_of_several_paths():
+	cache = get_cache()
+	cache.invalidate_many(paths=['bucket/a/y', 'bucket/b/z'])
+	assert cache.get_file(path='bucket/a/y') is None
+	assert cache.get_file(path='bucket/b/z') is None
+	assert cache.get_listing(path='bucket/a') is None
+	assert cache.get_listing(path='bucket/b') is None
+	assert cache.get_listing(path='bucket/a/x') is not None
+	assert cache.get_file(path='bucket/c') is not None
+	assert cache.stats['invalidations'] == 2
+
+
+def test_invalidate_many_does_not_remove_paths_that_only_share_a_prefix():
+	cache = MetadataCache(ttl=None)
+	cache.put_file(path='bucket/ab', file=get_files('bucket/ab')[0])
+	cache.put_file(path='bucket/a', file=get_files('bucket/a')[0])
+	cache.invalidate_many(paths=['bucket/a'])
+	assert cache.get_file(path='bucket/a') is None
+	assert cache.get_file(path='bucket/ab') is not None
+
+
+def test_invalidate_is_invalidate_many_of_one_path():
+	cache = get_cache()
+	cache.invalidate(path='bucket/b')
+	assert cache.get_listing(path='bucket/b') is None
+	assert cache.get_file(path='bucket/b/z') is None
+	assert cache.get_listing(path='bucket') is None
+	assert cache.get_listing(path='bucket/a') is not None
+
+
+def test_hits_misses_and_expiration():
+	cache = MetadataCache(ttl=0.05)
+	cache.put_file(path='bucket/a', file=get_files('bucket/a')[0])
+	assert cache.get_file(path='bucket/a') is not None
+	assert cache.get_file(path='bucket/b') is None
+	time.sleep(0.1)
+	assert cache.get_file(path='bucket/a') is None
+	assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_is_evicted():
+	cache = MetadataCache(max_size=2, ttl=None)
+	for path in ['bucket/a', 'bucket/b']:
+		cache.put_file(path=path, file=get_files(path)[0])
+	cache.get_file(path='bucket/a')
+	cache.put_file(path='bucket/c', file=get_files('bucket/c')[0])
+	assert cache.get_file(path='bucket/b') is None
+	assert cache.get_file(path='bucket/a') is not None
+	assert cache.stats['evictions'] == 1
+
+
+def test_get_file_or_listing_counts_one_hit_or_miss():
+	cache = get_cache()
+	cache.put_listing(path='bucket/empty', files=get_files())
+	assert cache.get_file_or_listing(path='bucket/a')[0].path == 'bucket/a'
+	assert cache.get_file_or_listing(path='bucket/missing') == (None, None)
+	# an empty listing does not tell whether the path exists
+	file, files = cache.get_file_or_listing(path='bucket/empty')
+	assert file is None and len(files) == 0
+	assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from amazonian.MultipartUpload import MultipartUpload
+
+PART_SIZE = MultipartUpload.MIN_PART_SIZE
+
+
+def get_payload(num_bytes):
+	return os.urandom(num_bytes)
+
+
+def test_small_payload_is_one_put_object(s3):
+	payload = get_payload(PART_SIZE - 1)
+	with s3.open_upload(path='s3://bucket/small.bin', part_size=PART_SIZE) as upload:
+		upload.write(payload)
+	assert s3.file_system.client.calls == ['put_object']
+	assert s3.file_system.objects[('bucket', 'small.bin')] == payload
+	assert upload.stats['parts'] == 1
+
+
+def test_empty_payload_is_one_put_object(s3):
+	with s3.open_upload(path='s3://bucket/empty.bin', part_size=PART_SIZE):
+		pass
+	assert s3.file_system.client.calls == ['put_object']
+	assert s3.file_system.objects[('bucket', 'empty.bin')] == b''
+
+
+@pytest.mark.parametrize('num_bytes, num_parts', [
+	(PART_SIZE, 1),
+	(PART_SIZE + 1, 2),
+	(2 * PART_SIZE, 2),
+	(2 * PART_SIZE + 100, 3)
+])
+def test_parts_are_split_at_part_size(s3, num_bytes, num_parts):
+	payload = get_payload(num_bytes)
+	with s3.open_upload(path='s3://bucket/large.bin', part_size=PART_SIZE) as upload:
+		upload.write(payload)
+	calls = s3.file_system.client.calls
+	assert calls[0] == 'create_multipart_upload'
+	assert calls.count('upload_part') == num_parts
+	assert calls[-1] == 'complete_multipart_upload'
+	assert 'put_object' not in calls
+	assert s3.file_system.objects[('bucket', 'large.bin')] == payload
+	assert upload.stats['parts'] == num_parts
+	assert upload.tell() == num_bytes
+
+
+def test_writes_of_any_size_fill_the_same_parts(s3):
+	payload = get_payload(3 * PART_SIZE + 12345)
+	with s3.open_upload(path='s3://bucket/chunks.bin', part_size=PART_SIZE) as upload:
+		start = 0
+		for size in [1, PART_SIZE - 2, 3, 2 * PART_SIZE, 12345 - 2]:
+			upload.write(payload[start:start + size])
+			start += size
+	assert s3.file_system.client.calls.count('upload_part') == 4
+	assert s3.file_system.objects[('bucket', 'chunks.bin')] == payload
+
+
+def test_parts_keep_their_order_under_the_semaphore(s3):
+	payload = get_payload(10 * PART_SIZE)
+	with s3.open_upload(path='s3://bucket/ordered.bin', part_size=PART_SIZE, workers=3) as upload:
+		for start in range(0, len(payload), PART_SIZE // 2):
+			upload.write(payload[start:start + PART_SIZE // 2])
+	# the fake client finishes the parts out of order and checks the parts complete_multipart_upload gets
+	assert s3.file_system.objects[('bucket', 'ordered.bin')] == payload
+	assert 1 <= s3.file_system.client.max_in_flight <= 3
+
+
+def test_exception_inside_with_aborts(s3):
+	with pytest.raises(RuntimeError):
+		with s3.open_upload(path='s3://bucket/aborted.bin', part_size=PART_SIZE) as upload:
+			upload.write(get_payload(2 * PART_SIZE))
+			raise RuntimeError('failed while writing')
+	assert s3.file_system.client.calls[-1] == 'abort_multipart_upload'
+	assert 'complete_multipart_upload' not in s3.file_system.client.calls
+	assert s3.file_system.client.uploads == {}
+	assert ('bucket', 'aborted.bin') not in s3.file_system.objects
+	assert upload.closed
+	with pytest.raises(ValueError):
+		upload.write(b'more')
+
+
+def test_exception_before_the_first_part_uploads_nothing(s3):
+	with pytest.raises(RuntimeError):
+		with s3.open_upload(path='s3://bucket/aborted.bin', part_size=PART_SIZE) as upload:
+			upload.write(b'small')
+			raise RuntimeError('failed while writing')
+	assert s3.file_system.client.calls == []
+	assert s3.file_system.objects == {}
+
+
+def test_part_size_below_the_minimum(s3):
+	with pytest.raises(ValueError):
+		s3.open_upload(path='s3://bucket/small.bin', part_size=PART_SIZE - 1)
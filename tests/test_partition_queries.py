@@ -0,0 +1,97 @@
+import datetime
+
+import pytest
+
+pandas = pytest.importorskip('pandas')
+
+from amazonian.redshift.BasicRedshift import BasicRedshift
+
+QUERY = 'SELECT * FROM schema.table;'
+
+
+class StubRedshift(BasicRedshift):
+	"""
+	a Redshift whose bounds query returns the given minimum and maximum
+	"""
+	def __init__(self, minimum=None, maximum=None):
+		super().__init__(user_id='user', password='password', server='server', database='database')
+		self.bounds = pandas.DataFrame({'minimum': [minimum], 'maximum': [maximum]})
+		self.queries = []
+
+	def get_dataframe(self, query, echo=1, **kwargs):
+		self.queries.append(query)
+		return self.bounds
+
+
+def get_conditions(queries):
+	prefix = 'SELECT * FROM (SELECT * FROM schema.table) X WHERE '
+	assert all(query.startswith(prefix) for query in queries)
+	return [query[len(prefix):] for query in queries]
+
+
+def test_integer_ranges():
+	redshift = StubRedshift(minimum=0, maximum=100)
+	queries = redshift.get_partition_queries(query=QUERY, partition_column='id', num_partitions=4)
+	assert redshift.queries == [
+		'SELECT MIN("id") AS "minimum", MAX("id") AS "maximum" FROM (SELECT * FROM schema.table) X'
+	]
+	assert get_conditions(queries) == [
+		'"id" < 25',
+		'"id" >= 25 AND "id" < 50',
+		'"id" >= 50 AND "id" < 75',
+		'("id" >= 75) OR "id" IS NULL'
+	]
+
+
+def test_integer_ranges_round_the_step_up():
+	redshift = StubRedshift(minimum=0, maximum=10)
+	queries = redshift.get_partition_queries(query=QUERY, partition_column='id', num_partitions=3)
+	assert get_conditions(queries) == [
+		'"id" < 4',
+		'"id" >= 4 AND "id" < 8',
+		'("id" >= 8) OR "id" IS NULL'
+	]
+
+
+def test_float_ranges():
+	redshift = StubRedshift(minimum=0.0, maximum=1.0)
+	queries = redshift.get_partition_queries(query=QUERY, partition_column='score', num_partitions=2)
+	assert get_conditions(queries) == ['"score" < 0.5', '("score" >= 0.5) OR "score" IS NULL']
+
+
+def test_datetime_ranges():
+	redshift = StubRedshift(minimum=datetime.datetime(2020, 1, 1), maximum=datetime.datetime(2020, 1, 3))
+	queries = redshift.get_partition_queries(query=QUERY, partition_column='day', num_partitions=2)
+	assert get_conditions(queries) == [
+		'"day" < \'2020-01-02 00:00:00\'',
+		'("day" >= \'2020-01-02 00:00:00\') OR "day" IS NULL'
+	]
+
+
+@pytest.mark.parametrize('minimum, maximum', [(None, None), (float('nan'), float('nan'))])
+def test_ranges_of_no_rows_or_only_missing_values(minimum, maximum):
+	redshift = StubRedshift(minimum=minimum, maximum=maximum)
+	queries = redshift.get_partition_queries(query=QUERY, partition_column='id', num_partitions=3)
+	assert get_conditions(queries) == ['TRUE', 'FALSE', '(FALSE) OR "id" IS NULL']
+
+
+def test_hash_buckets():
+	redshift = StubRedshift()
+	queries = redshift.get_partition_queries(query=QUERY, partition_column='name', num_partitions=2, method='hash')
+	# no bounds query for hash
+	assert redshift.queries == []
+	assert get_conditions(queries) == [
+		'"name" IS NOT NULL AND ABS(MOD(FNV_HASH("name"), 2)) = 0',
+		'("name" IS NOT NULL AND ABS(MOD(FNV_HASH("name"), 2)) = 1) OR "name" IS NULL'
+	]
+
+
+def test_one_partition_is_the_whole_query():
+	redshift = StubRedshift(minimum=0, maximum=100)
+	queries = redshift.get_partition_queries(query=QUERY, partition_column='id', num_partitions=1)
+	assert get_conditions(queries) == ['(TRUE) OR "id" IS NULL']
+
+
+def test_unknown_method():
+	with pytest.raises(ValueError):
+		StubRedshift().get_partition_queries(query=QUERY, partition_column='id', num_partitions=2, method='list')
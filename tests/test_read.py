@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+PART_SIZE = 1024
+
+
+@pytest.mark.parametrize('num_bytes', [0, PART_SIZE - 1, PART_SIZE, PART_SIZE + 1, 5 * PART_SIZE + 7])
+def test_read_returns_bytes_below_and_above_part_size(s3, num_bytes):
+	payload = os.urandom(num_bytes)
+	s3.file_system.put(path='s3://bucket/object', body=payload)
+	result = s3.read(path='s3://bucket/object', part_size=PART_SIZE, workers=3)
+	assert type(result) is bytes
+	assert result == payload
+	assert type(s3.read_bytes(path='s3://bucket/object', part_size=PART_SIZE)) is bytes
+
+
+def test_read_ranges_above_part_size(s3):
+	s3.file_system.put(path='s3://bucket/object', body=os.urandom(3 * PART_SIZE))
+	s3.read(path='s3://bucket/object', part_size=PART_SIZE)
+	assert s3.file_system.calls.count('cat_file') == 3
+
+
+def test_read_text(s3):
+	text = 'é' * PART_SIZE
+	s3.file_system.put(path='s3://bucket/object', body=text.encode('utf-8'))
+	assert s3.read(path='s3://bucket/object', mode='r', part_size=PART_SIZE) == text
+
+
+def test_read_into(s3):
+	payload = os.urandom(2 * PART_SIZE + 1)
+	s3.file_system.put(path='s3://bucket/object', body=payload)
+	buffer = bytearray(len(payload) + 10)
+	assert s3.read_into(path='s3://bucket/object', buffer=buffer, part_size=PART_SIZE) == len(payload)
+	assert buffer[:len(payload)] == payload
+	with pytest.raises(ValueError):
+		s3.read_into(path='s3://bucket/object', buffer=bytearray(10), part_size=PART_SIZE)
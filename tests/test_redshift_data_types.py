@@ -0,0 +1,69 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+pandas = pytest.importorskip('pandas')
+
+from amazonian.redshift.get_redshift_create_table_query import (
+	get_redshift_create_table_query, get_redshift_data_types, get_redshift_key_suggestions
+)
+
+
+@pytest.mark.parametrize('values, expected', [
+	(pandas.Series([1, 2, 3], dtype='int8'), 'INTEGER'),
+	(pandas.Series([-32768, 32767], dtype='int64'), 'INTEGER'),
+	(pandas.Series([0, 2 ** 31 - 1], dtype='int64'), 'INTEGER'),
+	(pandas.Series([0, 2 ** 31], dtype='int64'), 'BIGINT'),
+	(pandas.Series([0, 2 ** 64 - 1], dtype='uint64'), 'DECIMAL(20,0)'),
+	(pandas.Series([], dtype='int64'), 'INTEGER'),
+	(pandas.Series([1.5, 2.5]), 'REAL'),
+	(pandas.Series([True, False]), 'BOOLEAN'),
+	(pandas.Series(pandas.to_datetime(['2020-01-01', '2020-01-02'])), 'TIMESTAMP'),
+	(pandas.Series(pandas.to_datetime(['2020-01-01 01:00', '2020-01-02 00:00'])), 'TIMESTAMP'),
+	(pandas.Series(pandas.to_datetime(['2020-01-01']).tz_localize('UTC')), 'TIMESTAMPTZ'),
+	(pandas.Series([datetime(2020, 1, 1, 1)], dtype='object'), 'TIMESTAMP'),
+	(pandas.Series([date(2020, 1, 1)], dtype='object'), 'DATE'),
+	(pandas.Series([Decimal('1.25'), Decimal('100.5')], dtype='object'), 'DECIMAL(5,2)'),
+	(pandas.Series(['a', 'abc'], dtype='object'), 'VARCHAR(3)'),
+	(pandas.Series(['é' * 4], dtype='object'), 'VARCHAR(15)'),
+	(pandas.Series([None, None], dtype='object'), 'VARCHAR(1)')
+])
+def test_default_data_types(values, expected):
+	assert get_redshift_data_types(pandas.DataFrame({'x': values}))['x'] == expected
+
+
+def test_narrow_integers_is_opt_in():
+	data = pandas.DataFrame({'small': [1, 2, 3], 'large': [0, 2 ** 20, 3]})
+	assert dict(get_redshift_data_types(data)) == {'small': 'INTEGER', 'large': 'INTEGER'}
+	assert dict(get_redshift_data_types(data, narrow_integers=True)) == {'small': 'SMALLINT', 'large': 'INTEGER'}
+
+
+def test_infer_dates_is_opt_in():
+	data = pandas.DataFrame({'day': pandas.to_datetime(['2020-01-01', '2020-01-02'])})
+	assert get_redshift_data_types(data)['day'] == 'TIMESTAMP'
+	assert get_redshift_data_types(data, infer_dates=True)['day'] == 'DATE'
+
+
+def test_not_null():
+	data = pandas.DataFrame({'full': [1, 2], 'missing': [1.0, None]})
+	assert dict(get_redshift_data_types(data, not_null=True)) == {'full': 'INTEGER NOT NULL', 'missing': 'REAL'}
+
+
+def test_create_table_query():
+	data = pandas.DataFrame({'id': [1, 2], 'name': ['a', 'b']})
+	query = get_redshift_create_table_query(
+		database='database', schema='schema', table='table', data=data, sort_key='id', dist_key='id'
+	)
+	assert 'CREATE TABLE IF NOT EXISTS database.schema.table' in query
+	assert '"id" INTEGER' in query
+	assert '"name" VARCHAR(1)' in query
+	assert query.strip().endswith('DISTKEY("id") SORTKEY("id")')
+
+
+def test_key_suggestions():
+	data = pandas.DataFrame({
+		'id': range(100), 'category': ['a', 'b'] * 50,
+		'day': pandas.date_range('2020-01-01', periods=100)
+	})
+	assert get_redshift_key_suggestions(data) == {'sort_key': 'day', 'dist_key': 'id'}
@@ -0,0 +1,128 @@
+import pickle
+
+import pytest
+
+from amazonian.RetryPolicy import RetryPolicy, classify_error
+
+
+class OperationalError(Exception):
+	"""
+	stands for psycopg2.OperationalError and its subclasses, which carry the postgres error code in pgcode
+	"""
+	def __init__(self, message='', pgcode=None):
+		super().__init__(message)
+		self.pgcode = pgcode
+
+
+class DBAPIError(Exception):
+	"""
+	stands for the SQLAlchemy wrapper that keeps the psycopg2 error in orig
+	"""
+	def __init__(self, orig):
+		super().__init__(str(orig))
+		self.orig = orig
+
+
+DBAPIError.__name__ = 'OperationalError'
+
+
+class ClientError(Exception):
+	def __init__(self, code, status_code):
+		super().__init__(code)
+		self.response = {'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': status_code}}
+
+
+class EndpointConnectionError(Exception):
+	pass
+
+
+@pytest.mark.parametrize('pgcode, expected', [
+	('08006', 'transient'),  # connection failure
+	('08001', 'transient'),  # could not connect
+	('57P01', 'transient'),  # admin shutdown
+	('57P02', 'transient'),  # crash shutdown
+	('57P03', 'transient'),  # cannot connect now
+	('40001', 'transient'),  # serialization failure
+	('57014', None),  # query canceled or statement timeout
+	('53100', None),  # disk full
+	('53200', None),  # out of memory
+	('42601', None),  # syntax error
+	('XX000', None)  # internal error
+])
+def test_database_errors_are_classified_by_their_code(pgcode, expected):
+	error = OperationalError('error', pgcode=pgcode)
+	assert classify_error(error) == expected
+	assert classify_error(DBAPIError(orig=error)) == expected
+
+
+def test_database_errors_without_a_code():
+	assert classify_error(DBAPIError(orig=OperationalError('server closed the connection unexpectedly'))) == 'transient'
+	assert classify_error(OperationalError('password authentication failed for user')) is None
+
+
+@pytest.mark.parametrize('code, status_code, expected', [
+	('SlowDown', 503, 'throttle'),
+	('ThrottlingException', 400, 'throttle'),
+	('Unknown', 429, 'throttle'),
+	('InternalError', 500, 'transient'),
+	('RequestTimeout', 400, 'transient'),
+	('AccessDenied', 403, None),
+	('NoSuchKey', 404, None)
+])
+def test_service_errors(code, status_code, expected):
+	assert classify_error(ClientError(code=code, status_code=status_code)) == expected
+
+
+def test_wrapped_and_builtin_errors():
+	wrapper = OSError('read failed')
+	wrapper.__cause__ = ClientError(code='SlowDown', status_code=503)
+	assert classify_error(wrapper) == 'throttle'
+	assert classify_error(EndpointConnectionError('could not connect')) == 'transient'
+	assert classify_error(ConnectionResetError()) == 'transient'
+	assert classify_error(TimeoutError()) == 'transient'
+	assert classify_error(FileNotFoundError()) is None
+	assert classify_error(ValueError()) is None
+
+
+def test_call_retries_transient_errors_only():
+	policy = RetryPolicy(max_attempts=3, base_delay=0)
+	attempts = []
+
+	def _fail_once():
+		attempts.append(1)
+		if len(attempts) == 1:
+			raise OperationalError('connection lost', pgcode='08006')
+		return 'done'
+
+	assert policy.call(_fail_once) == 'done'
+	assert len(attempts) == 2
+
+	def _cancelled():
+		attempts.append(1)
+		raise OperationalError('canceling statement due to statement timeout', pgcode='57014')
+
+	attempts.clear()
+	with pytest.raises(OperationalError):
+		policy.call(_cancelled)
+	assert len(attempts) == 1
+	assert policy.stats['retries'] == 1
+	assert policy.stats['failures'] == 1
+
+
+def test_call_gives_up_after_max_attempts():
+	policy = RetryPolicy(max_attempts=3, base_delay=0)
+	attempts = []
+
+	def _always_fail():
+		attempts.append(1)
+		raise ConnectionResetError()
+
+	with pytest.raises(ConnectionResetError):
+		policy.call(_always_fail)
+	assert len(attempts) == 3
+
+
+def test_pickle_keeps_the_settings():
+	policy = pickle.loads(pickle.dumps(RetryPolicy(max_attempts=7, rate_limit=10)))
+	assert policy.__getstate__()['max_attempts'] == 7
+	assert policy.__getstate__()['rate_limit'] == 10
@@ -0,0 +1,63 @@
+def put_objects(s3, paths):
+	for path in paths:
+		s3.file_system.put(path=path, body=b'data')
+
+
+def test_rm_many_deletes_in_batches_of_1000(s3):
+	paths = [f's3://bucket/data/part-{index:05d}' for index in range(2500)]
+	put_objects(s3, paths + ['s3://bucket/data/keep', 's3://other/data/part-00000'])
+	failures = s3.rm_many(paths=paths + ['s3://other/data/part-00000'])
+	assert failures == {}
+	assert s3.file_system.client.calls.count('delete_objects') == 4
+	assert set(s3.file_system.objects) == {('bucket', 'data/keep')}
+
+
+def test_rm_many_returns_the_keys_that_failed(s3):
+	paths = ['s3://bucket/data/a', 's3://bucket/data/b', 's3://bucket/data/c']
+	put_objects(s3, paths)
+	s3.file_system.client.undeletable_keys.add('data/b')
+	failures = s3.rm_many(paths=paths)
+	assert list(failures) == ['s3://bucket/data/b']
+	assert 'AccessDenied' in str(failures['s3://bucket/data/b'])
+	assert set(s3.file_system.objects) == {('bucket', 'data/b')}
+
+
+def test_rm_many_verifies_with_one_listing_per_parent(s3):
+	paths = ['s3://bucket/x/a', 's3://bucket/x/b', 's3://bucket/y/c']
+	put_objects(s3, paths + ['s3://bucket/x/other'])
+	assert s3.rm_many(paths=paths) == {}
+	assert s3.file_system.client.calls.count('list_objects_v2') == 2
+
+
+def test_rm_many_finds_objects_that_were_not_deleted(s3):
+	paths = ['s3://bucket/x/a', 's3://bucket/x/b']
+	put_objects(s3, paths)
+	client = s3.file_system.client
+	delete_objects = client.delete_objects
+
+	async def _delete_nothing(Bucket, Delete):
+		# reports success but leaves x/a in place
+		await delete_objects(Bucket=Bucket, Delete={'Objects': [{'Key': 'x/b'}]})
+		return {}
+
+	client.delete_objects = _delete_nothing
+	failures = s3.rm_many(paths=paths)
+	assert list(failures) == ['s3://bucket/x/a']
+	assert isinstance(failures['s3://bucket/x/a'], FileExistsError)
+
+
+def test_rm_many_without_verify_does_not_list(s3):
+	put_objects(s3, ['s3://bucket/x/a'])
+	assert s3.rm_many(paths=['s3://bucket/x/a'], verify=False) == {}
+	assert 'list_objects_v2' not in s3.file_system.client.calls
+
+
+def test_rm_many_invalidates_the_cache(cached_s3):
+	put_objects(cached_s3, ['s3://bucket/x/a', 's3://bucket/x/b'])
+	# the listing of walk caches both objects
+	list(cached_s3.walk(path='s3://bucket/x'))
+	assert cached_s3.exists('s3://bucket/x/a')
+	assert 'exists' not in cached_s3.file_system.calls
+	cached_s3.rm_many(paths=['s3://bucket/x/a'])
+	assert not cached_s3.exists('s3://bucket/x/a')
+	assert cached_s3.file_system.calls == ['exists']
@@ -0,0 +1,51 @@
+import pytest
+
+
+def test_cold_exists_and_is_dir_count_one_miss(cached_s3):
+	cached_s3.file_system.put(path='s3://bucket/x/a', body=b'data')
+	assert cached_s3.exists('s3://bucket/x/a')
+	assert cached_s3.is_dir('s3://bucket/x')
+	assert (cached_s3.cache.hits, cached_s3.cache.misses) == (0, 2)
+	assert cached_s3.file_system.calls == ['exists', 'isdir']
+
+
+def test_cached_exists_and_is_dir_count_one_hit(cached_s3):
+	cached_s3.file_system.put(path='s3://bucket/x/a', body=b'data')
+	list(cached_s3.walk(path='s3://bucket'))
+	misses = cached_s3.cache.misses
+	assert cached_s3.exists('s3://bucket/x/a')
+	assert cached_s3.is_dir('s3://bucket/x')
+	assert not cached_s3.is_dir('s3://bucket/x/a')
+	assert cached_s3.cache.hits == 3
+	assert cached_s3.cache.misses == misses
+	assert cached_s3.file_system.calls == []
+
+
+@pytest.mark.parametrize('write', [
+	lambda s3, path: s3.write(path=path, obj=b'data'),
+	lambda s3, path: s3.open_upload(path=path).close(),
+	lambda s3, path: s3.write_pickle(obj=[1, 2], path=path)
+])
+def test_writes_invalidate_a_cached_listing(cached_s3, write):
+	cached_s3.file_system.put(path='s3://bucket/x/a', body=b'data')
+	list(cached_s3.walk(path='s3://bucket/x'))
+	write(cached_s3, 's3://bucket/x/b')
+	assert [entry.path for entry in cached_s3.ls('s3://bucket/x')] == ['bucket/x/a', 'bucket/x/b']
+
+
+def test_export_query_invalidates_a_cached_listing(cached_s3):
+	pandas = pytest.importorskip('pandas')
+	from amazonian.redshift.BasicRedshift import BasicRedshift
+
+	class StubRedshift(BasicRedshift):
+		def __init__(self):
+			super().__init__(user_id='user', password='password', server='server', database='database')
+
+		def _iter_dataframes(self, query, chunksize, fetch_size, echo):
+			yield (('id', 23),), pandas.DataFrame({'id': [1, 2]})
+
+	cached_s3.file_system.put(path='s3://bucket/x/a', body=b'data')
+	list(cached_s3.walk(path='s3://bucket/x'))
+	assert StubRedshift().export_query(query='SELECT 1', path='s3://bucket/x/b.csv', file_format='csv', s3=cached_s3) == 2
+	assert [entry.path for entry in cached_s3.ls('s3://bucket/x')] == ['bucket/x/a', 'bucket/x/b.csv']
+	assert cached_s3.file_system.objects[('bucket', 'x/b.csv')] == b'id\n1\n2\n'
@@ -0,0 +1,43 @@
+import csv
+import gzip
+import io
+
+import pytest
+
+pandas = pytest.importorskip('pandas')
+
+from amazonian.redshift.BasicRedshift import BasicRedshift
+
+
+def read_staged_csv(staged):
+	"""
+	reads the staged bytes the way COPY ... CSV NULL AS CSV_NULL does
+	:type staged: bytes
+	:rtype: list[list[str or NoneType]]
+	"""
+	text = gzip.decompress(staged).decode('utf-8')
+	return [
+		[None if value == BasicRedshift.CSV_NULL else value for value in row]
+		for row in csv.reader(io.StringIO(text))
+	]
+
+
+def test_missing_values_and_empty_strings_round_trip():
+	data = pandas.DataFrame({
+		'name': ['a', '', None, 'd, "e"', float('nan')],
+		'number': [1.5, float('nan'), 3.0, None, 5.0]
+	})
+	rows = read_staged_csv(BasicRedshift._get_staged_part_bytes(data=data, file_format='csv'))
+	assert rows == [
+		['a', '1.5'],
+		['', None],
+		[None, '3.0'],
+		['d, "e"', None],
+		[None, '5.0']
+	]
+
+
+def test_only_empty_strings_are_quoted():
+	data = pandas.DataFrame({'name': ['', None]})
+	text = gzip.decompress(BasicRedshift._get_staged_part_bytes(data=data, file_format='csv')).decode('utf-8')
+	assert text.splitlines() == ['""', BasicRedshift.CSV_NULL]
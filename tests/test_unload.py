@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+
+pandas = pytest.importorskip('pandas')
+
+from amazonian import S3
+from amazonian.redshift.BasicRedshift import BasicRedshift
+
+QUERY = "SELECT id, name FROM schema.table WHERE name = 'a';"
+
+
+class StubS3(S3):
+	"""
+	an S3 that serves the unloaded files from memory instead of a bucket
+	"""
+	def __init__(self, csv_parts=None, parquet_data=None):
+		super().__init__(iam_role='arn:aws:iam::123456789012:role/unload')
+		self.csv_parts = csv_parts or {}
+		self.parquet_data = parquet_data
+
+	def ls(self, path, exclude_empty=False, **kwargs):
+		paths = list(self.csv_parts) if self.parquet_data is None else ['bucket/unload/0000_part_00.parquet']
+		return [SimpleNamespace(path=path) for path in sorted(paths)]
+
+	def iter_csv(self, path, chunksize=100000, **kwargs):
+		return iter(self.csv_parts[path.replace(self.root, '', 1)])
+
+	def read_parquet(self, path, engine='spark', workers=8, **kwargs):
+		return self.parquet_data
+
+
+class StubRedshift(BasicRedshift):
+	"""
+	a Redshift that records its queries instead of running them
+	"""
+	def __init__(self):
+		super().__init__(user_id='user', password='password', server='server', database='database')
+		self.queries = []
+
+	def _execute(self, query, retry=False):
+		self.queries.append(query)
+
+	def get_dataframe(self, query, echo=1, **kwargs):
+		self.queries.append(query)
+		return pandas.DataFrame({'id': [], 'name': []})
+
+
+def test_unload_query():
+	redshift = StubRedshift()
+	query = redshift.get_unload_query(query=QUERY, s3_path='s3://bucket/unload', s3=StubS3(), file_format='csv')
+	assert "UNLOAD ('SELECT id, name FROM schema.table WHERE name = ''a''')" in query
+	assert "TO 's3://bucket/unload/'" in query
+	assert "IAM_ROLE 'arn:aws:iam::123456789012:role/unload'" in query
+	assert 'FORMAT AS CSV HEADER GZIP' in query
+	assert 'PARALLEL ON' in query
+	assert 'CLEANPATH' in query
+
+
+def test_unload_reads_csv_parts():
+	s3 = StubS3(csv_parts={
+		'bucket/unload/0000_part_00.gz': [pandas.DataFrame({'id': [1, 2], 'name': ['a', 'a']})],
+		'bucket/unload/0001_part_00.gz': [pandas.DataFrame({'id': [3], 'name': ['a']})]
+	})
+	redshift = StubRedshift()
+	result = redshift.unload(query=QUERY, s3_path='s3://bucket/unload', s3=s3, file_format='csv', echo=0)
+	assert redshift.queries[0].strip().startswith('UNLOAD')
+	assert list(result['id']) == [1, 2, 3]
+
+
+def test_unload_without_rows_returns_the_columns():
+	s3 = StubS3(csv_parts={
+		'bucket/unload/0000_part_00.gz': [],
+		'bucket/unload/0001_part_00.gz': []
+	})
+	redshift = StubRedshift()
+	result = redshift.unload(query=QUERY, s3_path='s3://bucket/unload', s3=s3, file_format='csv', echo=0)
+	assert len(result) == 0
+	assert list(result.columns) == ['id', 'name']
+	assert redshift.queries[-1].endswith('LIMIT 0')
+
+
+def test_unload_without_files_returns_the_columns():
+	redshift = StubRedshift()
+	result = redshift.unload(query=QUERY, s3_path='s3://bucket/unload', s3=StubS3(), file_format='csv', echo=0)
+	assert len(result) == 0
+	assert list(result.columns) == ['id', 'name']
+
+
+def test_unload_reads_parquet():
+	data = pandas.DataFrame({'id': [1], 'name': ['a']})
+	redshift = StubRedshift()
+	result = redshift.unload(query=QUERY, s3_path='s3://bucket/unload', s3=StubS3(parquet_data=data), echo=0)
+	assert result.equals(data)
@@ -0,0 +1,111 @@
+import pytest
+
+PATHS = {
+	's3://bucket/data/a.csv': b'1',
+	's3://bucket/data/x/b.csv': b'22',
+	's3://bucket/data/x/c.csv': b'333',
+	's3://bucket/data/x/deep/d.csv': b'4444',
+	's3://bucket/data/y/e.csv': b'55555'
+}
+
+
+@pytest.fixture
+def tree_s3(s3):
+	for path, body in PATHS.items():
+		s3.file_system.put(path=path, body=body)
+	return s3
+
+
+def get_walk(s3, **kwargs):
+	return [
+		(directory.path, [sub.path for sub in dirs], [file.path for file in files])
+		for directory, dirs, files in s3.walk(path='s3://bucket/data', **kwargs)
+	]
+
+
+def test_walk_is_top_down_and_sorted(tree_s3):
+	assert get_walk(tree_s3) == [
+		('bucket/data', ['bucket/data/x', 'bucket/data/y'], ['bucket/data/a.csv']),
+		('bucket/data/x', ['bucket/data/x/deep'], ['bucket/data/x/b.csv', 'bucket/data/x/c.csv']),
+		('bucket/data/x/deep', [], ['bucket/data/x/deep/d.csv']),
+		('bucket/data/y', [], ['bucket/data/y/e.csv'])
+	]
+
+
+@pytest.mark.parametrize('max_depth, directories', [
+	(0, ['bucket/data']),
+	(1, ['bucket/data', 'bucket/data/x', 'bucket/data/y']),
+	(None, ['bucket/data', 'bucket/data/x', 'bucket/data/x/deep', 'bucket/data/y'])
+])
+def test_walk_max_depth(tree_s3, max_depth, directories):
+	assert [directory for directory, _, _ in get_walk(tree_s3, max_depth=max_depth)] == directories
+
+
+def test_walk_stops_listing_when_closed(tree_s3):
+	walker = tree_s3.walk(path='s3://bucket/data', workers=1)
+	next(walker)
+	walker.close()
+	# the root and at most the subdirectories submitted before the first yield
+	assert tree_s3.file_system.client.calls.count('list_objects_v2') <= 3
+
+
+def test_du_adds_every_subtree_to_its_parents(tree_s3):
+	pytest.importorskip('pandas')
+	result = tree_s3.du(path='s3://bucket/data')
+	assert result.to_dict(orient='records') == [
+		{'path': 'bucket/data', 'depth': 0, 'num_objects': 5, 'bytes': 15},
+		{'path': 'bucket/data/x', 'depth': 1, 'num_objects': 3, 'bytes': 9},
+		{'path': 'bucket/data/x/deep', 'depth': 2, 'num_objects': 1, 'bytes': 4},
+		{'path': 'bucket/data/y', 'depth': 1, 'num_objects': 1, 'bytes': 5}
+	]
+
+
+def test_tree(tree_s3, capsys):
+	tree_s3.tree(path='s3://bucket/data', indentation='  ')
+	assert capsys.readouterr().out.splitlines() == [
+		's3://bucket/data/',
+		'  a.csv',
+		'  x/',
+		'    b.csv',
+		'    c.csv',
+		'    deep/',
+		'      d.csv',
+		'  y/',
+		'    e.csv'
+	]
+
+
+def test_tree_depth_limit(tree_s3, capsys):
+	tree_s3.tree(path='s3://bucket/data', depth_limit=1, indentation='  ')
+	assert capsys.readouterr().out.splitlines() == [
+		's3://bucket/data/',
+		'  a.csv',
+		'  x/',
+		'    ...',
+		'  y/',
+		'    ...'
+	]
+
+
+def test_tree_depth_limit_prints_no_ellipsis_for_empty_directories(tree_s3, capsys):
+	# a directory marker, like the one mkdir makes, is a directory without entries
+	tree_s3.file_system.put(path='s3://bucket/data/empty/', body=b'')
+	tree_s3.tree(path='s3://bucket/data', depth_limit=1, indentation='  ')
+	assert capsys.readouterr().out.splitlines() == [
+		's3://bucket/data/',
+		'  a.csv',
+		'  empty',
+		'  x/',
+		'    ...',
+		'  y/',
+		'    ...'
+	]
+
+
+@pytest.mark.parametrize('path, output', [
+	('s3://bucket/data', ['s3://bucket/data/', '  ...']),
+	('s3://bucket/missing', ['s3://bucket/missing'])
+])
+def test_tree_depth_limit_of_zero(tree_s3, capsys, path, output):
+	tree_s3.tree(path=path, depth_limit=0, indentation='  ')
+	assert capsys.readouterr().out.splitlines() == output